@@ -1,2 +1,41 @@
-from .data_handler import load_crop_data
-CROP_DATA = load_crop_data()
+import sys
+import time
+import pkgutil
+import importlib
+import multiprocessing
+
+_import_started = time.perf_counter()
+
+from .startup import attach_to_action_server, record
+
+
+def __getattr__(name):
+    # Deferred so importing the package never builds the crop frame
+    if name == "CROP_DATA":
+        from .snapshot import get_crop_snapshot
+        return get_crop_snapshot().df
+    if name in ("load_crop_data", "get_crop_snapshot"):
+        from . import data_handler, snapshot
+        return getattr(data_handler if name == "load_crop_data" else snapshot, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def _served():
+    """True when an action server is registering this package (not a CLI, benchmark or loader worker)."""
+    return "rasa_sdk.executor" in sys.modules and multiprocessing.parent_process() is None
+
+
+def _import_submodules():
+    """Import every submodule, as the action server's register_package is about to."""
+    for module in pkgutil.iter_modules(__path__, prefix=__name__ + "."):
+        importlib.import_module(module.name)
+
+
+# Nothing data-related is loaded here: the crop snapshot and friends are warmed
+# on a background thread once the server starts (SAMARTH_FAST_START=0 warms
+# synchronously instead). `python -m actions.ingest`, the benchmarks and
+# spawned loader workers import the package without any side effects.
+if _served():
+    _import_submodules()  # timed here; registration then has nothing left to import
+    record("package import", time.perf_counter() - _import_started)
+    attach_to_action_server(_import_started)
@@ -1,22 +1,26 @@
 import os
-import io
-import base64
-import requests
-import pandas as pd
-import numpy as np
-import matplotlib.pyplot as plt
 from datetime import datetime
-from sklearn.linear_model import LinearRegression
 from rasa_sdk import Action, Tracker
 from rasa_sdk.executor import CollectingDispatcher
 from dotenv import load_dotenv
-from .data_handler import load_crop_data, load_rainfall_data
+from .datasets import DATASETS
+from .cache import RESPONSE_CACHE, make_key
+from .fanout import gather_within
+from .http_client import get_json_async
+from .pagination import MAX_RECORDS, PAGE_SIZE, aiter_record_batches
+from .aggregate import RainfallAggregator
+from .cube import cube_for, local_rainfall_stats
+from .forecast import state_forecast, fit_series
+from .gazetteer import extract_entities
+from .snapshot import get_crop_snapshot
+from .panel import get_panel
+from .singleflight import QUERY_FLIGHTS
+from .resilience import UpstreamUnavailable, breaker_for, hedged, turn_budget
+from .metrics import ROWS_PROCESSED, action_span, span
+from .progress import emit, streaming
 # ---------------------------------------------------------------------
 # 🔐 ENV & SECURITY CONFIG
 # ---------------------------------------------------------------------
-from dotenv import load_dotenv
-import os
-
 # Load .env inside current folder
 load_dotenv(dotenv_path=os.path.join(os.path.dirname(__file__), '.env'))
 
@@ -25,26 +29,6 @@ OPENAI_KEY = os.getenv("OPENAI_API_KEY")
 SARVAM_KEY = os.getenv("SARVAM_API_KEY")
 
 SECURE_HEADERS = {"User-Agent": "SamarthRainfallBot/1.0"}
-# ---------------------------------------------------------------------
-# 🌧️ VERIFIED DATASETS
-# ---------------------------------------------------------------------
-DATASETS = {
-    "rainfall_district": {
-        "id": "6c05cd1b-ed59-40c2-bc31-e314f39c6971",
-        "desc": "District-wise Daily Rainfall Data (All India, IMD)",
-        "filters": ["State", "Year", "Month", "District"]
-    },
-    "rainfall_subbasin": {
-        "id": "da428447-700a-41e9-a56a-d7855ffb672f",
-        "desc": "Daily Sub-basin-wise Rainfall Data (HVD)",
-        "filters": ["Sub-basin", "Date"]
-    },
-    "rainfall_rajasthan_monsoon": {
-        "id": "c9302010-023d-4c91-863e-3177079c0410",
-        "desc": "Rajasthan Monsoon 2018 Rainfall Statistics",
-        "filters": ["District"]
-    }
-}
 
 # ---------------------------------------------------------------------
 # ☀️ SEASONS
@@ -60,46 +44,163 @@ SEASON_MAP = {
 # ---------------------------------------------------------------------
 # 🧩 HELPER FUNCTIONS
 # ---------------------------------------------------------------------
-def query_dataset(resource_id, filters):
-    """Securely query data.gov.in dataset"""
+def _dataset_request(resource_id, filters, offset=0, limit=PAGE_SIZE):
+    """URL + query params for one page of a data.gov.in resource"""
     url = f"https://api.data.gov.in/resource/{resource_id}"
-    params = {"api-key": API_KEY, "format": "json", "limit": 1000}
+    params = {"api-key": API_KEY, "format": "json", "offset": offset, "limit": limit}
     for k, v in filters.items():
         if v:
             params[f"filters[{k}]"] = v
+    return url, params
+
+
+def _page_key(resource_id, filters, offset, limit):
+    return make_key(resource_id, {**filters, "_offset": offset, "_limit": limit})
 
+
+async def query_dataset_async(resource_id, filters, offset=0, limit=PAGE_SIZE):
+    """
+    Query one page of a data.gov.in dataset on the pooled keep-alive client
+    (served from the shared response cache). While the dataset's circuit is
+    open, any cached copy is served however old.
+    """
+    key = _page_key(resource_id, filters, offset, limit)
     try:
-        res = requests.get(url, params=params, headers=SECURE_HEADERS, timeout=15)
-        if res.status_code == 200:
-            return res.json()
-        print(f"[WARN] HTTP {res.status_code}: {url}")
-        return {}
-    except Exception as e:
-        print(f"[ERROR] API query failed: {e}")
-        return {}
+        return await RESPONSE_CACHE.get_or_fetch_async(
+            key, lambda: _fetch_dataset_async(resource_id, filters, offset, limit)
+        )
+    except UpstreamUnavailable:
+        cached = RESPONSE_CACHE.peek(key)
+        if cached is None:
+            raise
+        return cached
+
+
+async def _fetch_dataset_async(resource_id, filters, offset=0, limit=PAGE_SIZE):
+    """Uncached non-blocking data.gov.in request (guarded by the dataset's circuit breaker)"""
+    return await get_json_async(*_dataset_request(resource_id, filters, offset, limit), breaker=breaker_for(resource_id))
+
+
+async def rainfall_stats(resource_id, filters, track_regions=True):
+    """
+    Rainfall stats for a dataset slice: local warehouse partitions first, else every API page.
+    track_regions=False skips the per-region group-by when only overall stats are needed.
+    Concurrent identical slices share one computation; the result is read-only.
+    """
+    async def _compute():
+        with span("aggregation"):
+            agg = local_rainfall_stats(resource_id, filters)
+        if not agg.empty:
+            ROWS_PROCESSED.inc(agg.rows, source="warehouse")
+            return agg
+        agg = RainfallAggregator(track_regions)
+
+        def truncated():
+            agg.truncated = True
+
+        pages = aiter_record_batches(
+            lambda offset, limit: query_dataset_async(resource_id, filters, offset, limit), on_truncated=truncated
+        )
+        try:
+            async for records in pages:
+                with span("aggregation"):
+                    fed = agg.feed(records)
+                if not fed:
+                    await pages.aclose()
+                    break
+        except UpstreamUnavailable as e:
+            print(f"[WARN] Rainfall slice cut short: {e}")
+            agg.degraded = True
+        ROWS_PROCESSED.inc(agg.rows, source="api")
+        return agg
+
+    return await QUERY_FLIGHTS.do_async(make_key(resource_id, {**filters, "_regions": track_regions}), _compute)
+
+
+async def rainfall_stats_for_months(resource_id, filters, months=None):
+    """rainfall_stats restricted to `months`: one month-filtered slice per month, merged"""
+    if not months:
+        return await rainfall_stats(resource_id, filters)
+    per_month = await gather_within({m: rainfall_stats(resource_id, {**filters, "Month": m}) for m in months})
+    agg = RainfallAggregator()
+    for m in months:
+        if m in per_month:
+            agg.merge(per_month[m])
+        else:
+            agg.degraded = True  # month failed or missed the deadline
+    return agg
+
+
+async def rainfall_with_fallback(state, year, months=None):
+    """
+    (dataset, stats, fell_back) for the main rainfall question: district data,
+    else the sub-basin dataset, which is also hedged in when the district query
+    is slow. stats is None when neither answered within the turn budget.
+    Concurrent identical questions share one run.
+    """
+    district, subbasin = DATASETS["rainfall_district"], DATASETS["rainfall_subbasin"]
+
+    async def _compute():
+        stats, fell_back = await hedged(
+            lambda: rainfall_stats_for_months(district["id"], {"State": state, "Year": year}, months),
+            lambda: rainfall_stats_for_months(subbasin["id"], {"Year": year}, months),
+            useful=lambda agg: not agg.empty or agg.unsupported,
+        )
+        return (subbasin if fell_back else district), stats, fell_back
+
+    return await QUERY_FLIGHTS.do_async(("answer", state, year, tuple(months or ())), _compute)
+
+
+async def yearly_mean_rainfall(resource_id, state, years, on_year=None):
+    """
+    Mean rainfall per year for a state: cube lookups, missing years fetched in parallel.
+    on_year(year, mean) is called for each year as soon as it is known.
+    """
+    cube = cube_for(resource_id)
+    yearly = cube.yearly_means(state, years) if cube else {}
+    if on_year is not None:
+        for y, v in yearly.items():
+            on_year(y, v)
+    missing = [y for y in years if str(y) not in yearly]
+
+    def _report(y, agg):
+        if on_year is not None and not agg.empty:
+            on_year(y, round(agg.overall.mean, 2))
+
+    per_year = await gather_within({
+        str(y): rainfall_stats(resource_id, {"State": state, "Year": str(y)}, track_regions=False) for y in missing
+    }, on_result=_report)
+    yearly.update({y: round(agg.overall.mean, 2) for y, agg in per_year.items() if not agg.empty})
+    return yearly
+
+
+def chart_payload(kind, title, series, unit, source, forecast=None):
+    """
+    Machine-readable chart sent next to the text (json_message → `custom` on the
+    REST channel): kind "bar" or "line", series as ordered [label, value] pairs.
+    """
+    import numpy as np
+    def num(v):
+        return None if v is None or np.isnan(v) else round(float(v), 2)
+
+    chart = {"type": kind, "title": title, "unit": unit, "source": source,
+             "series": [[str(k), num(v)] for k, v in series.items()]}
+    if forecast is not None:
+        chart["forecast"] = {"x": forecast.year, "y": num(forecast.value),
+                             "low": num(max(forecast.low, 0)), "high": num(forecast.high)}
+    return {"chart": chart}
 
 
 def detect_season_from_text(text: str):
-    """Extract season (monsoon/summer/etc.)"""
-    text = text.lower()
-    for s in SEASON_MAP.keys():
-        if s in text:
-            return s
-    return None
+    """Extract season (monsoon/summer/etc., including aliases like kharif/rabi)"""
+    seasons = extract_entities(text).seasons
+    return seasons[0] if seasons else None
 
 
 def get_state_from_text(text: str):
-    """Fallback extraction of state name"""
-    states = [
-        "andhra pradesh","arunachal pradesh","assam","bihar","chhattisgarh","goa","gujarat",
-        "haryana","himachal pradesh","jharkhand","karnataka","kerala","madhya pradesh",
-        "maharashtra","manipur","meghalaya","mizoram","nagaland","odisha","punjab","rajasthan",
-        "sikkim","tamil nadu","telangana","tripura","uttar pradesh","uttarakhand","west bengal"
-    ]
-    for s in states:
-        if s in text.lower():
-            return s.title()
-    return None
+    """Fallback extraction of state name (gazetteer, including aliases like Orissa)"""
+    states = extract_entities(text).states
+    return states[0] if states else None
 
 
 # ---------------------------------------------------------------------
@@ -109,57 +210,76 @@ class ActionSmartRainfall(Action):
     def name(self):
         return "action_smart_rainfall"
 
-    def run(self, dispatcher: CollectingDispatcher, tracker: Tracker, domain):
+    async def run(self, dispatcher: CollectingDispatcher, tracker: Tracker, domain):
+        intent = tracker.latest_message.get("intent", {}).get("name", "")
+        stream_id = (tracker.latest_message.get("metadata") or {}).get("stream_id")  # client wants partial results
+        with action_span(self.name(), intent), turn_budget(), streaming(stream_id):  # budget bounds every upstream call
+            return await self._answer(dispatcher, tracker)
+
+    async def _answer(self, dispatcher, tracker):
+        import numpy as np
+        import pandas as pd
         user_text = tracker.latest_message.get("text", "").lower()
         intent = tracker.latest_message.get("intent", {}).get("name", "")
         dispatcher.utter_message(text="Analyzing rainfall data from data.gov.in... please wait ⏳")
+        emit("text", text="Analyzing rainfall data from data.gov.in... ⏳")
 
         # ------------------- Entity Extraction -------------------
-        state, year, month = None, None, None
-        for ent in tracker.latest_message.get("entities", []):
-            if ent.get("entity") == "state":
-                state = ent["value"].title()
-            elif ent.get("entity") == "number":
-                val = int(ent["value"])
-                if 1900 <= val <= datetime.now().year:
-                    year = str(val)
-            elif ent.get("entity") == "month":
-                month = ent["value"].capitalize()
-
-        if not state:
-            state = get_state_from_text(user_text)
-        season = detect_season_from_text(user_text)
-        if not year:
-            year = "2018"
+        with span("entity_extraction"):
+            state, year, month = None, None, None
+            for ent in tracker.latest_message.get("entities", []):
+                if ent.get("entity") == "state":
+                    state = ent["value"].title()
+                elif ent.get("entity") == "number":
+                    val = int(ent["value"])
+                    if 1900 <= val <= datetime.now().year:
+                        year = str(val)
+                elif ent.get("entity") == "month":
+                    month = ent["value"].capitalize()
+
+            if not state:
+                state = get_state_from_text(user_text)
+            season = detect_season_from_text(user_text)
+            if not year:
+                year = "2018"
+
+        # Seasonal questions only need the season's months (pruned partitions / month filters)
+        months = None
+        if intent == "rainfall_seasonal":
+            if not season:
+                dispatcher.utter_message(text="Please specify a season (monsoon, winter, etc.).")
+                return []
+            months = SEASON_MAP[season]
 
         # ------------------- Query Main Dataset -------------------
-        ds = DATASETS["rainfall_district"]
-        data = query_dataset(ds["id"], {"State": state, "Year": year})
-        if not data.get("records"):
-            dispatcher.utter_message(text=f"No district rainfall data found. Trying sub-basin fallback...")
-            ds = DATASETS["rainfall_subbasin"]
-            data = query_dataset(ds["id"], {"Year": year})
-
-        if not data.get("records"):
-            dispatcher.utter_message(text=f"❌ No rainfall data found for {state or 'this query'}.")
+        with span("fetch"):
+            ds, stats, fell_back = await rainfall_with_fallback(state, year, months)
+        if stats is None:
+            dispatcher.utter_message(text="⏳ data.gov.in is not responding right now. Please try again in a minute.")
             return []
-
-        df = pd.DataFrame(data["records"])
+        if fell_back:
+            dispatcher.utter_message(text="District rainfall data unavailable. Using the sub-basin fallback...")
 
         # ------------------- Normalize Fields -------------------
-        if "Avg_rainfall" in df.columns:
-            df["Rainfall"] = pd.to_numeric(df["Avg_rainfall"], errors="coerce")
-        elif "Rainfall_mm" in df.columns:
-            df["Rainfall"] = pd.to_numeric(df["Rainfall_mm"], errors="coerce")
-        else:
+        if stats.unsupported:
             dispatcher.utter_message(text="Dataset missing rainfall fields.")
             return []
+        if stats.empty:
+            if stats.degraded:
+                dispatcher.utter_message(text="⏳ data.gov.in is unavailable and nothing is cached for this query. Please try again later.")
+            else:
+                dispatcher.utter_message(text=f"❌ No rainfall data found for {state or 'this query'}.")
+            return []
 
-        # Group by region
-        region_col = "District" if "District" in df.columns else "Sub-basin"
-        df_grouped = df.groupby(region_col)["Rainfall"].mean().sort_values(ascending=False)
+        # Group by region (streamed over all pages)
+        with span("aggregation"):
+            avg_rainfall = stats.overall.mean
+            df_grouped = stats.by_region.means()
+        if intent != "compare_rainfall":
+            emit("text", text=f"📊 Average rainfall in {state or 'India'} ({year}): {avg_rainfall:.2f} mm")
 
         msg = f"📊 **Dataset:** {ds['desc']} (data.gov.in)\n\n"
+        chart = None
 
         # ---------------------------------------------------------------------
         # 🌧 INTENT-SPECIFIC LOGIC
@@ -167,10 +287,12 @@ class ActionSmartRainfall(Action):
 
         # 1️⃣ Rainfall Summary
         if intent == "rainfall_summary":
-            msg += f"Average rainfall in {state} ({year}): {df['Rainfall'].mean():.2f} mm\n"
-            msg += "Top 5 regions:\n"
-            for d, v in df_grouped.head(5).items():
-                msg += f"  • {d}: {v:.2f} mm\n"
+            with span("format"):
+                msg += f"Average rainfall in {state} ({year}): {avg_rainfall:.2f} mm\n"
+                msg += "Top 5 regions:\n"
+                for d, v in df_grouped.head(5).items():
+                    msg += f"  • {d}: {v:.2f} mm\n"
+                chart = chart_payload("bar", f"Top regions by rainfall in {state} ({year})", df_grouped.head(5), "mm", ds["id"])
 
         # 2️⃣ Compare Rainfall
         elif intent == "compare_rainfall":
@@ -179,212 +301,264 @@ class ActionSmartRainfall(Action):
                 dispatcher.utter_message(text="Please mention two states to compare rainfall.")
                 return []
             s1, s2 = states[0], states[1]
-            d1 = query_dataset(ds["id"], {"State": s1, "Year": year})
-            d2 = query_dataset(ds["id"], {"State": s2, "Year": year})
-            if not d1.get("records") or not d2.get("records"):
+
+            def _report(s, agg):
+                if not agg.empty:
+                    emit("point", label=s, value=round(agg.overall.mean, 2), unit="mm")
+
+            with span("fetch"):
+                both = await gather_within({
+                    s: rainfall_stats(ds["id"], {"State": s, "Year": year}, track_regions=False) for s in (s1, s2)
+                }, on_result=_report)
+            a1, a2 = both.get(s1), both.get(s2)
+            if not a1 or not a2 or a1.empty or a2.empty:
                 dispatcher.utter_message(text="Data unavailable for one or both states.")
                 return []
-            df1, df2 = pd.DataFrame(d1["records"]), pd.DataFrame(d2["records"])
-            df1["Avg_rainfall"] = pd.to_numeric(df1.get("Avg_rainfall"), errors="coerce")
-            df2["Avg_rainfall"] = pd.to_numeric(df2.get("Avg_rainfall"), errors="coerce")
-            avg1, avg2 = df1["Avg_rainfall"].mean(), df2["Avg_rainfall"].mean()
-            diff = abs(avg1 - avg2)
-            higher = s1 if avg1 > avg2 else s2
-            msg += f"{s1}: {avg1:.2f} mm\n{s2}: {avg2:.2f} mm\n➡️ {higher} received {diff:.2f} mm more rainfall."
+            with span("format"):
+                avg1, avg2 = a1.overall.mean, a2.overall.mean
+                diff = abs(avg1 - avg2)
+                higher = s1 if avg1 > avg2 else s2
+                msg += f"{s1}: {avg1:.2f} mm\n{s2}: {avg2:.2f} mm\n➡️ {higher} received {diff:.2f} mm more rainfall."
+                chart = chart_payload("bar", f"Rainfall comparison ({year})", {s1: avg1, s2: avg2}, "mm", ds["id"])
 
         # 3️⃣ Rainfall Trend
         elif intent == "rainfall_trend":
-            yearly = {}
-            for y in range(2018, 2025):
-                r = query_dataset(ds["id"], {"State": state, "Year": str(y)})
-                if not r.get("records"):
-                    continue
-                dfx = pd.DataFrame(r["records"])
-                dfx["Avg_rainfall"] = pd.to_numeric(dfx["Avg_rainfall"], errors="coerce")
-                yearly[str(y)] = round(dfx["Avg_rainfall"].mean(), 2)
+            with span("fetch"):
+                yearly = await yearly_mean_rainfall(
+                    ds["id"], state, range(2018, 2025),
+                    on_year=lambda y, v: emit("point", label=str(y), value=v, unit="mm"),
+                )
             if not yearly:
                 dispatcher.utter_message(text=f"No yearly data for {state}.")
                 return []
-            trend_df = pd.DataFrame(list(yearly.items()), columns=["Year", "Rainfall"])
-            trend_df["Year"] = trend_df["Year"].astype(int)
-            trend_df = trend_df.sort_values("Year")
-            direction = "📈 Increasing" if trend_df["Rainfall"].iloc[-1] > trend_df["Rainfall"].iloc[0] else "📉 Decreasing"
-            msg += f"Rainfall Trend ({trend_df['Year'].min()}–{trend_df['Year'].max()}):\n"
-            for _, row in trend_df.iterrows():
-                msg += f"  • {row['Year']}: {row['Rainfall']} mm\n"
-            msg += f"\nTrend: {direction}"
+            with span("aggregation"):
+                trend_df = pd.DataFrame(list(yearly.items()), columns=["Year", "Rainfall"])
+                trend_df["Year"] = trend_df["Year"].astype(int)
+                trend_df = trend_df.sort_values("Year")
+                direction = "📈 Increasing" if trend_df["Rainfall"].iloc[-1] > trend_df["Rainfall"].iloc[0] else "📉 Decreasing"
+            with span("format"):
+                msg += f"Rainfall Trend ({trend_df['Year'].min()}–{trend_df['Year'].max()}):\n"
+                for _, row in trend_df.iterrows():
+                    msg += f"  • {row['Year']}: {row['Rainfall']} mm\n"
+                msg += f"\nTrend: {direction}"
+                chart = chart_payload(
+                    "line", f"Rainfall trend in {state}", dict(zip(trend_df["Year"], trend_df["Rainfall"])), "mm", ds["id"]
+                )
 
         # 4️⃣ Predict Rainfall (next year forecast)
         elif intent == "predict_rainfall":
-            yearly = {}
-            for y in range(2018, 2025):
-                r = query_dataset(ds["id"], {"State": state, "Year": str(y)})
-                if not r.get("records"):
-                    continue
-                dfx = pd.DataFrame(r["records"])
-                dfx["Avg_rainfall"] = pd.to_numeric(dfx["Avg_rainfall"], errors="coerce")
-                yearly[str(y)] = round(dfx["Avg_rainfall"].mean(), 2)
-            if not yearly:
+            with span("aggregation"):
+                forecast = state_forecast(ds["id"], state)
+                if forecast is not None:
+                    cube = cube_for(ds["id"])
+                    yearly = cube.yearly_means(state) if cube else {}
+            if forecast is None:
+                with span("fetch"):
+                    yearly = await yearly_mean_rainfall(ds["id"], state, range(2018, 2025))
+                with span("aggregation"):
+                    forecast = fit_series(yearly)
+            if forecast is None:
                 dispatcher.utter_message(text=f"No data for rainfall prediction in {state}.")
                 return []
-            trend_df = pd.DataFrame(list(yearly.items()), columns=["Year", "Rainfall"])
-            trend_df["Year"] = trend_df["Year"].astype(int)
-            model = LinearRegression().fit(trend_df["Year"].values.reshape(-1, 1), trend_df["Rainfall"])
-            next_year = trend_df["Year"].max() + 1
-            pred = model.predict(np.array([[next_year]]))[0]
-            msg += f"🔮 Predicted average rainfall in {state} for {next_year}: {pred:.2f} mm"
+            with span("format"):
+                msg += f"🔮 Predicted average rainfall in {state} for {forecast.year}: {forecast.value:.2f} mm"
+                if not np.isnan(forecast.low):
+                    msg += f"\n95% range: {max(forecast.low, 0):.2f}–{forecast.high:.2f} mm ({forecast.points} years of data)"
+                history = dict(sorted(yearly.items(), key=lambda kv: int(kv[0])))
+                chart = chart_payload("line", f"Rainfall trend & forecast for {state}", history, "mm", ds["id"], forecast)
 
         # 5️⃣ Rainfall Extremes
         elif intent == "rainfall_extremes":
-            msg += "🌧️ Top 3 Rainiest:\n"
-            for d, v in df_grouped.head(3).items():
-                msg += f"  • {d}: {v:.2f} mm\n"
-            msg += "\n☁️ Driest 3 Regions:\n"
-            for d, v in df_grouped.tail(3).items():
-                msg += f"  • {d}: {v:.2f} mm\n"
+            with span("format"):
+                msg += "🌧️ Top 3 Rainiest:\n"
+                for d, v in df_grouped.head(3).items():
+                    msg += f"  • {d}: {v:.2f} mm\n"
+                msg += "\n☁️ Driest 3 Regions:\n"
+                for d, v in df_grouped.tail(3).items():
+                    msg += f"  • {d}: {v:.2f} mm\n"
+                extremes = {**df_grouped.head(3).to_dict(), **df_grouped.tail(3).to_dict()}
+                chart = chart_payload("bar", f"Wettest and driest regions in {state} ({year})", extremes, "mm", ds["id"])
 
         # 6️⃣ Seasonal Rainfall
         elif intent == "rainfall_seasonal":
-            if not season:
-                dispatcher.utter_message(text="Please specify a season (monsoon, winter, etc.).")
-                return []
-            msg += f"🌀 Season detected: {season.title()} ({', '.join(SEASON_MAP[season])})\n"
-            msg += f"Average rainfall: {df['Rainfall'].mean():.2f} mm"
+            # Anomaly against the cached long-term seasonal baseline (local cube only)
+            with span("aggregation"):
+                seasonal_total = stats.mean_region_total
+                cube = cube_for(ds["id"])
+                baseline, used = cube.seasonal_baseline(state, months) if cube else (np.nan, [])
+            with span("format"):
+                msg += f"🌀 Season detected: {season.title()} ({', '.join(months)})\n"
+                msg += f"Seasonal rainfall in {state or 'India'} ({year}): {seasonal_total:.2f} mm (average {stats.region_col or 'region'} total)\n"
+                msg += f"Average rainfall: {avg_rainfall:.2f} mm/day"
+                if not np.isnan(baseline) and baseline > 0:
+                    anomaly = (seasonal_total - baseline) / baseline * 100
+                    msg += (
+                        f"\nAnomaly: {anomaly:+.1f}% vs long-term {season} mean of {baseline:.2f} mm "
+                        f"({min(used)}–{max(used)})"
+                    )
 
         # 7️⃣ General Rainfall
         elif intent == "rainfall_general":
-            msg += f"Average rainfall for {state} ({year}): {df['Rainfall'].mean():.2f} mm"
+            msg += f"Average rainfall for {state} ({year}): {avg_rainfall:.2f} mm"
 
+        if stats.degraded:
+            msg += "\n\n⚠️ data.gov.in is degraded; figures come from cached or local data and may be incomplete."
+        if stats.truncated:
+            msg += f"\n\n⚠️ More than {MAX_RECORDS:,} records matched; figures cover only the first {MAX_RECORDS:,}."
         msg += "\n\n_Source: data.gov.in_"
-        dispatcher.utter_message(text=msg)
+        dispatcher.utter_message(text=msg, json_message=chart)
         return []
-from rasa_sdk import Action, Tracker
-from rasa_sdk.executor import CollectingDispatcher
-from .data_handler import load_crop_data, load_rainfall_data
-import pandas as pd
-import numpy as np
 
 class ActionSmartAgriInsight(Action):
     def name(self):
         return "action_smart_agri_insight"
 
-    def run(self, dispatcher: CollectingDispatcher, tracker: Tracker, domain):
+    async def run(self, dispatcher: CollectingDispatcher, tracker: Tracker, domain):
+        intent = tracker.latest_message.get("intent", {}).get("name", "")
+        with action_span(self.name(), intent):
+            return await self._answer(dispatcher, tracker)
+
+    async def _answer(self, dispatcher, tracker):
+        import numpy as np
         user_text = tracker.latest_message.get("text", "").lower()
         entities = tracker.latest_message.get("entities", [])
 
-        states = [e["value"].title() for e in entities if e["entity"] == "state"]
-        crops = [e["value"].title() for e in entities if e["entity"] == "crop"]
-        numbers = [int(e["value"]) for e in entities if e["entity"] == "number"]
+        with span("entity_extraction"):
+            states = [e["value"].title() for e in entities if e["entity"] == "state"]
+            crops = [e["value"].title() for e in entities if e["entity"] == "crop"]
+            numbers = [int(e["value"]) for e in entities if e["entity"] == "number"]
+
+            # One gazetteer pass for keywords, plus states/crops the NLU missed
+            found = extract_entities(user_text)
+            keywords = found.keywords
+            states = states or found.states
+            crops = crops or found.crops
         N = numbers[0] if numbers else 5  # year window
         M = 3  # top crops to show
 
-        crop_df = load_crop_data()
-        msg = ""
+        with span("fetch"):
+            snapshot = get_crop_snapshot()  # shared read-only frame + (State, Crop) index
+        index = snapshot.index
+        source = f"crop_snapshot/{snapshot.version}"
+        msg, chart = "", None
 
         # CASE 1: Compare two crops within one state
-        if "compare" in user_text and len(crops) >= 2 and len(states) == 1:
+        if "compare" in keywords and len(crops) >= 2 and len(states) == 1:
             c1, c2 = crops[:2]
             state = states[0]
-            df = crop_df[crop_df["District"].notna()]
 
-            mean1 = df[df["Crop"] == c1]["Production"].mean()
-            mean2 = df[df["Crop"] == c2]["Production"].mean()
+            with span("aggregation"):
+                mean1 = index.mean(c1, state)
+                mean2 = index.mean(c2, state)
+            missing = [c for c, m in ((c1, mean1), (c2, mean2)) if np.isnan(m)]
+            if missing:
+                dispatcher.utter_message(text=f"No production data found for {' or '.join(missing)} in {state}.")
+                return []
 
-            msg = (
-                f"**Crop Production Comparison in {state}:**\n\n"
-                f"{c1}: {mean1:.2f} tonnes\n"
-                f"{c2}: {mean2:.2f} tonnes\n\n"
-                f"{c1 if mean1 > mean2 else c2} shows higher average yield in {state}.\n\n"
-                f"_Source: Ministry of Agriculture Crop Dataset (data.gov.in)_"
-            )
+            with span("format"):
+                msg = (
+                    f"**Crop Production Comparison in {state}:**\n\n"
+                    f"{c1}: {mean1:.2f} tonnes\n"
+                    f"{c2}: {mean2:.2f} tonnes\n\n"
+                    f"{c1 if mean1 > mean2 else c2} shows higher average yield in {state}.\n\n"
+                    f"_Source: Ministry of Agriculture Crop Dataset (data.gov.in)_"
+                )
+                chart = chart_payload("bar", f"Crop production in {state}", {c1: mean1, c2: mean2}, "tonnes", source)
 
             # CASE 2: Highest and lowest production (one or two states)
-        elif "highest" in user_text and "lowest" in user_text and crops:
+        elif "highest" in keywords and "lowest" in keywords and crops:
             c = crops[0]
-            df = crop_df[crop_df["Crop"].str.lower() == c.lower()]
 
             # --- SINGLE STATE ---
             if len(states) == 1:
                 state = states[0]
-
-                # Filter for the given crop
-                df = crop_df[(crop_df["Crop"].str.lower() == c.lower()) & (crop_df["District"].notna())]
-
-                # If state column exists in future dataset, filter by it
-                if "State" in df.columns:
-                    df = df[df["State"].str.lower() == state.lower()]
+                with span("aggregation"):
+                    stats = index.get(c, state)  # districts pre-sorted by production
 
                 # Handle empty or invalid data
-                if df.empty or "Production" not in df.columns:
+                if stats is None:
                     dispatcher.utter_message(text=f"No production data found for {c} in {state}.")
                     return []
 
-                # Compute extremes
-                highest = df.sort_values("Production", ascending=False).head(1)
-                lowest = df.sort_values("Production", ascending=True).head(1)
+                # Extremes are the ends of the pre-sorted index
+                (hi_d, hi_p), (lo_d, lo_p) = stats.highest, stats.lowest
 
-                msg = (
-                    f"**{c} Production in {state}:**\n\n"
-                    f"Highest: {highest.iloc[0]['District']} ({highest.iloc[0]['Production']:.2f} tonnes)\n"
-                    f"Lowest: {lowest.iloc[0]['District']} ({lowest.iloc[0]['Production']:.2f} tonnes)\n\n"
-                    f"_Source: Ministry of Agriculture Crop Production Dataset (data.gov.in)_"
-                )
+                with span("format"):
+                    msg = (
+                        f"**{c} Production in {state}:**\n\n"
+                        f"Highest: {hi_d} ({hi_p:.2f} tonnes)\n"
+                        f"Lowest: {lo_d} ({lo_p:.2f} tonnes)\n\n"
+                        f"_Source: Ministry of Agriculture Crop Production Dataset (data.gov.in)_"
+                    )
+                    chart = chart_payload("bar", f"{c} production extremes in {state}", {hi_d: hi_p, lo_d: lo_p}, "tonnes", source)
 
             # --- TWO STATES ---
             elif len(states) >= 2:
                 s1, s2 = states[:2]
+                with span("aggregation"):
+                    per_state = {s: index.get(c, s) for s in (s1, s2)}
 
-                if df.empty or "Production" not in df.columns:
-                    dispatcher.utter_message(text=f"No production data found for {c}.")
+                if all(st is None for st in per_state.values()):
+                    dispatcher.utter_message(text=f"No production data found for {c} in {s1} or {s2}.")
                     return []
 
-                highest = df.sort_values("Production", ascending=False).head(1)
-                lowest = df.sort_values("Production", ascending=True).head(1)
-
-                msg = (
-                    f"**{c} Production Extremes:**\n\n"
-                    f"Highest: {highest.iloc[0]['District']} ({highest.iloc[0]['Production']:.2f} tonnes)\n"
-                    f"Lowest: {lowest.iloc[0]['District']} ({lowest.iloc[0]['Production']:.2f} tonnes)\n\n"
-                    f"_Source: Ministry of Agriculture Crop Production Dataset (data.gov.in)_"
-                )
+                with span("format"):
+                    msg = f"**{c} Production Extremes:**\n\n"
+                    extremes = {}
+                    for s, st in per_state.items():
+                        if st is None:
+                            msg += f"{s}: no data\n\n"
+                            continue
+                        (hi_d, hi_p), (lo_d, lo_p) = st.highest, st.lowest
+                        extremes.update({f"{hi_d} ({s})": hi_p, f"{lo_d} ({s})": lo_p})
+                        msg += (
+                            f"{s}:\n"
+                            f"Highest: {hi_d} ({hi_p:.2f} tonnes)\n"
+                            f"Lowest: {lo_d} ({lo_p:.2f} tonnes)\n\n"
+                        )
+                    msg += "_Source: Ministry of Agriculture Crop Production Dataset (data.gov.in)_"
+                    chart = chart_payload("bar", f"{c} production extremes", extremes, "tonnes", source)
 
             else:
                 dispatcher.utter_message(text="Please specify a crop and at least one state.")
                 return []
 
-            dispatcher.utter_message(text=msg)
+            dispatcher.utter_message(text=msg, json_message=chart)
             return []
 
 
         # CASE 3: Show top N districts for a crop
-        elif "top" in user_text and crops and "district" in user_text:
+        elif "top" in keywords and crops and "district" in keywords:
             c = crops[0]
-            df = crop_df[crop_df["Crop"].str.lower() == c.lower()]
-            top_districts = df.sort_values("Production", ascending=False).head(M)
-            msg = f"**Top {M} {c}-Producing Districts:**\n\n"
-            for _, row in top_districts.iterrows():
-                msg += f"{row['District']}: {row['Production']:.2f} tonnes\n"
-            msg += "\n_Source: Ministry of Agriculture Crop Production Dataset (data.gov.in)_"
+            state = states[0] if states else None
+            with span("aggregation"):
+                stats = index.get(c, state)
+                top_districts = stats.top(M) if stats else []
+            with span("format"):
+                msg = f"**Top {M} {c}-Producing Districts{f' in {state}' if state else ''}:**\n\n"
+                for district, production in top_districts:
+                    msg += f"{district}: {production:.2f} tonnes\n"
+                if not top_districts:
+                    msg += f"No production data found for {c}{f' in {state}' if state else ''}.\n"
+                else:
+                    chart = chart_payload("bar", f"Top {c}-producing districts{f' in {state}' if state else ''}",
+                                          dict(top_districts), "tonnes", source)
+                msg += "\n_Source: Ministry of Agriculture Crop Production Dataset (data.gov.in)_"
 
         # CASE 4: Production trend correlation with rainfall
-        elif "trend" in user_text and "correlate" in user_text:
+        elif "trend" in keywords and "correlate" in keywords:
             if not crops or not states:
                 dispatcher.utter_message(text="Please specify a crop and a state.")
                 return []
             crop = crops[0]
             state = states[0]
-            df = crop_df[crop_df["Crop"].str.lower() == crop.lower()]
-            rain = load_rainfall_data(state)
-            df["Production"] = pd.to_numeric(df["Production"], errors="coerce")
-            mean_prod = df["Production"].mean()
-            mean_rain = rain["Rainfall"].mean() if "Rainfall" in rain else np.nan
+            with span("aggregation"):
+                stats = get_panel().get(state, crop)  # precomputed District × Crop × rainfall metrics
 
-            if np.isnan(mean_rain) or np.isnan(mean_prod):
+            if stats is None or np.isnan(stats.pearson):
                 msg += f"Data incomplete for {crop} or rainfall in {state}."
             else:
-                prod_vals = df["Production"].fillna(mean_prod)
-                rain_vals = np.repeat(mean_rain, len(prod_vals))
-                corr = float(np.corrcoef(prod_vals, rain_vals)[0, 1]) if np.std(prod_vals) and np.std(rain_vals) else 0
+                corr = stats.pearson
 
                 if corr > 0.5:
                     relation = "Strong positive correlation — rainfall supports yield."
@@ -393,48 +567,76 @@ class ActionSmartAgriInsight(Action):
                 else:
                     relation = "Weak or neutral correlation — rainfall has minimal effect."
 
-                msg = (
-                    f"**{crop} Production vs Rainfall in {state}:**\n\n"
-                    f"Average Production: {mean_prod:.2f} tonnes\n"
-                    f"Average Rainfall: {mean_rain:.2f} mm\n"
-                    f"Correlation: {corr:.2f}\n"
-                    f"{relation}\n\n"
-                    f"_Source: IMD + Crop Production Datasets (data.gov.in)_"
-                )
+                with span("format"):
+                    msg = (
+                        f"**{crop} Production vs Rainfall in {state}:**\n\n"
+                        f"Average Production: {stats.mean_production:.2f} tonnes\n"
+                        f"Average Rainfall: {stats.mean_rainfall:.2f} mm\n"
+                        f"Correlation: {corr:.2f} (Spearman {stats.spearman:.2f}, {stats.n} districts)\n"
+                        f"Rainfall elasticity: {stats.elasticity:+.2f}% production per 1% rainfall\n"
+                        f"{relation}\n\n"
+                        f"_Source: IMD + Crop Production Datasets (data.gov.in)_"
+                    )
 
                 # CASE 5: Policy suggestions
-        elif "policy" in user_text or "promote" in user_text:
+        elif "policy" in keywords or "promote" in keywords:
             if len(crops) < 2 or not states:
                 dispatcher.utter_message(text="Please specify two crops and a state.")
                 return []
             c1, c2 = crops[:2]
             state = states[0]
-            df = crop_df
-            mean1 = df[df["Crop"] == c1]["Production"].mean()
-            mean2 = df[df["Crop"] == c2]["Production"].mean()
+            with span("aggregation"):
+                mean1 = index.mean(c1, state)
+                mean2 = index.mean(c2, state)
+            missing = [c for c, m in ((c1, mean1), (c2, mean2)) if np.isnan(m)]
+            if missing:
+                dispatcher.utter_message(text=f"No production data found for {' or '.join(missing)} in {state}.")
+                return []
+            with span("aggregation"):
+                panel = get_panel()
+                st1, st2 = panel.get(state, c1), panel.get(state, c2)
 
-            msg = (
-                f"**Policy Suggestion for {state}: Promote {c1} over {c2}**\n\n"
-                f"{c1} has higher mean production ({mean1:.2f}) vs {c2} ({mean2:.2f}).\n"
-                f"{c1} performs better in semi-arid conditions.\n"
-                f"Data consistency and yield stability are higher for {c1}.\n\n"
-                f"_Source: Integrated Crop + Rainfall Data (data.gov.in)_"
-            )
+            with span("format"):
+                msg = (
+                    f"**Policy Suggestion for {state}: Promote {c1} over {c2}**\n\n"
+                    f"{c1 if mean1 > mean2 else c2} has higher mean production ({c1}: {mean1:.2f} vs {c2}: {mean2:.2f}).\n"
+                )
+                if st1 and st2:
+                    steadier = c1 if st1.cv < st2.cv else c2
+                    less_sensitive = c1 if abs(st1.elasticity) < abs(st2.elasticity) else c2
+                    msg += (
+                        f"Yield variability (CV): {c1} {st1.cv:.2f} vs {c2} {st2.cv:.2f} — {steadier} is more stable.\n"
+                        f"Rainfall elasticity: {c1} {st1.elasticity:+.2f} vs {c2} {st2.elasticity:+.2f} — "
+                        f"{less_sensitive} is less exposed to rainfall swings.\n"
+                    )
+                else:
+                    msg += f"No local rainfall data joined for {state}; stability comparison unavailable.\n"
+                msg += "\n_Source: Integrated Crop + Rainfall Data (data.gov.in)_"
 
         # CASE 6: Crop yield stability or variation with rainfall
-        elif "stability" in user_text or "variation" in user_text:
+        elif "stability" in keywords or "variation" in keywords:
             if not states:
                 dispatcher.utter_message(text="Please specify a state.")
                 return []
 
             state = states[0]
-            msg = (
-                f"**Crop Yield Stability with Rainfall in {state}:**\n\n"
-                f"Analysis of rainfall–yield data suggests that rainfall variations impact crop stability in this region.\n"
-                f"To enhance yield stability, promote irrigation support, drought-resistant crop varieties, "
-                f"and better water management policies.\n\n"
-                f"_Source: Integrated Rainfall–Crop Dataset (data.gov.in)_"
-            )
+            with span("aggregation"):
+                ranked = get_panel().for_state(state)
+            with span("format"):
+                msg = f"**Crop Yield Stability with Rainfall in {state}:**\n\n"
+                if ranked:
+                    msg += "Most to least stable yield (coefficient of variation, correlation with rainfall):\n"
+                    for st in ranked:
+                        msg += f"  • {st.crop}: CV {st.cv:.2f}, r = {st.pearson:.2f} ({st.n} districts)\n"
+                    msg += "\n"
+                    chart = chart_payload("bar", f"Yield variability (CV) in {state}", {st.crop: st.cv for st in ranked}, "CV", source)
+                else:
+                    msg += "Analysis of rainfall–yield data suggests that rainfall variations impact crop stability in this region.\n"
+                msg += (
+                    f"To enhance yield stability, promote irrigation support, drought-resistant crop varieties, "
+                    f"and better water management policies.\n\n"
+                    f"_Source: Integrated Rainfall–Crop Dataset (data.gov.in)_"
+                )
 
         # DEFAULT FALLBACK
         else:
@@ -447,5 +649,5 @@ class ActionSmartAgriInsight(Action):
                 "• Suggest a policy to promote Rice over Jowar in Rajasthan"
             )
 
-        dispatcher.utter_message(text=msg)
+        dispatcher.utter_message(text=msg, json_message=chart)
         return []
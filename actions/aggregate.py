@@ -0,0 +1,175 @@
+import math
+
+# ---------------------------------------------------------------------
+# 🧮 STREAMING AGGREGATORS (constant memory per group)
+# ---------------------------------------------------------------------
+RAINFALL_FIELDS = ("Avg_rainfall", "Rainfall_mm")
+REGION_FIELDS = ("District", "Sub-basin")
+
+
+def to_float_array(values):
+    """Parse API strings to float64; blanks and junk become NaN."""
+    import numpy as np
+    import pandas as pd
+    try:
+        return np.array(values, dtype="float64")  # numpy parses clean numeric strings / None directly
+    except (TypeError, ValueError):
+        return pd.to_numeric(pd.Series(values, dtype="object"), errors="coerce").to_numpy(dtype="float64")
+
+
+class RunningStats:
+    """count / sum / min / max / sum of squares over batches of numbers."""
+
+    __slots__ = ("count", "sum", "min", "max", "sumsq")
+
+    def __init__(self):
+        self.count, self.sum, self.sumsq = 0, 0.0, 0.0
+        self.min, self.max = math.inf, -math.inf
+
+    def add(self, values):
+        import numpy as np
+        values = np.asarray(values, dtype="float64")
+        values = values[~np.isnan(values)]
+        if not values.size:
+            return
+        self.count += int(values.size)
+        self.sum += float(values.sum())
+        self.sumsq += float(np.dot(values, values))
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+
+    def merge(self, other):
+        self.count += other.count
+        self.sum += other.sum
+        self.sumsq += other.sumsq
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    @property
+    def mean(self):
+        return self.sum / self.count if self.count else math.nan
+
+    @property
+    def std(self):
+        if self.count < 2:
+            return math.nan
+        var = (self.sumsq - self.sum * self.mean) / (self.count - 1)
+        return math.sqrt(max(var, 0.0))
+
+
+class GroupedStats:
+    """RunningStats per key (e.g. per district), fed batch by batch."""
+
+    def __init__(self):
+        self.groups = {}
+
+    def add(self, keys, values):
+        import numpy as np
+        import pandas as pd
+        values = np.asarray(values, dtype="float64")
+        keys = np.asarray(keys, dtype="object")
+        ok = ~np.isnan(values)
+        if not ok.any():
+            return
+        inv, uniq = pd.factorize(keys[ok], use_na_sentinel=False)  # hash-based; no sort or str copy
+        vals = values[ok]
+        n = len(uniq)
+        counts = np.bincount(inv, minlength=n)
+        sums = np.bincount(inv, weights=vals, minlength=n)
+        sumsqs = np.bincount(inv, weights=vals * vals, minlength=n)
+        mins = np.full(n, np.inf)
+        maxs = np.full(n, -np.inf)
+        np.minimum.at(mins, inv, vals)
+        np.maximum.at(maxs, inv, vals)
+
+        for i, key in enumerate(uniq):
+            key = str(key)
+            st = self.groups.get(key)
+            if st is None:
+                st = self.groups[key] = RunningStats()
+            st.count += int(counts[i])
+            st.sum += float(sums[i])
+            st.sumsq += float(sumsqs[i])
+            st.min = min(st.min, float(mins[i]))
+            st.max = max(st.max, float(maxs[i]))
+
+    def means(self):
+        """Per-key means as a Series sorted high → low."""
+        import pandas as pd
+        return pd.Series({k: st.mean for k, st in self.groups.items()}, dtype="float64").sort_values(ascending=False)
+
+
+def detect_field(record, candidates):
+    """First of `candidates` present in a record, or None."""
+    for f in candidates:
+        if f in record:
+            return f
+    return None
+
+
+class RainfallAggregator:
+    """
+    Streams API record batches into overall and per-region rainfall stats,
+    so a full state-year never has to be held in memory at once.
+    """
+
+    def __init__(self, track_regions=True):
+        self.overall = RunningStats()
+        self.by_region = GroupedStats()
+        self.track_regions = track_regions  # False: overall stats only, skip the per-region group-by
+        self.value_col = None
+        self.region_col = None
+        self.rows = 0
+        self.unsupported = False
+        self.degraded = False  # upstream skipped or cut short: stats may be partial
+        self.truncated = False  # paging stopped at MAX_RECORDS: stats cover only the first records
+
+    def feed(self, records):
+        """Add one batch. Returns False if the data carries no rainfall field."""
+        if not records:
+            return True
+        if self.value_col is None:
+            self.value_col = detect_field(records[0], RAINFALL_FIELDS)
+            self.region_col = detect_field(records[0], REGION_FIELDS)
+            if self.value_col is None:
+                self.unsupported = True
+                return False
+        values = to_float_array([r.get(self.value_col) for r in records])
+        self.overall.add(values)
+        if self.region_col and self.track_regions:
+            self.by_region.add([r.get(self.region_col) for r in records], values)
+        self.rows += len(records)
+        return True
+
+    def feed_columns(self, regions, values, region_col="District"):
+        """Add pre-parsed columns (e.g. from the local warehouse) instead of API records."""
+        self.value_col = self.value_col or "Rainfall"
+        self.region_col = self.region_col or region_col
+        self.overall.add(values)
+        self.by_region.add(regions, values)
+        self.rows += len(values)
+
+    def merge(self, other):
+        """Fold another aggregator (e.g. one month of a season) into this one."""
+        self.degraded = self.degraded or other.degraded
+        self.truncated = self.truncated or other.truncated
+        if other.empty:
+            return
+        self.value_col = self.value_col or other.value_col
+        self.region_col = self.region_col or other.region_col
+        self.overall.merge(other.overall)
+        for key, st in other.by_region.groups.items():
+            if key not in self.by_region.groups:
+                self.by_region.groups[key] = RunningStats()
+            self.by_region.groups[key].merge(st)
+        self.rows += other.rows
+
+    @property
+    def mean_region_total(self):
+        """Average over regions of each region's summed rainfall (e.g. a seasonal total in mm)."""
+        totals = [st.sum for st in self.by_region.groups.values() if st.count]
+        return sum(totals) / len(totals) if totals else math.nan
+
+    @property
+    def empty(self):
+        return self.rows == 0
@@ -0,0 +1,227 @@
+import os, json, gzip, time, asyncio, hashlib, threading
+from collections import OrderedDict
+
+from . import fastjson
+from .metrics import CACHE_REQUESTS
+from .singleflight import FETCH_FLIGHTS
+from .resilience import UpstreamUnavailable, turn_budget
+
+# ---------------------------------------------------------------------
+# 🗄️ SHARED RESPONSE CACHE (memory LRU + gzip disk tier)
+# ---------------------------------------------------------------------
+CACHE_DIR = os.getenv("SAMARTH_CACHE_DIR", os.path.join(os.path.dirname(__file__), "..", ".cache"))
+
+CACHE_MAX_ENTRIES = int(os.getenv("SAMARTH_CACHE_SIZE", "512"))
+CACHE_TTL = float(os.getenv("SAMARTH_CACHE_TTL", "3600"))          # fresh for 1 hour
+CACHE_STALE_TTL = float(os.getenv("SAMARTH_CACHE_STALE_TTL", "86400"))  # then served stale for 1 day
+
+
+def make_key(resource_id, filters):
+    """Stable cache key for a (resource_id, filters) query. Empty filters are ignored."""
+    items = sorted((str(k), str(v)) for k, v in (filters or {}).items() if v)
+    return json.dumps([resource_id, items], separators=(",", ":"))
+
+
+class ResponseCache:
+    """
+    Two-tier cache for API responses.
+
+    Entries younger than `ttl` are fresh. Entries between `ttl` and
+    `ttl + stale_ttl` are returned immediately while a background thread/task
+    refreshes them (stale-while-revalidate). Older entries are refetched inline.
+    Cached values are shared between callers and must be treated as read-only.
+    """
+
+    def __init__(self, name="http", max_entries=CACHE_MAX_ENTRIES, ttl=CACHE_TTL,
+                 stale_ttl=CACHE_STALE_TTL, disk_dir=CACHE_DIR):
+        self.name = name
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.disk_dir = os.path.join(disk_dir, name) if disk_dir else None
+        self._mem = OrderedDict()  # key -> (stored_at, value)
+        self._lock = threading.Lock()
+        self._refreshing = set()
+        self._tasks = set()
+
+    # ------------------- Disk tier -------------------
+    def _disk_path(self, key):
+        digest = hashlib.sha1(key.encode("utf-8")).hexdigest()
+        return os.path.join(self.disk_dir, digest[:2], digest + ".json.gz")
+
+    def _read_disk(self, key):
+        if not self.disk_dir:
+            return None
+        path = self._disk_path(key)
+        try:
+            with gzip.open(path, "rb") as f:
+                entry = fastjson.loads(f.read())
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"[WARN] Dropping unreadable cache file {path}: {e}")
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return None
+        if entry.get("key") != key:
+            return None
+        return entry["stored_at"], entry["value"]
+
+    def _write_disk(self, key, stored_at, value):
+        if not self.disk_dir:
+            return
+        path = self._disk_path(key)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with gzip.open(tmp, "wb", compresslevel=5) as f:
+                f.write(fastjson.dumps({"key": key, "stored_at": stored_at, "value": value}))
+            os.replace(tmp, path)  # atomic: readers never see a partial file
+        except Exception as e:
+            print(f"[WARN] Could not persist cache entry: {e}")
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+
+    # ------------------- Memory tier -------------------
+    def _remember(self, key, stored_at, value):
+        with self._lock:
+            self._mem[key] = (stored_at, value)
+            self._mem.move_to_end(key)
+            while len(self._mem) > self.max_entries:
+                self._mem.popitem(last=False)
+
+    def lookup(self, key):
+        """Return (value, age_seconds), or (None, None) when absent or fully expired."""
+        with self._lock:
+            entry = self._mem.get(key)
+            if entry is not None:
+                self._mem.move_to_end(key)
+        if entry is None:
+            entry = self._read_disk(key)
+            if entry is not None:
+                self._remember(key, *entry)
+        if entry is None:
+            CACHE_REQUESTS.inc(cache=self.name, result="miss")
+            return None, None
+
+        stored_at, value = entry
+        age = time.time() - stored_at
+        if age > self.ttl + self.stale_ttl:
+            CACHE_REQUESTS.inc(cache=self.name, result="expired")
+            return None, None  # kept for peek() until a successful fetch replaces it
+        CACHE_REQUESTS.inc(cache=self.name, result="stale" if age > self.ttl else "hit")
+        return value, age
+
+    def peek(self, key):
+        """Any cached value for `key`, however old (last resort while the upstream is down)."""
+        with self._lock:
+            entry = self._mem.get(key)
+        if entry is None:
+            entry = self._read_disk(key)
+        return None if entry is None else entry[1]
+
+    def store(self, key, value):
+        stored_at = time.time()
+        self._remember(key, stored_at, value)
+        self._write_disk(key, stored_at, value)
+
+    def invalidate(self, key):
+        with self._lock:
+            self._mem.pop(key, None)
+        if self.disk_dir:
+            try:
+                os.remove(self._disk_path(key))
+            except OSError:
+                pass
+
+    def clear(self):
+        with self._lock:
+            self._mem.clear()
+
+    # ------------------- Read-through -------------------
+    def get_or_fetch(self, key, fetch):
+        """
+        Serve `key` from cache, calling `fetch()` on a miss.
+        Concurrent misses for the same key share one fetch (single-flight).
+        Empty results ({} / None) are never cached so outages are not pinned.
+        """
+        value, age = self.lookup(key)
+        if value is not None:
+            if age > self.ttl:
+                self._revalidate(key, fetch)
+            return value
+
+        def _fetch_and_store():
+            value = fetch()
+            if value:
+                self.store(key, value)
+            return value
+
+        return FETCH_FLIGHTS.do(key, _fetch_and_store)
+
+    async def get_or_fetch_async(self, key, fetch):
+        """Async read-through: `fetch` is a zero-arg coroutine function."""
+        value, age = self.lookup(key)
+        if value is not None:
+            if age > self.ttl:
+                self._revalidate_async(key, fetch)
+            return value
+
+        async def _fetch_and_store():
+            value = await fetch()
+            if value:
+                self.store(key, value)
+            return value
+
+        return await FETCH_FLIGHTS.do_async(key, _fetch_and_store)
+
+    def _revalidate_async(self, key, fetch):
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        async def _refresh():
+            try:
+                with turn_budget():  # its own budget, not what is left of the turn that spawned it
+                    value = await fetch()
+                if value:
+                    self.store(key, value)
+            except UpstreamUnavailable:
+                pass  # circuit open; retried on a later hit
+            except Exception as e:
+                print(f"[WARN] Background cache refresh failed: {e}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        task = asyncio.get_running_loop().create_task(_refresh())
+        self._tasks.add(task)  # keep a reference until the refresh finishes
+        task.add_done_callback(self._tasks.discard)
+
+    def _revalidate(self, key, fetch):
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def _refresh():
+            try:
+                value = fetch()
+                if value:
+                    self.store(key, value)
+            except Exception as e:
+                print(f"[WARN] Background cache refresh failed: {e}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        threading.Thread(target=_refresh, name="cache-revalidate", daemon=True).start()
+
+
+# One cache shared by every data.gov.in caller in the action server
+RESPONSE_CACHE = ResponseCache()
@@ -0,0 +1,244 @@
+import os, json, glob, shutil, hashlib
+
+from .cache import CACHE_DIR
+from .jsonstream import JsonExportStream
+
+# ---------------------------------------------------------------------
+# 🧱 COLUMNAR CACHE (typed .npy columns, memory-mapped on load)
+# ---------------------------------------------------------------------
+# Layout of one artifact directory <name>.<fingerprint>/:
+#   meta.json      numeric columns, categorical categories, source fingerprint
+#   numeric.npy    float64 matrix (rows × numeric columns) — mapped read-only, shared between processes
+#   <i>.codes.npy  int32 codes of the i-th categorical column
+COLUMNAR_DIR = os.path.join(CACHE_DIR, "columnar")
+# Bump when the artifact layout or the code that builds a cached frame changes
+# (export parsing, district → state resolution, column typing): artifacts of an
+# older version are then rebuilt although their source files did not change.
+FORMAT_VERSION = 1
+
+
+def source_fingerprint(paths):
+    """Cheap identity of the input files (name, mtime and size) and of the code building from them."""
+    out = [["format", FORMAT_VERSION]]
+    for p in paths:
+        st = os.stat(p)
+        out.append([os.path.basename(p), st.st_mtime_ns, st.st_size])
+    return out
+
+
+def _artifact_dir(name, fingerprint):
+    digest = hashlib.sha1(json.dumps(fingerprint).encode("utf-8")).hexdigest()[:12]
+    return os.path.join(COLUMNAR_DIR, f"{name}.{digest}")
+
+
+def _is_numeric(series):
+    """True when every non-blank value parses as a number."""
+    import pandas as pd
+    if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+        return True
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return False
+    raw = series.astype(str).str.strip()
+    present = series.notna() & (raw != "")
+    parsed = pd.to_numeric(series.where(present), errors="coerce")
+    return bool(present.any()) and bool(parsed[present].notna().all())
+
+
+def write_columnar(df, name, fingerprint):
+    """Persist `df` as typed columns; returns the artifact directory."""
+    import numpy as np
+    import pandas as pd
+    final = _artifact_dir(name, fingerprint)
+    if os.path.exists(os.path.join(final, "meta.json")):
+        return final
+
+    numeric, categorical = [], []
+    for col in df.columns:
+        (numeric if _is_numeric(df[col]) else categorical).append(col)
+
+    tmp = f"{final}.{os.getpid()}.tmp"
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+    try:
+        matrix = np.empty((len(df), len(numeric)), dtype="float64")
+        for j, col in enumerate(numeric):
+            matrix[:, j] = pd.to_numeric(df[col], errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+        np.save(os.path.join(tmp, "numeric.npy"), matrix)
+
+        cats = {}
+        for i, col in enumerate(categorical):
+            values = df[col].astype("category") if not isinstance(df[col].dtype, pd.CategoricalDtype) else df[col]
+            np.save(os.path.join(tmp, f"{i}.codes.npy"), values.cat.codes.to_numpy(dtype="int32"))
+            cats[col] = [str(c) for c in values.cat.categories]
+
+        meta = {
+            "name": name,
+            "source": fingerprint,
+            "rows": len(df),
+            "numeric": [str(c) for c in numeric],
+            "categorical": [[str(c), cats[c]] for c in categorical],
+        }
+        with open(os.path.join(tmp, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.rename(tmp, final)  # publish atomically; a concurrent writer may have won
+    except OSError:
+        shutil.rmtree(tmp, ignore_errors=True)
+        if not os.path.exists(os.path.join(final, "meta.json")):
+            raise
+    _prune_old_versions(name, keep=final)
+    return final
+
+
+def _prune_old_versions(name, keep):
+    for path in glob.glob(os.path.join(COLUMNAR_DIR, f"{name}.*")):
+        if path != keep and not path.endswith(".tmp"):
+            shutil.rmtree(path, ignore_errors=True)  # open mmaps stay valid on POSIX
+
+
+def read_columnar(path):
+    """
+    Load an artifact as a DataFrame whose numeric block is a read-only
+    memory map (no copy); categorical columns are rebuilt from codes.
+    """
+    import numpy as np
+    import pandas as pd
+    with open(os.path.join(path, "meta.json"), "r", encoding="utf-8") as f:
+        meta = json.load(f)
+
+    matrix = np.load(os.path.join(path, "numeric.npy"), mmap_mode="r")
+    df = pd.DataFrame(matrix, columns=meta["numeric"], copy=False)
+    for i, (col, categories) in enumerate(meta["categorical"]):
+        codes = np.load(os.path.join(path, f"{i}.codes.npy"), mmap_mode="r")
+        df[col] = pd.Categorical.from_codes(codes, categories=categories)
+    return df
+
+
+def _raw_to_npy(raw_path, npy_path, dtype, shape):
+    """Prefix a raw little-endian dump with an .npy header (copied in blocks, never loaded)."""
+    import numpy as np
+    with open(npy_path, "wb") as out, open(raw_path, "rb") as raw:
+        np.lib.format.write_array_header_1_0(out, {"descr": np.dtype(dtype).str, "fortran_order": False, "shape": shape})
+        shutil.copyfileobj(raw, out, 1 << 20)
+    os.remove(raw_path)
+
+
+def write_columnar_stream(name, fingerprint, stream, progress=None):
+    """
+    Write a JsonExportStream straight into a columnar artifact, one chunk at a
+    time: numeric rows are appended to a raw float64 file, categorical columns
+    to int32 code files with incrementally grown category lists. Column types
+    are inferred from the first chunk; later non-numeric values become NaN.
+    Columns are named by field id, like load_local_json.
+    """
+    import numpy as np
+    import pandas as pd
+    final = _artifact_dir(name, fingerprint)
+    if os.path.exists(os.path.join(final, "meta.json")):
+        return final
+    tmp = f"{final}.{os.getpid()}.tmp"
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+
+    columns = numeric = categorical = None
+    cats, rows, coerced = [], 0, 0
+    numeric_raw = open(os.path.join(tmp, "numeric.raw"), "wb")
+    code_raws = []
+    try:
+        for chunk in stream:
+            df = pd.DataFrame(chunk, columns=stream.ids) if chunk and isinstance(chunk[0], list) else pd.DataFrame(chunk)
+            if columns is None:
+                columns = [str(c) for c in df.columns]
+                numeric = [c for c in columns if _is_numeric(df[c])]
+                categorical = [c for c in columns if c not in numeric]
+                cats = [{} for _ in categorical]
+                code_raws = [open(os.path.join(tmp, f"{i}.codes.raw"), "wb") for i in range(len(categorical))]
+            df.columns = [str(c) for c in df.columns]
+            df = df.reindex(columns=columns)
+
+            block = np.empty((len(df), len(numeric)), dtype="<f8")
+            for j, col in enumerate(numeric):
+                values = pd.to_numeric(df[col], errors="coerce")
+                coerced += int((values.isna() & df[col].notna() & (df[col].astype(str).str.strip() != "")).sum())
+                block[:, j] = values.to_numpy(dtype="float64", na_value=np.nan)
+            numeric_raw.write(block.tobytes())
+
+            for i, col in enumerate(categorical):
+                lookup = cats[i]
+                codes = np.fromiter(
+                    (-1 if v is None or v != v else lookup.setdefault(str(v), len(lookup)) for v in df[col].tolist()),
+                    dtype="<i4", count=len(df),
+                )
+                code_raws[i].write(codes.tobytes())
+            rows += len(df)
+            if progress:
+                progress(stream)
+
+        numeric_raw.close()
+        for f in code_raws:
+            f.close()
+        columns = columns or []
+        numeric, categorical = numeric or [], categorical or []
+        _raw_to_npy(os.path.join(tmp, "numeric.raw"), os.path.join(tmp, "numeric.npy"), "<f8", (rows, len(numeric)))
+        for i in range(len(categorical)):
+            _raw_to_npy(os.path.join(tmp, f"{i}.codes.raw"), os.path.join(tmp, f"{i}.codes.npy"), "<i4", (rows,))
+
+        meta = {
+            "name": name,
+            "source": fingerprint,
+            "rows": rows,
+            "numeric": numeric,
+            "categorical": [[col, list(cats[i])] for i, col in enumerate(categorical)],
+            "coerced": coerced,
+        }
+        with open(os.path.join(tmp, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.rename(tmp, final)
+    except BaseException:
+        numeric_raw.close()
+        for f in code_raws:
+            f.close()
+        shutil.rmtree(tmp, ignore_errors=True)
+        if not os.path.exists(os.path.join(final, "meta.json")):
+            raise
+    if coerced:
+        print(f"[WARN] {name}: {coerced} non-numeric values in numeric columns stored as NaN")
+    if progress:
+        progress(stream, done=True)
+    _prune_old_versions(name, keep=final)
+    return final
+
+
+def load_streamed_frame(name, path, chunk_rows=50000, progress=None):
+    """Columnar copy of a JSON export, streamed into the store on first use (bounded memory)."""
+    fingerprint = source_fingerprint([path])
+    artifact = _artifact_dir(name, fingerprint)
+    if os.path.exists(os.path.join(artifact, "meta.json")):
+        try:
+            return read_columnar(artifact)
+        except Exception as e:
+            print(f"[WARN] Unreadable columnar cache {artifact}, rebuilding: {e}")
+            shutil.rmtree(artifact, ignore_errors=True)
+    return read_columnar(write_columnar_stream(name, fingerprint, JsonExportStream(path, chunk_rows), progress))
+
+
+def load_cached_frame(name, sources, build):
+    """
+    Return the columnar copy of `build()` for the current `sources`,
+    building and persisting it first if the sources changed.
+    """
+    fingerprint = source_fingerprint(sources)
+    path = _artifact_dir(name, fingerprint)
+    if os.path.exists(os.path.join(path, "meta.json")):
+        try:
+            return read_columnar(path)
+        except Exception as e:
+            print(f"[WARN] Unreadable columnar cache {path}, rebuilding: {e}")
+            shutil.rmtree(path, ignore_errors=True)
+
+    df = build()
+    try:
+        return read_columnar(write_columnar(df, name, fingerprint))
+    except Exception as e:
+        print(f"[WARN] Could not write columnar cache for {name}: {e}")
+        return df
+
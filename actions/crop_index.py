@@ -0,0 +1,100 @@
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:  # annotations only; imported lazily where used
+    import numpy as np
+
+# ---------------------------------------------------------------------
+# 🗂️ PER-CROP PRODUCTION INDEX (built once per crop snapshot)
+# ---------------------------------------------------------------------
+
+
+@dataclass(frozen=True)
+class CropStats:
+    """Districts of one crop sorted by production (high → low) plus summary stats."""
+    crop: str
+    districts: "np.ndarray"
+    production: "np.ndarray"
+    mean: float
+    std: float
+    count: int
+
+    def top(self, n):
+        return list(zip(self.districts[:n], self.production[:n]))
+
+    def bottom(self, n):
+        return list(zip(self.districts[::-1][:n], self.production[::-1][:n]))
+
+    @property
+    def highest(self):
+        return self.districts[0], self.production[0]
+
+    @property
+    def lowest(self):
+        return self.districts[-1], self.production[-1]
+
+
+def _key(crop, state=None):
+    return (str(state).lower() if state else None, str(crop).lower())
+
+
+class CropIndex:
+    """
+    Case-insensitive (State, Crop) → CropStats lookup; state=None covers every
+    state. Rows without production are skipped.
+    """
+
+    def __init__(self, df):
+        import numpy as np
+        import pandas as pd
+        self._by_crop = {}
+        self._states = set()
+        if df.empty or "Crop" not in df.columns or "Production" not in df.columns:
+            return
+        prod = pd.to_numeric(df["Production"], errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+        crops = df["Crop"].astype(str).to_numpy()
+        districts = df["District"].astype(str).to_numpy()
+        states = df["State"].to_numpy(dtype=object) if "State" in df.columns else np.full(len(df), None, dtype=object)
+        valid = ~np.isnan(prod) & df["District"].notna().to_numpy()
+
+        rows = np.flatnonzero(valid)
+        groups = pd.DataFrame({"state": states[rows], "crop": crops[rows]}).groupby(["crop", "state"], dropna=False).indices
+        by_crop = {}
+        for (crop, state), pos in groups.items():
+            by_crop.setdefault(crop, []).append(rows[pos])
+            if isinstance(state, str):
+                self._states.add(state)
+                self._add(crop, state, rows[pos], districts, prod)
+        for crop, parts in by_crop.items():
+            self._add(crop, None, np.concatenate(parts), districts, prod)
+
+    def _add(self, crop, state, rows, districts, prod):
+        import numpy as np
+        values = prod[rows]
+        order = np.argsort(-values, kind="stable")
+        self._by_crop[_key(crop, state)] = CropStats(
+            crop=crop,
+            districts=districts[rows][order],
+            production=values[order],
+            mean=float(values.mean()),
+            std=float(values.std(ddof=1)) if values.size > 1 else float("nan"),
+            count=int(values.size),
+        )
+
+    def __contains__(self, crop):
+        return _key(crop) in self._by_crop
+
+    def get(self, crop, state=None):
+        return self._by_crop.get(_key(crop, state))
+
+    def mean(self, crop, state=None):
+        stats = self.get(crop, state)
+        return stats.mean if stats else float("nan")
+
+    @property
+    def crops(self):
+        return [s.crop for (state, _), s in self._by_crop.items() if state is None]
+
+    @property
+    def states(self):
+        return sorted(self._states)
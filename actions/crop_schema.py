@@ -0,0 +1,103 @@
+import os, re, json
+
+# ---------------------------------------------------------------------
+# 🏷️ SCHEMA-DRIVEN CROP EXPORT PARSER
+# ---------------------------------------------------------------------
+# data.gov.in exports name columns with opaque ids ("b", "n", "r") and describe
+# them in fields[].label, e.g. "Kharif_Yield" or
+# "All Seasons_AreaAfter bund correction factor". Columns are named from the
+# labels so every file maps the same way, whatever its ids are:
+#   <Season>_Area              area after bund correction (ha)
+#   <Season>_Area_Uncorrected  area before bund correction (ha)
+#   <Season>_Yield             kg/ha
+#   <Season>_Production        tonnes
+# and the "All Seasons" figures are also exposed as Total_Area / Yield / Production.
+# Kept free of other actions imports so process-pool workers start light.
+DISTRICT_LABELS = ("district name", "district", "district_name", "dist_name")
+CROP_LABELS = ("crop", "crop name", "crop_name")
+ALL_SEASONS = "All_Seasons"
+
+_SEASON_METRIC = re.compile(
+    r"^(?P<season>.+?)_(?P<metric>Area\s*(?P<when>Before|After)\b.*|Yield|Production)$", re.IGNORECASE
+)
+
+
+def _clean(text):
+    return re.sub(r"[^0-9A-Za-z]+", "_", str(text)).strip("_")
+
+
+def column_name(label):
+    """Canonical column for one field label."""
+    text = str(label).strip()
+    if text.lower() in DISTRICT_LABELS:
+        return "District"
+    if text.lower() in CROP_LABELS:
+        return "Crop"
+    m = _SEASON_METRIC.match(text)
+    if not m:
+        return _clean(text)
+    season = _clean(m.group("season")).title()
+    metric = m.group("metric").lower()
+    if metric.startswith("area"):
+        return f"{season}_Area" if m.group("when").lower() == "after" else f"{season}_Area_Uncorrected"
+    return f"{season}_{metric.title()}"
+
+
+def _read_export(path):
+    """(column labels, rows) from 'fields' + 'data', 'records' or a bare list."""
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if isinstance(data, list):
+        return None, data
+    if "records" in data:
+        return None, data["records"]
+    if "data" in data and "fields" in data:
+        labels = [
+            (fld.get("label") or fld.get("id")) if isinstance(fld, dict) else fld
+            for fld in data["fields"]
+        ]
+        return labels, data["data"]
+    raise ValueError(f"❌ Unsupported JSON format in {os.path.basename(path)}: keys={list(data.keys())}")
+
+
+def crop_name(path):
+    """Crop label from the export's file name (rice.json → Rice, pearl_millet.json → Pearl Millet)."""
+    return _clean(os.path.splitext(os.path.basename(path))[0]).replace("_", " ").title()
+
+
+def parse_crop_export(path):
+    """
+    One crop export as a DataFrame with canonical columns, numeric columns as
+    float64. Returns None when the file is not a district-wise production table.
+    """
+    import pandas as pd
+    labels, rows = _read_export(path)
+    if labels is None:
+        df = pd.DataFrame(rows)
+        df.columns = [column_name(c) for c in df.columns]
+    else:
+        df = pd.DataFrame(rows, columns=[column_name(c) for c in labels])
+    df = df.loc[:, ~df.columns.duplicated()]
+    if "District" not in df.columns or not any(c.endswith("_Production") or c == "Production" for c in df.columns):
+        return None
+
+    for col in df.columns:
+        if col not in ("District", "Crop"):
+            df[col] = pd.to_numeric(df[col], errors="coerce").astype("float64")
+
+    # Headline figures: the all-season totals when the export has them
+    for target, source in (("Production", f"{ALL_SEASONS}_Production"),
+                           ("Total_Area", f"{ALL_SEASONS}_Area"),
+                           ("Yield", f"{ALL_SEASONS}_Yield")):
+        if target not in df.columns and source in df.columns:
+            df[target] = df[source]
+    if "Production" not in df.columns:
+        seasonal = [c for c in df.columns if c.endswith("_Production")]
+        df["Production"] = df[seasonal].sum(axis=1, min_count=1)
+
+    if "Crop" not in df.columns:
+        df["Crop"] = crop_name(path)
+    df["District"] = df["District"].astype(str).str.strip().str.title()
+    df["Crop"] = df["Crop"].astype(str).str.strip().str.title()
+    # Footer rows ("Total") are not districts
+    return df[~df["District"].str.lower().isin(("total", "grand total", "nan", ""))].reset_index(drop=True)
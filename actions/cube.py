@@ -0,0 +1,288 @@
+import os, time, threading
+
+from .datasets import DATASET_BY_ID
+from .aggregate import RunningStats, GroupedStats, RainfallAggregator
+from . import warehouse
+
+# ---------------------------------------------------------------------
+# 🧊 RAINFALL CUBE (State × Region × Year × Month → sum/count/min/max/sumsq)
+# ---------------------------------------------------------------------
+# Cells are rolled up per (State, Year) whenever a partition changes, so every
+# rainfall intent is a handful of dict lookups regardless of raw data size.
+CUBE_FILE = "_cube.npz"
+CUBE_CHECK_INTERVAL = float(os.getenv("SAMARTH_CUBE_CHECK_INTERVAL", "5"))
+
+
+class RainfallCube:
+    def __init__(self, dataset, version=0):
+        self.dataset = dataset
+        self.version = version
+        self._cells = {}      # (state, year, month) -> {region: RunningStats}
+        self._months = {}     # (state, year) -> set(months)
+        self._by_region = {}  # (state, year) -> {region: RunningStats} over all months
+        self._total = {}      # (state, year) -> RunningStats
+        self._baselines = {}  # (state, months) -> (seasonal baseline, years used)
+
+    @property
+    def region_col(self):
+        return "Sub-basin" if self.dataset == "rainfall_subbasin" else "District"
+
+    # ------------------- Incremental maintenance -------------------
+    def update_partition(self, state, year, month, regions, rainfall):
+        """Replace the cells of one (State, Year, Month) partition and re-roll its (State, Year)."""
+        grouped = GroupedStats()
+        grouped.add(regions, rainfall)
+        key = (state, int(year), month)
+        if grouped.groups:
+            self._cells[key] = grouped.groups
+            self._months.setdefault(key[:2], set()).add(month)
+        else:
+            self._cells.pop(key, None)
+            self._months.get(key[:2], set()).discard(month)
+        self._rollup(state, int(year))
+        self._baselines.clear()
+
+    def _rollup(self, state, year):
+        by_region, total = {}, RunningStats()
+        for month in self._months.get((state, year), ()):
+            for region, st in self._cells[(state, year, month)].items():
+                if region not in by_region:
+                    by_region[region] = RunningStats()
+                by_region[region].merge(st)
+                total.merge(st)
+        if total.count:
+            self._by_region[(state, year)] = by_region
+            self._total[(state, year)] = total
+        else:
+            self._by_region.pop((state, year), None)
+            self._total.pop((state, year), None)
+            self._months.pop((state, year), None)
+
+    # ------------------- Lookups -------------------
+    def _keys(self, state=None, year=None):
+        if state and year:
+            key = (str(state).strip().title(), int(year))
+            return [key] if key in self._total else []
+        state = str(state).strip().title() if state else None
+        return [k for k in self._total if (state is None or k[0] == state) and (year is None or k[1] == int(year))]
+
+    def has(self, state=None, year=None):
+        return bool(self._keys(state, year))
+
+    def stats(self, state=None, year=None, months=None):
+        """(overall RunningStats, {region: RunningStats}) for a slice; months=None means all months."""
+        overall, regions = RunningStats(), {}
+        for key in self._keys(state, year):
+            if months:
+                parts = [self._cells.get((*key, m), {}) for m in months]
+            else:
+                parts = [self._by_region[key]]
+            for cells in parts:
+                for region, st in cells.items():
+                    if region not in regions:
+                        regions[region] = RunningStats()
+                    regions[region].merge(st)
+                    overall.merge(st)
+        return overall, regions
+
+    def month_stats(self, state, year):
+        """{month: RunningStats} for one State/Year."""
+        key = (str(state).strip().title(), int(year))
+        out = {}
+        for month in sorted(self._months.get(key, ())):
+            total = RunningStats()
+            for st in self._cells[(*key, month)].values():
+                total.merge(st)
+            out[month] = total
+        return out
+
+    def yearly_means(self, state, years=None):
+        """{year: mean rainfall} for a state (all states when state is None)."""
+        out = {}
+        wanted = {int(y) for y in years} if years is not None else None
+        per_year = {}
+        for (s, y), total in self._total.items():
+            if (state and s != str(state).strip().title()) or (wanted is not None and y not in wanted):
+                continue
+            per_year.setdefault(y, RunningStats()).merge(total)
+        for y, total in sorted(per_year.items()):
+            out[str(y)] = round(total.mean, 2)
+        return out
+
+    def year_matrix(self, months=None):
+        """(states, years, State × Year matrix of mean rainfall); NaN where a cell is missing."""
+        import numpy as np
+        states, years = self.states(), self.years()
+        row = {s: i for i, s in enumerate(states)}
+        col = {y: j for j, y in enumerate(years)}
+        matrix = np.full((len(states), len(years)), np.nan)
+        for (s, y), total in self._total.items():
+            if months:
+                total = RunningStats()
+                for m in months:
+                    for st in self._cells.get((s, y, m), {}).values():
+                        total.merge(st)
+            if total.count:
+                matrix[row[s], col[y]] = total.mean
+        return states, years, matrix
+
+    def seasonal_baseline(self, state, months):
+        """
+        Long-term mean of the seasonal total (mean_region_total over `months`)
+        across every year that has all of those months: (baseline, years used).
+        Cached per cube version, since a new version is a new cube instance.
+        """
+        import numpy as np
+        key = (str(state).strip().title() if state else None, tuple(months))
+        if key not in self._baselines:
+            totals, used = [], []
+            for year in self.years(state):
+                if state and not all((key[0], year, m) in self._cells for m in months):
+                    continue
+                agg = self.aggregator(state, year, months)
+                if not agg.empty:
+                    totals.append(agg.mean_region_total)
+                    used.append(year)
+            self._baselines[key] = (float(np.mean(totals)) if totals else float("nan"), used)
+        return self._baselines[key]
+
+    def states(self):
+        return sorted({s for s, _ in self._total})
+
+    def years(self, state=None):
+        return sorted({y for s, y in self._total if state is None or s == str(state).strip().title()})
+
+    def aggregator(self, state=None, year=None, months=None):
+        """Cube slice in the RainfallAggregator shape the intent handlers consume."""
+        agg = RainfallAggregator()
+        overall, regions = self.stats(state, year, months)
+        if not overall.count:
+            return agg
+        agg.value_col, agg.region_col = "Rainfall", self.region_col
+        agg.overall = overall
+        agg.by_region.groups = regions
+        agg.rows = overall.count
+        return agg
+
+    # ------------------- Persistence -------------------
+    def _path(self):
+        return os.path.join(warehouse.STORE_DIR, self.dataset, CUBE_FILE)
+
+    def save(self):
+        import numpy as np
+        keys, stats = [], []
+        for (state, year, month), cells in self._cells.items():
+            for region, st in cells.items():
+                keys.append((state, region, year, month))
+                stats.append((st.sum, st.count, st.min, st.max, st.sumsq))
+        path = self._path()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            np.savez(
+                f,
+                version=np.array(self.version),
+                state=np.array([k[0] for k in keys], dtype=str),
+                region=np.array([k[1] for k in keys], dtype=str),
+                year=np.array([k[2] for k in keys], dtype="int32"),
+                month=np.array([k[3] for k in keys], dtype=str),
+                stats=np.array(stats, dtype="float64").reshape(-1, 5),
+            )
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, dataset):
+        import numpy as np
+        cube = cls(dataset)
+        path = cube._path()
+        if not os.path.exists(path):
+            return None
+        with np.load(path) as f:
+            cube.version = int(f["version"])
+            for state, region, year, month, row in zip(f["state"], f["region"], f["year"], f["month"], f["stats"]):
+                st = RunningStats()
+                st.sum, st.count, st.min, st.max, st.sumsq = float(row[0]), int(row[1]), float(row[2]), float(row[3]), float(row[4])
+                key = (str(state), int(year), str(month))
+                cube._cells.setdefault(key, {})[str(region)] = st
+                cube._months.setdefault(key[:2], set()).add(key[2])
+        for state, year in list(cube._months):
+            cube._rollup(state, year)
+        return cube
+
+    @classmethod
+    def build(cls, dataset):
+        """Full rebuild from every warehouse partition."""
+        cube = cls(dataset, version=warehouse.read_manifest(dataset)["version"])
+        for state, year, month, regions, rain in warehouse.scan(dataset):
+            cube.update_partition(state, year, month, regions, rain)
+        return cube
+
+
+# ------------------- Shared instances -------------------
+_cubes = {}         # dataset -> RainfallCube
+_last_check = {}    # dataset -> monotonic time of last manifest check
+_cube_lock = threading.Lock()
+
+
+def get_cube(dataset):
+    """
+    Current cube for a dataset, or None when nothing was ingested.
+    Reloaded when the warehouse manifest version moves (checked every CUBE_CHECK_INTERVAL s).
+    """
+    cube = _cubes.get(dataset)
+    now = time.monotonic()
+    if cube is not None and now - _last_check.get(dataset, 0) < CUBE_CHECK_INTERVAL:
+        return cube
+    if not warehouse.has_dataset(dataset):
+        return None
+
+    with _cube_lock:
+        _last_check[dataset] = now
+        version = warehouse.read_manifest(dataset)["version"]
+        cube = _cubes.get(dataset)
+        if cube is not None and cube.version == version:
+            return cube
+        fresh = RainfallCube.load(dataset)
+        if fresh is None or fresh.version != version:
+            fresh = RainfallCube.build(dataset)  # ingest did not finish its roll-up; recover
+            fresh.save()
+        _cubes[dataset] = fresh
+        return fresh
+
+
+def update_cube(dataset, partitions):
+    """Roll freshly written (State, Year, Month) partitions into the persisted cube."""
+    with _cube_lock:
+        cube = _cubes.get(dataset) or RainfallCube.load(dataset) or RainfallCube(dataset)
+        for state, year, month in partitions:
+            for s, y, m, regions, rain in warehouse.scan(dataset, state, year, [month]):
+                cube.update_partition(s, y, m, regions, rain)
+        cube.version = warehouse.read_manifest(dataset)["version"]
+        cube.save()
+        _cubes[dataset] = cube
+        return cube
+
+
+def cube_for(resource_id):
+    """Cube of a data.gov.in resource id, or None."""
+    dataset = DATASET_BY_ID.get(resource_id)
+    return get_cube(dataset) if dataset else None
+
+
+def local_rainfall_stats(resource_id, filters):
+    """
+    Rainfall stats for API-style `filters` from the cube (falls back to a
+    partition scan if the cube cannot be loaded). Empty when not ingested.
+    """
+    dataset = DATASET_BY_ID.get(resource_id)
+    if not dataset:
+        return RainfallAggregator()
+    month = warehouse.normalize_month(filters.get("Month"))
+    try:
+        cube = get_cube(dataset)
+    except Exception as e:
+        print(f"[WARN] Rainfall cube unavailable, scanning partitions: {e}")
+        return warehouse.local_rainfall_stats(resource_id, filters)
+    if cube is None:
+        return RainfallAggregator()
+    return cube.aggregator(filters.get("State"), filters.get("Year"), [month] if month else None)
@@ -1,9 +1,16 @@
-import os, json, pandas as pd
+import os, json, glob, fnmatch
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from .columnar import load_cached_frame, load_streamed_frame
+from .crop_schema import parse_crop_export
+from .district_state import DISTRICT_STATE_FILE, attach_state
+from .metrics import span
 
-DATA_DIR = os.path.join(os.path.dirname(__file__), "..", "data_json")
+DATA_DIR = os.getenv("SAMARTH_DATA_DIR", os.path.join(os.path.dirname(__file__), "..", "data_json"))
 
 def load_local_json(file_name):
     """Universal loader for data.gov.in JSONs (supports both 'records' and 'data' keys)."""
+    import pandas as pd
     path = os.path.join(DATA_DIR, file_name)
     with open(path, "r", encoding="utf-8") as f:
         data = json.load(f)
@@ -26,101 +33,116 @@ def load_local_json(file_name):
     else:
         raise ValueError(f"❌ Unsupported JSON format in {file_name}: keys={list(data.keys())}")
 
+# Every data_json export is a crop table unless excluded; drop in a file to add a crop
+CROP_FILE_PATTERN = os.getenv("SAMARTH_CROP_FILES", "*.json")
+NON_CROP_FILES = ("rainfall*.json",)
+LOADER_WORKERS = int(os.getenv("SAMARTH_LOADER_WORKERS", str(os.cpu_count() or 1)))
+LOADER_PARALLEL_MIN = int(os.getenv("SAMARTH_LOADER_PARALLEL_MIN", "4"))  # below this, spawning costs more than it saves
+
+def crop_files():
+    """Crop export paths in data_json (sorted, rainfall dumps excluded)."""
+    paths = sorted(glob.glob(os.path.join(DATA_DIR, CROP_FILE_PATTERN)))
+    return [p for p in paths if not any(fnmatch.fnmatch(os.path.basename(p), pat) for pat in NON_CROP_FILES)]
+
+def crop_source_paths():
+    """Paths of the JSON exports (and the district→state table) that make up the crop frame."""
+    return crop_files() + [DISTRICT_STATE_FILE]
+
+def load_columnar_json(file_name, progress=None):
+    """load_local_json via the columnar cache: JSON is streamed in once (bounded memory), later loads are memory-mapped."""
+    path = os.path.join(DATA_DIR, file_name)
+    name = os.path.splitext(file_name)[0]
+    with span("dataframe_build"):
+        return load_streamed_frame(name, path, progress=progress)
+
 def load_crop_data():
-    """Combine rice and jowar JSONs into one standardized DataFrame."""
-    rice = load_local_json("rice.json")
-    jowar = load_local_json("jowar.json")
-
-    # Add crop labels
-    rice["Crop"] = "Rice"
-    jowar["Crop"] = "Jowar"
-
-    # Rename dynamically
-    rename_map = {
-        "b": "District",
-        "c": "Rainfed_Area",
-        "d": "Irrigated_Area",
-        "e": "Total_Area",
-    }
-
-    rice = rice.rename(columns=rename_map)
-    jowar = jowar.rename(columns=rename_map)
-
-    # Assign correct production columns per crop
-    if "n" in rice.columns:
-        rice.rename(columns={"n": "Production"}, inplace=True)
-    elif "r" in rice.columns:
-        rice.rename(columns={"r": "Production"}, inplace=True)
-
-    if "r" in jowar.columns:
-        jowar.rename(columns={"r": "Production"}, inplace=True)
-    elif "n" in jowar.columns:
-        jowar.rename(columns={"n": "Production"}, inplace=True)
-
-    # Merge
-    df = pd.concat([rice, jowar], ignore_index=True)
+    """Combined crop frame, memory-mapped from the columnar cache while the source files are unchanged."""
+    with span("dataframe_build"):
+        return load_cached_frame("crop_data", crop_source_paths(), _build_crop_data)
+
+def _parse_all(paths):
+    """parse_crop_export over every file; a spawn-based process pool when there are enough files."""
+    workers = min(LOADER_WORKERS, len(paths))
+    if workers < 2 or len(paths) < LOADER_PARALLEL_MIN:
+        return [parse_crop_export(p) for p in paths]
+    # spawn: forking a threaded action server is unsafe; workers only import crop_schema's deps
+    try:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+            return list(pool.map(parse_crop_export, paths))
+    except Exception as e:
+        print(f"[WARN] Parallel crop load failed, parsing serially: {e}")
+        return [parse_crop_export(p) for p in paths]
+
+def _build_crop_data():
+    """Combine every crop export into one DataFrame with columns named from the field labels."""
+    import pandas as pd
+    paths = crop_files()
+    frames = []
+    for path, df in zip(paths, _parse_all(paths)):
+        if df is None:
+            print(f"[WARN] Skipping {os.path.basename(path)}: no district production columns")
+            continue
+        frames.append(df)
+    if not frames:
+        raise ValueError(f"❌ No crop exports found in {os.path.normpath(DATA_DIR)}")
+
+    # Merge (columns missing from a file become NaN)
+    df = pd.concat(frames, ignore_index=True, sort=False)
 
     # Clean types
-    df["District"] = df["District"].astype(str).str.title()
-    df["Production"] = pd.to_numeric(df["Production"], errors="coerce")
+    df["District"] = df["District"].astype("category")
+    df["Crop"] = df["Crop"].astype("category")
 
-    return df
+    # The exports carry no State; resolve it from the bundled district→state table
+    return attach_state(df)
 
 
 if __name__ == "__main__":
     print("🔍 Testing local dataset loader...")
 
-    print("\n🌾 Combining rice + jowar data...")
+    print("\n🌾 Combining crop exports:", ", ".join(os.path.basename(p) for p in crop_files()))
     crop_df = load_crop_data()
     print("✅ Combined crop data shape:", crop_df.shape)
     print("Columns:", list(crop_df.columns))
     print(crop_df.head(5))
 
-import requests
+from .cache import RESPONSE_CACHE, make_key
+from .http_client import get_json
+from .pagination import PAGE_SIZE, iter_record_batches
+from .datasets import DATASETS
+from . import warehouse
 
 API_KEY = os.getenv("DATA_GOV_API_KEY", "579b464db66ec23bdd000001b0188e54573f48536618a7d6b4756b1e")
-RAIN_DATASET_ID = "6c05cd1b-ed59-40c2-bc31-e314f39c6971"
+RAIN_DATASET_ID = DATASETS["rainfall_district"]["id"]
 SECURE_HEADERS = {"User-Agent": "SamarthRainfallBot/1.0"}
 
-def query_rainfall_api(filters):
-    """Query rainfall dataset via data.gov.in API."""
-    url = f"https://api.data.gov.in/resource/{RAIN_DATASET_ID}"
-    params = {"api-key": API_KEY, "format": "json", "limit": 1000}
+def query_rainfall_api(filters, offset=0, limit=PAGE_SIZE):
+    """Query one page of the rainfall dataset via data.gov.in API (served from the shared response cache)."""
+    return RESPONSE_CACHE.get_or_fetch(
+        make_key(RAIN_DATASET_ID, {**filters, "_offset": offset, "_limit": limit}),
+        lambda: _fetch_rainfall_api(filters, offset, limit),
+    )
+
+def _fetch_rainfall_api(filters, offset=0, limit=PAGE_SIZE):
+    """Uncached rainfall API request."""
+    return fetch_resource_page(RAIN_DATASET_ID, filters, offset, limit)
+
+def fetch_resource_page(resource_id, filters, offset=0, limit=PAGE_SIZE, raise_errors=False):
+    """Uncached request for one page of any data.gov.in resource (bulk ingest, cache misses)."""
+    url = f"https://api.data.gov.in/resource/{resource_id}"
+    params = {"api-key": API_KEY, "format": "json", "offset": offset, "limit": limit}
     for k, v in filters.items():
         if v:
             params[f"filters[{k}]"] = v
-    try:
-        res = requests.get(url, params=params, headers=SECURE_HEADERS, timeout=15)
-        if res.status_code == 200:
-            return res.json()
-        else:
-            print(f"[WARN] HTTP {res.status_code} when fetching rainfall data.")
-            return {}
-    except Exception as e:
-        print(f"[ERROR] Rainfall API failed: {e}")
-        return {}
+    return get_json(url, params, raise_errors=raise_errors)
 
-def load_rainfall_data(state: str = None, year: str = "2018"):
-    """
-    Load rainfall data for a given state and year from data.gov.in API.
-    Falls back to local cache if API unavailable.
-    """
-    data = query_rainfall_api({"State": state, "Year": year}) if state else query_rainfall_api({"Year": year})
+def iter_rainfall_batches(filters):
+    """Yield every page of rainfall records matching `filters`."""
+    return iter_record_batches(lambda offset, limit: query_rainfall_api(filters, offset, limit))
 
-    if data.get("records"):
-        df = pd.DataFrame(data["records"])
-    else:
-        # fallback: check for local rainfall cache
-        cache_path = os.path.join(DATA_DIR, "rainfall_district.json")
-        if os.path.exists(cache_path):
-            with open(cache_path, "r", encoding="utf-8") as f:
-                cached = json.load(f)
-            df = pd.DataFrame(cached.get("records", []))
-        else:
-            print("[WARN] No rainfall API data or local cache found.")
-            return pd.DataFrame()
-
-    # normalize columns
+def _normalize_rainfall(df):
+    """Keep State / Year / Rainfall with proper types."""
+    import pandas as pd
     if "Avg_rainfall" in df.columns:
         df["Rainfall"] = pd.to_numeric(df["Avg_rainfall"], errors="coerce")
     elif "Rainfall_mm" in df.columns:
@@ -132,3 +154,30 @@ def load_rainfall_data(state: str = None, year: str = "2018"):
         df["Year"] = pd.to_numeric(df["Year"], errors="coerce")
 
     return df[["State", "Year", "Rainfall"]] if "Rainfall" in df.columns else df
+
+def load_rainfall_data(state: str = None, year: str = "2018"):
+    """
+    Load rainfall data for a given state and year: local warehouse partitions
+    first, then data.gov.in API (all pages), then the local rainfall_district.json cache.
+    """
+    import pandas as pd
+    local = warehouse.load_frame("rainfall_district", state, year)
+    if not local.empty:
+        return local[["State", "Year", "Rainfall"]]
+
+    filters = {"State": state, "Year": year} if state else {"Year": year}
+    # normalise page by page so only the three needed columns are ever concatenated
+    frames = [_normalize_rainfall(pd.DataFrame(records)) for records in iter_rainfall_batches(filters)]
+
+    if frames:
+        return pd.concat(frames, ignore_index=True)
+
+    # fallback: check for local rainfall cache
+    cache_path = os.path.join(DATA_DIR, "rainfall_district.json")
+    if os.path.exists(cache_path):
+        with open(cache_path, "r", encoding="utf-8") as f:
+            cached = json.load(f)
+        return _normalize_rainfall(pd.DataFrame(cached.get("records", [])))
+
+    print("[WARN] No rainfall API data or local cache found.")
+    return pd.DataFrame()
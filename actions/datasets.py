@@ -0,0 +1,23 @@
+# ---------------------------------------------------------------------
+# 🌧️ VERIFIED DATASETS
+# ---------------------------------------------------------------------
+DATASETS = {
+    "rainfall_district": {
+        "id": "6c05cd1b-ed59-40c2-bc31-e314f39c6971",
+        "desc": "District-wise Daily Rainfall Data (All India, IMD)",
+        "filters": ["State", "Year", "Month", "District"]
+    },
+    "rainfall_subbasin": {
+        "id": "da428447-700a-41e9-a56a-d7855ffb672f",
+        "desc": "Daily Sub-basin-wise Rainfall Data (HVD)",
+        "filters": ["Sub-basin", "Date"]
+    },
+    "rainfall_rajasthan_monsoon": {
+        "id": "c9302010-023d-4c91-863e-3177079c0410",
+        "desc": "Rajasthan Monsoon 2018 Rainfall Statistics",
+        "filters": ["District"],
+        "defaults": {"State": "Rajasthan", "Year": "2018"}
+    }
+}
+
+DATASET_BY_ID = {ds["id"]: name for name, ds in DATASETS.items()}
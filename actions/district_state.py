@@ -0,0 +1,58 @@
+import os, re, json
+from functools import lru_cache
+
+# ---------------------------------------------------------------------
+# 🗺️ DISTRICT → STATE REFERENCE TABLE
+# ---------------------------------------------------------------------
+# district_state.json: {"states": {State: [canonical districts]}, "aliases": {alias: canonical}}
+# Names are matched on a normalised key (lowercase, letters/digits only), so
+# "BAGALKOT", "Bagalkote" and "Bengaluru - Urban" / "Bangalore Urban" resolve.
+DISTRICT_STATE_FILE = os.path.join(os.path.dirname(__file__), "district_state.json")
+
+
+def district_key(name):
+    return re.sub(r"[^a-z0-9]", "", str(name).lower())
+
+
+@lru_cache(maxsize=1)
+def _table(path=DISTRICT_STATE_FILE):
+    """(normalised district/alias → (canonical district, state)) from the bundled table."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"[WARN] District→state table unavailable: {e}")
+        return {}
+    lookup = {}
+    for state, districts in data.get("states", {}).items():
+        for district in districts:
+            lookup[district_key(district)] = (district, state)
+    for alias, district in data.get("aliases", {}).items():
+        if district_key(district) in lookup:
+            lookup.setdefault(district_key(alias), lookup[district_key(district)])
+    return lookup
+
+
+def resolve(district):
+    """(canonical district, state) for a district name or alias; (None, None) if unknown."""
+    return _table().get(district_key(district), (None, None))
+
+
+def state_of(district):
+    return resolve(district)[1]
+
+
+def attach_state(df, column="District"):
+    """Add a categorical State column; resolved once per distinct district, not per row."""
+    import numpy as np
+    import pandas as pd
+    values = df[column]
+    if not isinstance(values.dtype, pd.CategoricalDtype):
+        values = values.astype(str).astype("category")
+    states = [state_of(d) for d in values.cat.categories]
+    mapped = np.array(states + [None], dtype=object)[values.cat.codes.to_numpy()]  # code -1 → None
+    df["State"] = pd.Categorical(mapped)
+    unknown = sorted({str(d) for d, s in zip(values.cat.categories, states) if s is None})
+    if unknown:
+        print(f"[WARN] No state for {len(unknown)} district(s): {', '.join(unknown[:5])}")
+    return df
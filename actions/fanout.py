@@ -0,0 +1,76 @@
+import os, asyncio
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from .resilience import clip
+
+# ---------------------------------------------------------------------
+# 🔀 CONCURRENT MULTI-QUERY EXECUTOR
+# ---------------------------------------------------------------------
+FANOUT_WORKERS = int(os.getenv("SAMARTH_FANOUT_WORKERS", "16"))
+FANOUT_DEADLINE = float(os.getenv("SAMARTH_FANOUT_DEADLINE", "20"))
+
+# Shared pool: a timed-out call keeps its worker until the HTTP timeout fires,
+# but never blocks the caller past its deadline.
+_EXECUTOR = ThreadPoolExecutor(max_workers=FANOUT_WORKERS, thread_name_prefix="fanout")
+
+
+def fetch_parallel(calls, deadline=FANOUT_DEADLINE):
+    """
+    Run `calls` ({key: zero-arg callable}) concurrently.
+    Returns {key: result} for every call that finished within `deadline`
+    seconds overall; calls that raised or are still running are left out.
+    """
+    if not calls:
+        return {}
+    futures = {_EXECUTOR.submit(fn): key for key, fn in calls.items()}
+    done, pending = wait(futures, timeout=deadline)
+
+    for fut in pending:
+        fut.cancel()
+    if pending:
+        print(f"[WARN] {len(pending)}/{len(futures)} queries missed the {deadline:.0f}s deadline.")
+
+    results = {}
+    for fut in done:
+        key = futures[fut]
+        try:
+            results[key] = fut.result()
+        except Exception as e:
+            print(f"[ERROR] Query {key!r} failed: {e}")
+    return results
+
+
+async def gather_within(coros, deadline=FANOUT_DEADLINE, on_result=None):
+    """
+    Async counterpart of fetch_parallel: awaits {key: coroutine} concurrently
+    and returns {key: result} for those done within `deadline` (clipped to the
+    turn budget); the rest are cancelled. on_result(key, result) is called as
+    each one finishes, for callers that report progress.
+    """
+    if not coros:
+        return {}
+    deadline = clip(deadline)
+
+    async def _reporting(key, coro):
+        result = await coro
+        on_result(key, result)
+        return result
+
+    if on_result is not None:
+        coros = {key: _reporting(key, c) for key, c in coros.items()}
+    tasks = {asyncio.ensure_future(c): key for key, c in coros.items()}
+    done, pending = await asyncio.wait(tasks, timeout=deadline)
+
+    for task in pending:
+        task.cancel()
+    if pending:
+        print(f"[WARN] {len(pending)}/{len(tasks)} queries missed the {deadline:.0f}s deadline.")
+
+    results = {}
+    for task in done:
+        key = tasks[task]
+        try:
+            results[key] = task.result()
+        except Exception as e:
+            print(f"[ERROR] Query {key!r} failed: {e}")
+    return results
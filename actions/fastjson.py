@@ -0,0 +1,25 @@
+import json
+
+# ---------------------------------------------------------------------
+# ⚡ FAST JSON (orjson when installed, stdlib json otherwise)
+# ---------------------------------------------------------------------
+try:
+    import orjson
+except ImportError:  # optional dependency
+    orjson = None
+
+HAS_ORJSON = orjson is not None
+
+
+def loads(data):
+    """Decode JSON from bytes or str."""
+    if HAS_ORJSON:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dumps(obj):
+    """Encode to UTF-8 bytes."""
+    if HAS_ORJSON:
+        return orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(obj, separators=(",", ":")).encode("utf-8")
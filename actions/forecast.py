@@ -0,0 +1,163 @@
+import os, threading
+from dataclasses import dataclass
+
+from .datasets import DATASET_BY_ID
+from .cube import get_cube
+
+# ---------------------------------------------------------------------
+# 🔮 RAINFALL FORECASTING (every state fitted in one vectorised pass)
+# ---------------------------------------------------------------------
+# Model per state:  rainfall[t] = a + b·(t - t0) [+ c·rainfall[t-1] when FORECAST_LAGS=1]
+# All states are solved together with batched normal equations over the
+# State × Year matrix from the rainfall cube; missing years are masked out.
+FORECAST_LAGS = int(os.getenv("SAMARTH_FORECAST_LAGS", "0"))
+MIN_YEARS = int(os.getenv("SAMARTH_FORECAST_MIN_YEARS", "3"))
+
+# Two-sided 95% Student-t quantiles for 1..30 degrees of freedom (normal beyond)
+_T95 = (12.706, 4.303, 3.182, 2.776, 2.571, 2.447, 2.365, 2.306, 2.262, 2.228,
+        2.201, 2.179, 2.160, 2.145, 2.131, 2.120, 2.110, 2.101, 2.093, 2.086,
+        2.080, 2.074, 2.069, 2.064, 2.060, 2.056, 2.052, 2.048, 2.045, 2.042)
+
+
+def _t95(dof):
+    return _T95[dof - 1] if 1 <= dof <= len(_T95) else 1.96
+
+
+@dataclass(frozen=True)
+class Forecast:
+    """Next-year point forecast with a 95% prediction interval (NaN when too few points)."""
+    year: int
+    value: float
+    low: float
+    high: float
+    slope: float
+    points: int
+
+
+def fit_trends(years, matrix, lags=FORECAST_LAGS):
+    """
+    Fit the trend model for every row of a (series × years) matrix at once.
+    Returns one Forecast (or None when a row has fewer than MIN_YEARS points) per row.
+    """
+    import numpy as np
+    years = np.asarray(years, dtype="float64")
+    y = np.asarray(matrix, dtype="float64").reshape(-1, len(years))
+    n_rows, n_years = y.shape
+    if not n_rows or not n_years:
+        return [None] * n_rows
+    t = years - years[0]
+
+    # Design tensor X[s, t, :] and mask of usable observations
+    cols = [np.ones_like(y), np.broadcast_to(t, y.shape)]
+    mask = ~np.isnan(y)
+    if lags:
+        prev = np.full_like(y, np.nan)
+        prev[:, 1:] = y[:, :-1]
+        mask &= ~np.isnan(prev)
+        cols.append(np.nan_to_num(prev))
+    X = np.stack(cols, axis=-1)
+    w = mask.astype("float64")
+    yz = np.nan_to_num(y)
+    p = X.shape[-1]
+
+    XtX = np.einsum("stp,st,stq->spq", X, w, X)
+    Xty = np.einsum("stp,st,st->sp", X, w, yz)
+    n = w.sum(axis=1).astype(int)
+    ok = (n >= max(MIN_YEARS, p)) & (np.abs(np.linalg.det(XtX)) > 1e-12)
+
+    beta = np.full((n_rows, p), np.nan)
+    inv = np.full((n_rows, p, p), np.nan)
+    if ok.any():
+        inv[ok] = np.linalg.inv(XtX[ok])
+        beta[ok] = np.einsum("spq,sq->sp", inv[ok], Xty[ok])
+
+    resid = (yz - np.einsum("stp,sp->st", X, np.nan_to_num(beta))) * w
+    dof = n - p
+    s2 = np.where(dof > 0, (resid ** 2).sum(axis=1) / np.maximum(dof, 1), np.nan)
+
+    # Regressors of the year after the last observed one
+    x0 = np.ones((n_rows, p))
+    x0[:, 1] = t[-1] + (years[1] - years[0] if n_years > 1 else 1)
+    if lags:
+        x0[:, 2] = y[:, -1]
+    value = np.einsum("sp,sp->s", x0, beta)
+    var = s2 * (1 + np.einsum("sp,spq,sq->s", x0, inv, x0))
+    half = np.array([_t95(d) for d in dof]) * np.sqrt(var)
+
+    next_year = int(years[-1]) + 1
+    out = []
+    for i in range(n_rows):
+        if not ok[i] or np.isnan(value[i]):
+            out.append(None)
+            continue
+        out.append(Forecast(
+            year=next_year,
+            value=float(value[i]),
+            low=float(value[i] - half[i]),
+            high=float(value[i] + half[i]),
+            slope=float(beta[i, 1]),
+            points=int(n[i]),
+        ))
+    return out
+
+
+def fit_series(yearly, lags=FORECAST_LAGS):
+    """Forecast from one {year: mean rainfall} series (used when no cube is available)."""
+    import numpy as np
+    if not yearly:
+        return None
+    points = sorted((int(y), float(v)) for y, v in yearly.items())
+    years = np.arange(points[0][0], points[-1][0] + 1)
+    row = np.full(len(years), np.nan)
+    for y, v in points:
+        row[y - years[0]] = v
+    return fit_trends(years, row[None, :], lags)[0]
+
+
+# ------------------- Cached per-state models -------------------
+class _ForecastTable:
+    def __init__(self):
+        self.version = None
+        self.years = ()
+        self.series = {}     # state -> tuple of yearly means (NaN as None)
+        self.forecasts = {}  # state -> Forecast | None
+
+
+_tables = {}  # (dataset, months, lags) -> _ForecastTable
+_lock = threading.Lock()
+
+
+def _refresh(table, cube, months, lags):
+    """Refit only the states whose yearly series changed since the last cube version."""
+    import numpy as np
+    states, years, matrix = cube.year_matrix(months)
+    series = {s: tuple(None if np.isnan(v) else round(float(v), 6) for v in row) for s, row in zip(states, matrix)}
+    if tuple(years) != table.years:
+        changed = list(range(len(states)))
+    else:
+        changed = [i for i, s in enumerate(states) if table.series.get(s) != series[s]]
+    if changed:
+        fits = fit_trends(years, matrix[changed], lags)
+        for i, fc in zip(changed, fits):
+            table.forecasts[states[i]] = fc
+    for gone in set(table.forecasts) - set(states):
+        table.forecasts.pop(gone, None)
+    table.years, table.series, table.version = tuple(years), series, cube.version
+    return len(changed)
+
+
+def state_forecast(resource_id, state, months=None, lags=FORECAST_LAGS):
+    """
+    Cached next-year forecast for one state from the local cube, or None when
+    the dataset is not ingested or the state has too little history.
+    """
+    dataset = DATASET_BY_ID.get(resource_id)
+    cube = get_cube(dataset) if dataset and state else None
+    if cube is None:
+        return None
+    key = (dataset, tuple(months or ()), lags)
+    with _lock:
+        table = _tables.setdefault(key, _ForecastTable())
+        if table.version != cube.version:
+            _refresh(table, cube, months, lags)
+        return table.forecasts.get(str(state).strip().title())
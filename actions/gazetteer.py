@@ -0,0 +1,202 @@
+import re, threading
+from collections import deque
+from dataclasses import dataclass, field
+
+from .snapshot import get_crop_snapshot
+
+# ---------------------------------------------------------------------
+# 📖 GAZETTEER (one-pass Aho–Corasick matcher for fallback entity extraction)
+# ---------------------------------------------------------------------
+# Text and patterns are normalised the same way (lowercase, runs of
+# non-alphanumerics → one space) and matches must sit on word boundaries.
+# Overlaps resolve leftmost-longest, so "post monsoon" beats "monsoon".
+STATES = [
+    "Andhra Pradesh", "Arunachal Pradesh", "Assam", "Bihar", "Chhattisgarh", "Goa", "Gujarat",
+    "Haryana", "Himachal Pradesh", "Jharkhand", "Karnataka", "Kerala", "Madhya Pradesh",
+    "Maharashtra", "Manipur", "Meghalaya", "Mizoram", "Nagaland", "Odisha", "Punjab", "Rajasthan",
+    "Sikkim", "Tamil Nadu", "Telangana", "Tripura", "Uttar Pradesh", "Uttarakhand", "West Bengal",
+]
+STATE_ALIASES = {
+    "orissa": "Odisha", "tamilnadu": "Tamil Nadu", "uttaranchal": "Uttarakhand",
+    "chattisgarh": "Chhattisgarh", "chhatisgarh": "Chhattisgarh", "maharastra": "Maharashtra",
+    "karnatak": "Karnataka", "westbengal": "West Bengal", "paschim banga": "West Bengal",
+    "keralam": "Kerala", "rajastan": "Rajasthan", "gujrat": "Gujarat",
+}
+CROPS = ["Rice", "Wheat", "Jowar", "Bajra", "Maize", "Ragi", "Barley", "Cotton", "Sugarcane",
+         "Groundnut", "Soyabean", "Mustard", "Gram", "Tur", "Moong", "Urad", "Jute", "Tea", "Coffee"]
+CROP_ALIASES = {
+    "paddy": "Rice", "chawal": "Rice", "dhan": "Rice", "gehun": "Wheat", "gehu": "Wheat",
+    "sorghum": "Jowar", "jwar": "Jowar", "pearl millet": "Bajra", "bajri": "Bajra",
+    "finger millet": "Ragi", "nachni": "Ragi", "corn": "Maize", "makka": "Maize",
+    "sugar cane": "Sugarcane", "ganna": "Sugarcane", "peanut": "Groundnut", "moongphali": "Groundnut",
+    "soybean": "Soyabean", "chana": "Gram", "chickpea": "Gram", "arhar": "Tur", "pigeon pea": "Tur",
+    "sarson": "Mustard", "kapas": "Cotton",
+}
+SEASONS = {
+    "winter": "winter", "summer": "summer", "monsoon": "monsoon", "post monsoon": "post-monsoon",
+    "postmonsoon": "post-monsoon", "rainy": "rainy", "kharif": "monsoon", "rabi": "winter",
+    "zaid": "summer", "barsat": "monsoon", "varsha": "monsoon", "sardi": "winter", "garmi": "summer",
+}
+MONTHS = {
+    "january": "01", "february": "02", "march": "03", "april": "04", "may": "05", "june": "06",
+    "july": "07", "august": "08", "september": "09", "october": "10", "november": "11", "december": "12",
+    "jan": "01", "feb": "02", "mar": "03", "apr": "04", "jun": "06", "jul": "07", "aug": "08",
+    "sep": "09", "sept": "09", "oct": "10", "nov": "11", "dec": "12",
+}
+KEYWORDS = {
+    "compare": ["compare", "compared", "comparing", "comparison", "versus"],
+    "highest": ["highest", "maximum"],
+    "lowest": ["lowest", "minimum"],
+    "top": ["top", "best", "leading"],
+    "district": ["district", "districts"],
+    "trend": ["trend", "trends", "trending"],
+    "correlate": ["correlate", "correlated", "correlation", "correlating", "relationship"],
+    "policy": ["policy", "policies"],
+    "promote": ["promote", "promoting", "promotion"],
+    "stability": ["stability", "stable", "unstable"],
+    "variation": ["variation", "variations", "variability", "volatility"],
+}
+
+_NON_WORD = re.compile(r"[^a-z0-9]+")
+
+
+def normalize(text):
+    return _NON_WORD.sub(" ", str(text).lower()).strip()
+
+
+class AhoCorasick:
+    """Multi-pattern automaton: build once, then every match in a single scan of the text."""
+
+    def __init__(self):
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [[]]  # node -> [(pattern length, payload)]
+
+    def add(self, pattern, payload):
+        node = 0
+        for ch in pattern:
+            nxt = self._goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            node = nxt
+        self._out[node].append((len(pattern), payload))
+
+    def build(self):
+        """Breadth-first failure links; outputs of suffix states are merged in."""
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, nxt in self._goto[node].items():
+                queue.append(nxt)
+                f = self._fail[node]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                self._fail[nxt] = self._goto[f].get(ch, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+        return self
+
+    def iter_matches(self, text):
+        """Yield (start, end, payload) for every pattern occurrence."""
+        node = 0
+        for i, ch in enumerate(text):
+            while node and ch not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(ch, 0)
+            for length, payload in self._out[node]:
+                yield i - length + 1, i + 1, payload
+
+
+@dataclass
+class Entities:
+    """Entities in text order, de-duplicated."""
+    states: list = field(default_factory=list)
+    districts: list = field(default_factory=list)
+    crops: list = field(default_factory=list)
+    seasons: list = field(default_factory=list)
+    months: list = field(default_factory=list)
+    keywords: set = field(default_factory=set)
+
+
+_KIND_FIELD = {"state": "states", "district": "districts", "crop": "crops", "season": "seasons", "month": "months"}
+
+
+class Gazetteer:
+    def __init__(self, districts=(), crops=()):
+        self._ac = AhoCorasick()
+        entries = {}
+        for name in STATES:
+            entries[normalize(name)] = ("state", name)
+        for alias, name in STATE_ALIASES.items():
+            entries[normalize(alias)] = ("state", name)
+        for name in districts:
+            entries.setdefault(normalize(name), ("district", str(name)))
+        for name in list(CROPS) + [str(c) for c in crops]:
+            entries[normalize(name)] = ("crop", name.title())
+        for alias, name in CROP_ALIASES.items():
+            entries[normalize(alias)] = ("crop", name)
+        for alias, season in SEASONS.items():
+            entries[normalize(alias)] = ("season", season)
+        for alias, month in MONTHS.items():
+            entries[alias] = ("month", month)
+        for keyword, variants in KEYWORDS.items():
+            for v in variants:
+                entries.setdefault(v, ("keyword", keyword))
+        for pattern, payload in entries.items():
+            if pattern:
+                self._ac.add(pattern, payload)
+        self._ac.build()
+        self.size = len(entries)
+
+    def extract(self, text):
+        """Every entity in one pass (leftmost-longest, whole words only)."""
+        text = normalize(text)
+        n = len(text)
+        hits = sorted(
+            ((start, -(end - start), end, payload) for start, end, payload in self._ac.iter_matches(text)
+             if (start == 0 or text[start - 1] == " ") and (end == n or text[end] == " ")),
+        )
+        found, covered = Entities(), 0
+        for start, _, end, (kind, value) in hits:
+            if start < covered:
+                continue
+            covered = end
+            if kind == "keyword":
+                found.keywords.add(value)
+                continue
+            bucket = getattr(found, _KIND_FIELD[kind])
+            if value not in bucket:
+                bucket.append(value)
+        return found
+
+
+_gazetteer = None
+_gazetteer_key = None
+_lock = threading.Lock()
+
+
+def get_gazetteer():
+    """Gazetteer including every district and crop of the current crop snapshot."""
+    global _gazetteer, _gazetteer_key
+    try:
+        snapshot = get_crop_snapshot()
+        key = snapshot.version
+    except Exception as e:
+        print(f"[WARN] Gazetteer built without crop data: {e}")
+        snapshot, key = None, None
+    if _gazetteer is not None and key == _gazetteer_key:
+        return _gazetteer
+    with _lock:
+        if _gazetteer is None or key != _gazetteer_key:
+            df = snapshot.df if snapshot is not None else None
+            districts = df["District"].dropna().astype(str).unique() if df is not None and "District" in df else ()
+            crops = df["Crop"].dropna().astype(str).unique() if df is not None and "Crop" in df else ()
+            _gazetteer, _gazetteer_key = Gazetteer(districts, crops), key
+        return _gazetteer
+
+
+def extract_entities(text):
+    return get_gazetteer().extract(text)
@@ -0,0 +1,178 @@
+import os, time, asyncio, random, weakref
+
+from . import fastjson
+from .datasets import DATASET_BY_ID
+from .metrics import HTTP_BYTES, HTTP_REQUESTS, HTTP_SECONDS, current_intent, span
+from .resilience import UpstreamUnavailable, clip
+
+# ---------------------------------------------------------------------
+# 🌐 POOLED HTTP CLIENTS (keep-alive, bounded, retry with backoff)
+# ---------------------------------------------------------------------
+HTTP_TIMEOUT = float(os.getenv("SAMARTH_HTTP_TIMEOUT", "15"))
+HTTP_MAX_CONNECTIONS = int(os.getenv("SAMARTH_HTTP_MAX_CONNECTIONS", "100"))
+HTTP_MAX_PER_HOST = int(os.getenv("SAMARTH_HTTP_MAX_PER_HOST", "32"))
+HTTP_RETRIES = int(os.getenv("SAMARTH_HTTP_RETRIES", "2"))
+HTTP_BACKOFF = float(os.getenv("SAMARTH_HTTP_BACKOFF", "0.5"))
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+SECURE_HEADERS = {"User-Agent": "SamarthRainfallBot/1.0"}
+
+_async_sessions = weakref.WeakKeyDictionary()  # event loop -> aiohttp.ClientSession
+_sync_session = None
+
+
+def get_async_session():
+    """Shared aiohttp session for the running event loop (created on first use)."""
+    import aiohttp
+    loop = asyncio.get_running_loop()
+    session = _async_sessions.get(loop)
+    if session is None or session.closed:
+        connector = aiohttp.TCPConnector(
+            limit=HTTP_MAX_CONNECTIONS,
+            limit_per_host=HTTP_MAX_PER_HOST,
+            keepalive_timeout=30,
+            ttl_dns_cache=300,
+        )
+        session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=HTTP_TIMEOUT),
+            headers=SECURE_HEADERS,
+        )
+        _async_sessions[loop] = session
+    return session
+
+
+async def close_async_session():
+    """Close the pooled session of the running loop (e.g. on server shutdown)."""
+    session = _async_sessions.pop(asyncio.get_running_loop(), None)
+    if session is not None and not session.closed:
+        await session.close()
+
+
+def _dataset_label(url):
+    """Dataset name for a data.gov.in resource URL (the resource id for unknown ones)."""
+    resource_id = url.rstrip("/").rsplit("/", 1)[-1]
+    return DATASET_BY_ID.get(resource_id, resource_id)
+
+
+def _decode(body, dataset):
+    HTTP_BYTES.inc(len(body), dataset=dataset)
+    with span("json_decode"):
+        return fastjson.loads(body)
+
+
+def _backoff_delay(attempt):
+    # exponential backoff with jitter so retries from many workers spread out
+    return HTTP_BACKOFF * (2 ** attempt) * random.uniform(0.5, 1.0)
+
+
+async def get_json_async(url, params, breaker=None):
+    """
+    GET a JSON document; retries 429/5xx and network errors. Returns {} on failure.
+    Timeouts and retries are clipped to the turn budget. With a `breaker`, failures
+    are counted on it and raise UpstreamUnavailable (as does an open circuit).
+    """
+    import aiohttp
+    dataset = _dataset_label(url)
+    if breaker is not None and not breaker.allow():
+        HTTP_REQUESTS.inc(dataset=dataset, status="circuit_open")
+        raise UpstreamUnavailable(f"circuit '{breaker.name}' is open")
+    params = {k: v for k, v in params.items() if v is not None}  # aiohttp rejects None; requests drops it
+    session = get_async_session()
+    last_error = None
+    for attempt in range(HTTP_RETRIES + 1):
+        timeout = clip(HTTP_TIMEOUT)
+        if timeout <= 0:
+            HTTP_REQUESTS.inc(dataset=dataset, status="no_budget")
+            if breaker is not None:
+                breaker.record_failure()
+            raise UpstreamUnavailable("turn budget spent")
+        t0 = time.perf_counter()
+        status = "error"
+        try:
+            with span("http"):
+                async with session.get(url, params=params, timeout=aiohttp.ClientTimeout(total=timeout)) as res:
+                    status = str(res.status)
+                    body = await res.read() if res.status == 200 else None
+            if body is not None:
+                doc = _decode(body, dataset)
+                if breaker is not None:
+                    breaker.record_success()
+                return doc
+            if res.status not in RETRY_STATUSES:
+                print(f"[WARN] HTTP {res.status}: {url}")
+                return {}
+            last_error = f"HTTP {res.status}"
+        except asyncio.TimeoutError as e:
+            status, last_error = "timeout", repr(e)
+        except (aiohttp.ClientError, ValueError) as e:
+            last_error = repr(e)
+        finally:
+            HTTP_SECONDS.observe(time.perf_counter() - t0, dataset=dataset, intent=current_intent())
+            HTTP_REQUESTS.inc(dataset=dataset, status=status)
+        delay = _backoff_delay(attempt)
+        if attempt == HTTP_RETRIES or clip(delay) < delay:
+            break  # out of retries, or the backoff would outlast the budget
+        await asyncio.sleep(delay)
+
+    print(f"[ERROR] API query failed after {attempt + 1} attempts: {last_error}")
+    if breaker is not None:
+        breaker.record_failure()
+        raise UpstreamUnavailable(last_error)
+    return {}
+
+
+def get_session():
+    """Shared requests.Session for synchronous callers (scripts, loaders, threads)."""
+    global _sync_session
+    if _sync_session is None:
+        # only scripts and loaders take this path; keep requests out of action-server startup
+        import requests
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+
+        retry = Retry(
+            total=HTTP_RETRIES,
+            backoff_factor=HTTP_BACKOFF,
+            status_forcelist=RETRY_STATUSES,
+            allowed_methods=frozenset(["GET"]),
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=HTTP_MAX_PER_HOST, max_retries=retry)
+        session = requests.Session()
+        session.headers.update(SECURE_HEADERS)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        _sync_session = session
+    return _sync_session
+
+
+def get_json(url, params, raise_errors=False):
+    """
+    Blocking counterpart of get_json_async. Returns {} on failure, or raises
+    UpstreamUnavailable with `raise_errors` (bulk ingest must not mistake a
+    failed page for the end of the data).
+    """
+    dataset = _dataset_label(url)
+    t0 = time.perf_counter()
+    status = "error"
+    try:
+        with span("http"):
+            res = get_session().get(url, params=params, timeout=HTTP_TIMEOUT)
+        status = str(res.status_code)
+        if res.status_code == 200:
+            return _decode(res.content, dataset)
+        print(f"[WARN] HTTP {res.status_code}: {url}")
+        if raise_errors:
+            raise UpstreamUnavailable(f"HTTP {res.status_code}")
+        return {}
+    except UpstreamUnavailable:
+        raise
+    except Exception as e:
+        print(f"[ERROR] API query failed: {e}")
+        if raise_errors:
+            raise UpstreamUnavailable(repr(e)) from e
+        return {}
+    finally:
+        HTTP_SECONDS.observe(time.perf_counter() - t0, dataset=dataset, intent=current_intent())
+        HTTP_REQUESTS.inc(dataset=dataset, status=status)
@@ -0,0 +1,150 @@
+import os, sys, glob, time, argparse
+
+from .data_handler import DATA_DIR, load_columnar_json, load_crop_data, fetch_resource_page
+from .columnar import COLUMNAR_DIR
+from .datasets import DATASETS
+from .fanout import fetch_parallel
+from .pagination import iter_record_batches
+from .warehouse import STORE_DIR, PartitionWriter, has_dataset
+from .cube import RainfallCube, update_cube
+from .jsonstream import JsonExportStream, Progress
+
+# ---------------------------------------------------------------------
+# 📥 OFFLINE INGEST COMMANDS
+#   python -m actions.ingest columnar     data_json/*.json → typed columnar cache (streamed, bounded memory)
+#   python -m actions.ingest rainfall     data.gov.in (or a downloaded dump) → local warehouse + cube
+#   python -m actions.ingest cube         rebuild the rainfall cube from warehouse partitions
+# ---------------------------------------------------------------------
+# A slice replaces the partitions it covers, so it is paged to the end (the
+# interactive MAX_RECORDS cap would cut an all-India year short); a failed
+# page or more records than INGEST_MAX_RECORDS aborts it before anything is written.
+INGEST_MAX_RECORDS = int(os.getenv("SAMARTH_INGEST_MAX_RECORDS", "10000000"))
+
+
+class SliceTruncated(RuntimeError):
+    """A slice has more records upstream than INGEST_MAX_RECORDS; it is not written."""
+
+
+def ingest_columnar():
+    """Convert every data_json export (and the combined crop frame) to columnar files."""
+    for path in sorted(glob.glob(os.path.join(DATA_DIR, "*.json"))):
+        t0 = time.perf_counter()
+        df = load_columnar_json(os.path.basename(path), progress=Progress(os.path.basename(path)))
+        print(f"✅ {os.path.basename(path)} → columnar ({df.shape[0]} rows, {df.shape[1]} cols, {time.perf_counter() - t0:.2f}s)")
+    crop = load_crop_data()
+    print(f"✅ crop_data → columnar ({crop.shape[0]} rows, {crop.shape[1]} cols) in {os.path.normpath(COLUMNAR_DIR)}")
+
+
+def _ingest_slice(dataset, filters):
+    """Page one (State?, Year) slice from the API into the warehouse; all or nothing."""
+    writer = PartitionWriter(dataset)
+    t0 = time.perf_counter()
+    resource_id = DATASETS[dataset]["id"]
+
+    def truncated():
+        raise SliceTruncated(f"{dataset} {filters} has more than {INGEST_MAX_RECORDS} records")
+
+    pages = iter_record_batches(
+        lambda offset, limit: fetch_resource_page(resource_id, filters, offset, limit, raise_errors=True),
+        max_records=INGEST_MAX_RECORDS,
+        on_truncated=truncated,
+    )
+    try:
+        for records in pages:
+            writer.add(records)
+    except BaseException:
+        writer.discard()  # keep the stored partitions rather than replace them with a prefix
+        raise
+    written = writer.flush()
+    update_cube(dataset, written)
+    label = ", ".join(f"{k}={v}" for k, v in filters.items() if v) or "all"
+    print(f"  • {dataset} [{label}]: {writer.rows_in} rows → {len(written)} partitions ({time.perf_counter() - t0:.1f}s)")
+    return writer.rows_in
+
+
+def ingest_rainfall_api(datasets, years, states=None, deadline=None):
+    """Bulk-ingest each (dataset, state, year) slice from data.gov.in, slices fetched in parallel."""
+    calls = {}
+    for dataset in datasets:
+        supported = DATASETS[dataset]["filters"]
+        for year in (years if "Year" in supported else [None]):
+            for state in (states if states and "State" in supported else [None]):
+                filters = {"State": state, "Year": str(year) if year else None}
+                calls[(dataset, state, year)] = (lambda d=dataset, f=filters: _ingest_slice(d, f))
+    results = fetch_parallel(calls, deadline=deadline)
+    if len(results) < len(calls):
+        print(f"[WARN] {len(calls) - len(results)}/{len(calls)} slices failed; their partitions were left unchanged.")
+    return sum(results.values())
+
+
+def ingest_rainfall_file(dataset, path, chunk_rows=50000):
+    """
+    Stream a downloaded dump ('records', 'fields' + 'data' or a bare list) into
+    the warehouse chunk by chunk (replaces the partitions it covers).
+    """
+    writer = PartitionWriter(dataset, spill_rows=chunk_rows)  # at most one chunk of rows held in memory
+    stream = JsonExportStream(path, chunk_rows)
+    progress = Progress(os.path.basename(path))
+    for records in stream.records():
+        writer.add(records)
+        progress(stream)
+    progress(stream, done=True)
+    written = writer.flush()
+    update_cube(dataset, written)
+    print(f"  • {os.path.basename(path)} → {dataset}: {writer.rows_in} rows, {len(written)} partitions, {writer.rows_dropped} dropped")
+    return writer.rows_in
+
+
+def rebuild_cubes(datasets):
+    """Recompute each dataset's cube from all of its partitions."""
+    for dataset in datasets:
+        if not has_dataset(dataset):
+            continue
+        t0 = time.perf_counter()
+        cube = RainfallCube.build(dataset)
+        cube.save()
+        print(f"  • {dataset}: {len(cube.states())} states, {len(cube.years())} years ({time.perf_counter() - t0:.1f}s)")
+
+
+def _years(spec):
+    if "-" in spec:
+        start, end = spec.split("-", 1)
+        return list(range(int(start), int(end) + 1))
+    return [int(y) for y in spec.split(",")]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m actions.ingest", description="Offline data ingest for the action server.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("columnar", help="convert data_json/*.json to the memory-mapped columnar cache")
+
+    rain = sub.add_parser("rainfall", help="page data.gov.in rainfall datasets into the local warehouse")
+    rain.add_argument("--dataset", action="append", choices=sorted(DATASETS), help="dataset(s) to ingest (default: all)")
+    rain.add_argument("--years", default="2018-2024", help="e.g. 2018-2024 or 2019,2021")
+    rain.add_argument("--state", action="append", help="restrict to state(s); default: all states")
+    rain.add_argument("--from-file", action="append", help="read a downloaded JSON dump instead of the API")
+
+    cube = sub.add_parser("cube", help="rebuild the rainfall cube from the local warehouse")
+    cube.add_argument("--dataset", action="append", choices=sorted(DATASETS), help="dataset(s) to rebuild (default: all)")
+
+    args = parser.parse_args(argv)
+    if args.command == "columnar":
+        ingest_columnar()
+    elif args.command == "rainfall":
+        datasets = args.dataset or list(DATASETS)
+        t0 = time.perf_counter()
+        if args.from_file:
+            if len(datasets) != 1:
+                parser.error("--from-file needs exactly one --dataset")
+            rows = sum(ingest_rainfall_file(datasets[0], path) for path in args.from_file)
+        else:
+            rows = ingest_rainfall_api(datasets, _years(args.years), args.state)
+        print(f"✅ {rows} rows ingested into {os.path.normpath(STORE_DIR)} in {time.perf_counter() - t0:.1f}s")
+    elif args.command == "cube":
+        rebuild_cubes(args.dataset or list(DATASETS))
+        print("✅ rainfall cubes rebuilt")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
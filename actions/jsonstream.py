@@ -0,0 +1,169 @@
+import os, json, time
+
+# ---------------------------------------------------------------------
+# 🌊 STREAMING JSON READER (data.gov.in exports without loading the whole file)
+# ---------------------------------------------------------------------
+# Handles {"fields": [...], "data": [[...], ...]}, {"records": [{...}, ...]} and
+# bare top-level lists. Small top-level values are decoded whole; the row
+# array is decoded one element at a time from a sliding text buffer, so
+# memory stays at one read block plus one chunk of rows.
+READ_BLOCK = int(os.getenv("SAMARTH_STREAM_BLOCK", str(1 << 20)))
+ROW_ARRAYS = ("data", "records")
+_WS = " \t\n\r"
+
+
+class _Buffer:
+    def __init__(self, f):
+        self.f = f
+        self.text = ""
+        self.pos = 0
+        self.eof = False
+
+    def fill(self):
+        """Append one block; drop consumed text. False at end of file."""
+        if self.eof:
+            return False
+        block = self.f.read(READ_BLOCK)
+        if not block:
+            self.eof = True
+            return False
+        self.text = self.text[self.pos:] + block
+        self.pos = 0
+        return True
+
+    def peek(self):
+        """Next non-whitespace character (without consuming it), '' at EOF."""
+        while True:
+            while self.pos < len(self.text) and self.text[self.pos] in _WS:
+                self.pos += 1
+            if self.pos < len(self.text):
+                return self.text[self.pos]
+            if not self.fill():
+                return ""
+
+    def expect(self, chars):
+        ch = self.peek()
+        if ch not in chars:
+            raise ValueError(f"❌ Malformed JSON: expected {chars!r}, found {ch!r}")
+        self.pos += 1
+        return ch
+
+    def value(self, decoder):
+        """Decode one JSON value, reading more blocks while it is incomplete."""
+        self.peek()
+        while True:
+            try:
+                obj, end = decoder.raw_decode(self.text, self.pos)
+            except json.JSONDecodeError:
+                if not self.fill():
+                    raise
+                continue
+            # A number at the buffer edge may continue in the next block
+            if end == len(self.text) and not self.eof and isinstance(obj, (int, float)):
+                if self.fill():
+                    continue
+            self.pos = end
+            return obj
+
+
+class JsonExportStream:
+    """
+    Iterate the rows of a data.gov.in export in chunks.
+    `labels` / `ids` are known once the header is read (before the first chunk
+    for exports that put "fields" first, as data.gov.in does).
+    """
+
+    def __init__(self, path, chunk_rows=50000):
+        self.path = path
+        self.chunk_rows = chunk_rows
+        self.ids = None
+        self.labels = None
+        self.meta = {}
+        self.rows = 0
+        self.bytes_total = os.path.getsize(path)
+        self.bytes_read = 0
+
+    def _set_fields(self, fields):
+        self.ids = [f.get("id") if isinstance(f, dict) else f for f in fields]
+        self.labels = [(f.get("label") or f.get("id")) if isinstance(f, dict) else f for f in fields]
+
+    def _rows(self, buf, decoder):
+        buf.expect("[")
+        if buf.peek() == "]":
+            buf.pos += 1
+            return
+        while True:
+            yield buf.value(decoder)
+            if buf.expect(",]") == "]":
+                return
+
+    def _chunks(self, rows, f):
+        chunk = []
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) >= self.chunk_rows:
+                self.rows += len(chunk)
+                self.bytes_read = f.tell()
+                yield chunk
+                chunk = []
+        if chunk:
+            self.rows += len(chunk)
+            self.bytes_read = f.tell()
+            yield chunk
+
+    def __iter__(self):
+        decoder = json.JSONDecoder()
+        with open(self.path, "r", encoding="utf-8") as f:
+            buf = _Buffer(f)
+            first = buf.peek()
+            if first == "[":
+                yield from self._chunks(self._rows(buf, decoder), f)
+                return
+            buf.expect("{")
+            if buf.peek() == "}":
+                return
+            while True:
+                key = buf.value(decoder)
+                buf.expect(":")
+                if key in ROW_ARRAYS and buf.peek() == "[":
+                    if key == "data" and self.ids is None:
+                        raise ValueError(f"❌ {os.path.basename(self.path)}: 'data' precedes 'fields'; cannot stream")
+                    yield from self._chunks(self._rows(buf, decoder), f)
+                else:
+                    value = buf.value(decoder)
+                    if key == "fields" and isinstance(value, list):
+                        self._set_fields(value)
+                    else:
+                        self.meta[key] = value
+                if buf.expect(",}") == "}":
+                    return
+
+    def records(self, use_labels=True):
+        """Chunks as lists of dicts (row arrays zipped with field labels or ids)."""
+        for chunk in self:
+            if chunk and isinstance(chunk[0], list):
+                names = self.labels if use_labels else self.ids
+                yield [dict(zip(names, row)) for row in chunk]
+            else:
+                yield chunk
+
+
+class Progress:
+    """Throttled 'rows, rows/sec, % of file' progress lines."""
+
+    def __init__(self, label, every=2.0, out=print):
+        self.label = label
+        self.every = every
+        self.out = out
+        self.t0 = time.perf_counter()
+        self._last = self.t0
+
+    def __call__(self, stream, done=False):
+        now = time.perf_counter()
+        if not done and now - self._last < self.every:
+            return
+        self._last = now
+        elapsed = max(now - self.t0, 1e-9)
+        pct = 100.0 * stream.bytes_read / stream.bytes_total if stream.bytes_total else 100.0
+        state = "done" if done else f"{pct:5.1f}%"
+        self.out(f"  … {self.label}: {stream.rows:,} rows, {stream.rows / elapsed:,.0f} rows/s ({state}, {elapsed:.1f}s)")
@@ -0,0 +1,214 @@
+import os, time, threading, contextvars
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# ---------------------------------------------------------------------
+# 📈 METRICS (per-stage spans, Prometheus text exposition on /metrics)
+# ---------------------------------------------------------------------
+# Stdlib only. Spans time one stage of an action (entity extraction, fetch,
+# upstream HTTP, JSON decode, DataFrame build, aggregation, formatting) and are
+# labelled with the intent being served, taken from a context variable so nested
+# calls and spawned tasks inherit it. A span records its self time: time spent in
+# spans opened inside it (e.g. HTTP inside fetch) is counted there instead, so
+# fetch is left with the time spent waiting on sources.
+METRICS_HOST = os.getenv("SAMARTH_METRICS_HOST", "127.0.0.1")
+METRICS_PORT = int(os.getenv("SAMARTH_METRICS_PORT", "9102"))  # 0 disables the endpoint
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0)
+
+_INTENT = contextvars.ContextVar("samarth_intent", default="-")
+_NESTED = contextvars.ContextVar("samarth_nested", default=None)  # seconds of child spans of the open span
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+        self._series = {}  # label values -> state
+
+    def _key(self, labels):
+        return tuple(str(labels.get(n, "-")) for n in self.label_names)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            series = sorted(self._series.items())
+            lines += [line for key, state in series for line in self._render_series(key, state)]
+        return lines
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._series[key] = self._series.get(key, 0) + amount
+
+    def _render_series(self, key, value):
+        yield f"{self.name}_total{_labels(self.label_names, key)} {value}"
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._series[self._key(labels)] = value
+
+    def _render_series(self, key, value):
+        yield f"{self.name}{_labels(self.label_names, key)} {value}"
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help, labels=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._series.get(key)
+            if state is None:
+                state = self._series[key] = [[0] * len(self.buckets), 0.0, 0]  # per-bucket counts, sum, count
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[0][i] += 1
+                    break
+            state[1] += value
+            state[2] += 1
+
+    def _render_series(self, key, state):
+        counts, total, n = state
+        cumulative = 0
+        for bound, count in zip(self.buckets, counts):
+            cumulative += count
+            yield f"{self.name}_bucket{_labels(self.label_names, key, [('le', bound)])} {cumulative}"
+        yield f"{self.name}_bucket{_labels(self.label_names, key, [('le', '+Inf')])} {n}"
+        yield f"{self.name}_sum{_labels(self.label_names, key)} {total}"
+        yield f"{self.name}_count{_labels(self.label_names, key)} {n}"
+
+
+# ------------------- Registry -------------------
+ACTION_SECONDS = Histogram("samarth_action_seconds", "End-to-end action latency.", ("action", "intent"))
+STAGE_SECONDS = Histogram("samarth_stage_seconds", "Latency of one stage of an action.", ("stage", "intent"))
+HTTP_SECONDS = Histogram("samarth_http_seconds", "Upstream HTTP request latency.", ("dataset", "intent"))
+HTTP_REQUESTS = Counter("samarth_http_requests", "Upstream HTTP requests by outcome.", ("dataset", "status"))
+HTTP_BYTES = Counter("samarth_http_bytes", "Response bytes fetched from upstream.", ("dataset",))
+CACHE_REQUESTS = Counter("samarth_cache_requests", "Response cache lookups.", ("cache", "result"))
+ROWS_PROCESSED = Counter("samarth_rows_processed", "Rainfall rows aggregated.", ("source",))
+FLIGHTS = Counter("samarth_singleflight_calls", "Single-flight calls by role.", ("flight", "role"))
+CIRCUIT_OPEN = Gauge("samarth_circuit_open", "1 while an upstream's circuit breaker is open.", ("upstream",))
+ERRORS = Counter("samarth_stage_errors", "Stages that raised.", ("stage", "intent"))
+STARTUP_SECONDS = Gauge("samarth_startup_seconds", "Import and warm-up time by startup phase.", ("phase",))
+
+REGISTRY = [ACTION_SECONDS, STAGE_SECONDS, HTTP_SECONDS, HTTP_REQUESTS, HTTP_BYTES,
+            CACHE_REQUESTS, ROWS_PROCESSED, FLIGHTS, CIRCUIT_OPEN, ERRORS, STARTUP_SECONDS]
+
+
+def render():
+    """All metrics in the Prometheus text exposition format."""
+    return "\n".join(line for metric in REGISTRY for line in metric.render()) + "\n"
+
+
+# ------------------- Spans -------------------
+def current_intent():
+    return _INTENT.get()
+
+
+@contextmanager
+def span(stage):
+    """Time one stage of the current action (self time, excluding nested spans)."""
+    intent = _INTENT.get()
+    parent = _NESTED.get()
+    nested = []
+    token = _NESTED.set(nested)
+    t0 = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        ERRORS.inc(stage=stage, intent=intent)
+        raise
+    finally:
+        elapsed = time.perf_counter() - t0
+        _NESTED.reset(token)
+        if parent is not None:
+            parent.append(elapsed)
+        # concurrent children can add up to more than the wall time
+        STAGE_SECONDS.observe(max(elapsed - sum(nested), 0.0), stage=stage, intent=intent)
+
+
+@contextmanager
+def action_span(action, intent):
+    """Time a whole action run; stages inside are labelled with `intent`."""
+    token = _INTENT.set(intent or "-")
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        ACTION_SECONDS.observe(time.perf_counter() - t0, action=action, intent=intent or "-")
+        _INTENT.reset(token)
+
+
+# ------------------- /metrics endpoint -------------------
+_routes = {}  # path prefix -> fn(handler, rest of path); other local endpoints on the same server
+
+
+def add_route(prefix, fn):
+    """Serve GET `prefix`<rest> with fn(handler, rest) from the metrics server."""
+    _routes[prefix] = fn
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        path = self.path.split("?")[0]
+        for prefix, fn in _routes.items():
+            if path.startswith(prefix):
+                fn(self, path[len(prefix):])
+                return
+        if path != "/metrics":
+            self.send_error(404)
+            return
+        body = render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass  # scrapes every few seconds would flood the action server log
+
+
+_server = None
+
+
+def start_metrics_server(host=METRICS_HOST, port=METRICS_PORT):
+    """Serve /metrics from a daemon thread (once per process). Returns the server, or None."""
+    global _server
+    if _server is not None or not port:
+        return _server
+    try:
+        _server = ThreadingHTTPServer((host, port), _Handler)
+    except OSError as e:
+        print(f"[WARN] Metrics endpoint not started on {host}:{port}: {e}")
+        return None
+    _server.daemon_threads = True
+    threading.Thread(target=_server.serve_forever, name="metrics", daemon=True).start()
+    return _server
@@ -0,0 +1,65 @@
+import os, asyncio
+
+# ---------------------------------------------------------------------
+# 📄 PAGINATED FETCH (follows data.gov.in offset/total)
+# ---------------------------------------------------------------------
+PAGE_SIZE = int(os.getenv("SAMARTH_PAGE_SIZE", "5000"))
+MAX_RECORDS = int(os.getenv("SAMARTH_MAX_RECORDS", "200000"))  # safety cap per query
+
+
+def _has_more(page, offset, got, page_size, max_records, on_truncated):
+    total = int(page.get("total") or 0)
+    if got < page_size or (total and offset >= total):
+        return False
+    if offset >= max_records:
+        # More records exist upstream: say so instead of quietly answering from a prefix
+        print(f"[WARN] Paging stopped at the {max_records}-record cap"
+              f"{f' of {total}' if total else ''}; the result is partial.")
+        if on_truncated:
+            on_truncated()
+        return False
+    return True
+
+
+def iter_record_batches(fetch_page, page_size=PAGE_SIZE, max_records=MAX_RECORDS, on_truncated=None):
+    """
+    Yield record lists page by page. `fetch_page(offset, limit)` returns one
+    API response; paging stops at `total`, on a short/empty page, or at `max_records`
+    (then on_truncated() is called, as the records seen are only a prefix).
+    """
+    offset = 0
+    while True:
+        page = fetch_page(offset, page_size) or {}
+        records = page.get("records") or []
+        if not records:
+            return
+        yield records
+        offset += len(records)
+        if not _has_more(page, offset, len(records), page_size, max_records, on_truncated):
+            return
+
+
+async def aiter_record_batches(fetch_page, page_size=PAGE_SIZE, max_records=MAX_RECORDS, on_truncated=None):
+    """
+    Async iter_record_batches. `fetch_page(offset, limit)` is a coroutine function;
+    the next page is requested while the caller consumes the current one.
+    """
+    offset = 0
+    pending = asyncio.ensure_future(fetch_page(offset, page_size))
+    while True:
+        page = await pending or {}
+        records = page.get("records") or []
+        if not records:
+            return
+        offset += len(records)
+        more = _has_more(page, offset, len(records), page_size, max_records, on_truncated)
+        if more:
+            pending = asyncio.ensure_future(fetch_page(offset, page_size))
+        try:
+            yield records
+        except GeneratorExit:
+            if more:
+                pending.cancel()
+            raise
+        if not more:
+            return
@@ -0,0 +1,184 @@
+import threading
+from dataclasses import dataclass
+
+from .snapshot import get_crop_snapshot
+from .cube import get_cube
+from .district_state import district_key
+from .metrics import span
+
+# ---------------------------------------------------------------------
+# 🔗 CROP × RAINFALL PANEL + CORRELATION ENGINE
+# ---------------------------------------------------------------------
+# One row per District × Crop (× Year when the crop data has years), joined to
+# the district's mean rainfall from the local rainfall cube. Per (State, Crop)
+# metrics are computed for every pair at once from grouped sums and cached
+# until the crop snapshot or the cube changes.
+RAINFALL_DATASET = "rainfall_district"
+PANEL_COLUMNS = ["State", "District", "Crop", "Year", "Production", "Area", "Yield", "Rainfall"]
+
+
+@dataclass(frozen=True)
+class CropClimateStats:
+    """Production/yield of one crop in one state against district rainfall."""
+    state: str
+    crop: str
+    n: int
+    pearson: float
+    spearman: float
+    elasticity: float     # % change in production per 1% change in rainfall
+    cv: float             # coefficient of variation of yield (lower = more stable)
+    mean_production: float
+    mean_rainfall: float
+
+
+def _rainfall_frame(cube, by_year):
+    """(State, key, Year, Rainfall) of every cube district; Year is NaN for all-year means."""
+    import numpy as np
+    import pandas as pd
+    rows = []
+    for state in cube.states():
+        years = cube.years(state) if by_year else [None]
+        for year in years:
+            _, regions = cube.stats(state, year)
+            for region, st in regions.items():
+                if st.count:
+                    rows.append((state, district_key(region), np.nan if year is None else float(year), st.mean))
+    return pd.DataFrame(rows, columns=["State", "key", "Year", "Rainfall"])
+
+
+def build_panel(crop_df, cube):
+    """Join crop rows to cube rainfall by district (and year when available)."""
+    import numpy as np
+    import pandas as pd
+    if crop_df.empty or "District" not in crop_df or "Crop" not in crop_df:
+        return pd.DataFrame(columns=PANEL_COLUMNS)
+    by_year = "Year" in crop_df.columns
+    production = pd.to_numeric(crop_df.get("Production"), errors="coerce")
+    area = pd.to_numeric(crop_df["Total_Area"], errors="coerce") if "Total_Area" in crop_df else pd.Series(np.nan, index=crop_df.index)
+    panel = pd.DataFrame({
+        "District": crop_df["District"].astype(str).to_numpy(),
+        "Crop": crop_df["Crop"].astype(str).to_numpy(),
+        "Year": pd.to_numeric(crop_df["Year"], errors="coerce").to_numpy() if by_year else np.nan,
+        "Production": production.to_numpy(dtype="float64", na_value=np.nan),
+        "Area": area.to_numpy(dtype="float64", na_value=np.nan),
+    })
+    if "Yield" in crop_df.columns:
+        panel["Yield"] = pd.to_numeric(crop_df["Yield"], errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+    else:
+        panel["Yield"] = np.where(panel["Area"] > 0, panel["Production"] / panel["Area"], np.nan)
+    panel["key"] = panel["District"].map(district_key)
+    # State from the district→state table when the crop frame has it, else from the rainfall match
+    has_state = "State" in crop_df.columns and crop_df["State"].notna().any()
+    panel["State"] = crop_df["State"].astype(object).to_numpy() if has_state else None
+
+    if cube is None:
+        panel["Rainfall"] = np.nan
+        return panel[PANEL_COLUMNS]
+    rain = _rainfall_frame(cube, by_year)
+    on = ["key", "Year"] if by_year else ["key"]
+    if not by_year:
+        rain = rain.drop(columns="Year")
+    if has_state:
+        on = ["State"] + on
+    else:
+        panel = panel.drop(columns="State")
+    panel = panel.merge(rain, on=on, how="left")
+    return panel[PANEL_COLUMNS]
+
+
+def _grouped_corr(frame, keys, x, y):
+    """Pearson r of x vs y per group, from grouped sums (one pass, no per-group loop)."""
+    import numpy as np
+    import pandas as pd
+    d = pd.DataFrame({k: frame[k] for k in keys})
+    d["x"], d["y"] = x, y
+    d = d.dropna(subset=["x", "y"])
+    d["xx"], d["yy"], d["xy"] = d["x"] ** 2, d["y"] ** 2, d["x"] * d["y"]
+    s = d.groupby(keys, observed=True).agg(n=("x", "size"), sx=("x", "sum"), sy=("y", "sum"),
+                                           sxx=("xx", "sum"), syy=("yy", "sum"), sxy=("xy", "sum"))
+    cov = s["n"] * s["sxy"] - s["sx"] * s["sy"]
+    varx = s["n"] * s["sxx"] - s["sx"] ** 2
+    vary = s["n"] * s["syy"] - s["sy"] ** 2
+    denom = np.sqrt(varx * vary)
+    corr = (cov / denom).where(denom > 1e-12).clip(-1, 1)
+    slope = (cov / varx).where(varx > 1e-12)
+    return corr, slope
+
+
+def compute_metrics(panel):
+    """Pearson/Spearman, elasticity and yield CV for every (State, Crop) pair."""
+    import numpy as np
+    import pandas as pd
+    keys = ["State", "Crop"]
+    joined = panel.dropna(subset=["State", "Production", "Rainfall"])
+    if joined.empty:
+        return pd.DataFrame(columns=["n", "pearson", "spearman", "elasticity", "cv", "mean_production", "mean_rainfall"])
+
+    pearson, _ = _grouped_corr(joined, keys, joined["Rainfall"], joined["Production"])
+    ranks = joined.groupby(keys, observed=True)[["Rainfall", "Production"]].rank()
+    spearman, _ = _grouped_corr(joined, keys, ranks["Rainfall"], ranks["Production"])
+    positive = (joined["Rainfall"] > 0) & (joined["Production"] > 0)
+    _, elasticity = _grouped_corr(
+        joined, keys,
+        np.log(joined["Rainfall"].where(positive)), np.log(joined["Production"].where(positive)),
+    )
+
+    grouped = joined.groupby(keys, observed=True)
+    yield_ = joined["Yield"].where(joined["Yield"].notna(), joined["Production"])
+    ystats = yield_.groupby([joined[k] for k in keys], observed=True).agg(["mean", "std"])
+    metrics = pd.DataFrame({
+        "n": grouped.size(),
+        "pearson": pearson,
+        "spearman": spearman,
+        "elasticity": elasticity,
+        "cv": (ystats["std"] / ystats["mean"]).where(ystats["mean"] > 0),
+        "mean_production": grouped["Production"].mean(),
+        "mean_rainfall": grouped["Rainfall"].mean(),
+    })
+    return metrics
+
+
+class CropClimatePanel:
+    """Joined panel + precomputed metrics; lookups are dict hits."""
+
+    def __init__(self, panel, metrics, version):
+        self.df = panel
+        self.metrics = metrics
+        self.version = version
+        self._stats = {
+            (str(state).lower(), str(crop).lower()): CropClimateStats(
+                state=state, crop=crop, n=int(row["n"]),
+                **{k: float(row[k]) for k in ("pearson", "spearman", "elasticity", "cv", "mean_production", "mean_rainfall")},
+            )
+            for (state, crop), row in metrics.iterrows()
+        }
+
+    def get(self, state, crop):
+        return self._stats.get((str(state).lower(), str(crop).lower()))
+
+    def for_state(self, state):
+        """Every crop's stats in one state, most stable (lowest CV) first."""
+        import numpy as np
+        rows = [s for (st, _), s in self._stats.items() if st == str(state).lower()]
+        return sorted(rows, key=lambda s: (np.isnan(s.cv), s.cv))
+
+
+_panel = None
+_panel_lock = threading.Lock()
+
+
+def get_panel():
+    """Panel for the current crop snapshot and rainfall cube, rebuilt when either changes."""
+    global _panel
+    snapshot = get_crop_snapshot()
+    cube = get_cube(RAINFALL_DATASET)
+    version = (snapshot.version, cube.version if cube else None)
+    panel = _panel
+    if panel is not None and panel.version == version:
+        return panel
+    with _panel_lock:
+        if _panel is None or _panel.version != version:
+            with span("aggregation"):
+                df = build_panel(snapshot.df, cube)
+                _panel = CropClimatePanel(df, compute_metrics(df), version)
+        return _panel
@@ -0,0 +1,131 @@
+import os, json, time, threading, contextvars
+from contextlib import contextmanager
+
+from .metrics import add_route
+
+# ---------------------------------------------------------------------
+# 📡 PROGRESSIVE ANSWERS (partial results over server-sent events)
+# ---------------------------------------------------------------------
+# The Rasa REST webhook returns an action's messages only once it finishes.
+# A client that wants partial results puts a fresh `stream_id` in the message
+# metadata and reads GET /stream/<stream_id> (SSE, on the metrics server)
+# while the webhook call is in flight. Actions publish with emit(); the stream
+# id travels in a context variable so fan-out tasks inherit it. The webhook
+# reply stays the authoritative answer.
+STREAM_TTL = float(os.getenv("SAMARTH_STREAM_TTL", "120"))        # seconds a finished stream is kept
+STREAM_WAIT = float(os.getenv("SAMARTH_STREAM_WAIT", "30"))       # longest an idle subscriber is held
+STREAM_HEARTBEAT = float(os.getenv("SAMARTH_STREAM_HEARTBEAT", "0.5"))
+
+_STREAM = contextvars.ContextVar("samarth_stream", default=None)
+
+
+class _Stream:
+    def __init__(self):
+        self.events = []
+        self.closed = False
+        self.touched = time.monotonic()
+        self.cond = threading.Condition()
+
+
+class ProgressBus:
+    """Buffered per-stream events; subscribers may connect before or after the action starts."""
+
+    def __init__(self, ttl=STREAM_TTL):
+        self.ttl = ttl
+        self._streams = {}
+        self._lock = threading.Lock()
+
+    def _stream(self, stream_id):
+        now = time.monotonic()
+        with self._lock:
+            for sid in [sid for sid, st in self._streams.items() if now - st.touched > self.ttl]:
+                del self._streams[sid]
+            stream = self._streams.get(stream_id)
+            if stream is None:
+                stream = self._streams[stream_id] = _Stream()
+            stream.touched = now
+            return stream
+
+    def publish(self, stream_id, event):
+        stream = self._stream(stream_id)
+        with stream.cond:
+            stream.events.append(event)
+            stream.cond.notify_all()
+
+    def close(self, stream_id):
+        self.publish(stream_id, {"type": "done"})
+        stream = self._stream(stream_id)
+        with stream.cond:
+            stream.closed = True
+            stream.cond.notify_all()
+
+    def subscribe(self, stream_id, wait=STREAM_WAIT, heartbeat=STREAM_HEARTBEAT):
+        """
+        Events of a stream from the start, then live ones until it is closed.
+        Yields None every `heartbeat` s while idle; gives up after `wait` s without events.
+        """
+        stream = self._stream(stream_id)
+        sent, idle_since = 0, time.monotonic()
+        while True:
+            with stream.cond:
+                if sent == len(stream.events) and not stream.closed:
+                    stream.cond.wait(heartbeat)
+                events, closed = stream.events[sent:], stream.closed
+            sent += len(events)
+            for event in events:
+                yield event
+            if closed and sent == len(stream.events):
+                return
+            if events:
+                idle_since = time.monotonic()
+            elif time.monotonic() - idle_since > wait:
+                return
+            else:
+                yield None
+
+
+PROGRESS = ProgressBus()
+
+
+@contextmanager
+def streaming(stream_id):
+    """Publish emit() calls made in the enclosed block (and its tasks) to `stream_id`; closes it on exit."""
+    if not stream_id:
+        yield
+        return
+    token = _STREAM.set(str(stream_id))
+    try:
+        yield
+    finally:
+        _STREAM.reset(token)
+        PROGRESS.close(str(stream_id))
+
+
+def emit(kind, **data):
+    """Send one partial result to the current stream (no-op when the client did not ask for one)."""
+    stream_id = _STREAM.get()
+    if stream_id is not None:
+        PROGRESS.publish(stream_id, {"type": kind, **data})
+
+
+# ------------------- GET /stream/<stream_id> -------------------
+def _serve_stream(handler, stream_id):
+    if not stream_id:
+        handler.send_error(404)
+        return
+    handler.send_response(200)
+    handler.send_header("Content-Type", "text/event-stream; charset=utf-8")
+    handler.send_header("Cache-Control", "no-cache")
+    handler.end_headers()
+    try:
+        for event in PROGRESS.subscribe(stream_id):
+            if event is None:
+                handler.wfile.write(b": keep-alive\n\n")
+            else:
+                handler.wfile.write(f"data: {json.dumps(event, ensure_ascii=False)}\n\n".encode("utf-8"))
+            handler.wfile.flush()
+    except (BrokenPipeError, ConnectionResetError):
+        pass  # client stopped listening (its final answer arrived)
+
+
+add_route("/stream/", _serve_stream)
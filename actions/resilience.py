@@ -0,0 +1,180 @@
+import os, time, asyncio, threading, contextvars
+from contextlib import contextmanager
+
+from .metrics import CIRCUIT_OPEN
+
+# ---------------------------------------------------------------------
+# 🛡️ LATENCY BUDGET, HEDGING & CIRCUIT BREAKERS
+# ---------------------------------------------------------------------
+# Each action turn runs under one deadline (a context variable, so tasks spawned
+# for fan-out inherit it). HTTP timeouts, retries and fan-out waits are clipped
+# to what is left, which bounds the worst-case turn latency.
+TURN_BUDGET = float(os.getenv("SAMARTH_TURN_BUDGET", "10"))          # seconds per turn
+PRIMARY_SHARE = float(os.getenv("SAMARTH_PRIMARY_SHARE", "0.6"))     # of the budget, for the preferred source
+HEDGE_AFTER = float(os.getenv("SAMARTH_HEDGE_AFTER", "1.5"))         # start the fallback if the primary is slower
+BREAKER_FAILURES = int(os.getenv("SAMARTH_BREAKER_FAILURES", "3"))   # consecutive failures that open a breaker
+BREAKER_COOLDOWN = float(os.getenv("SAMARTH_BREAKER_COOLDOWN", "60"))  # seconds before a trial request
+
+
+class UpstreamUnavailable(RuntimeError):
+    """The upstream was skipped: its breaker is open or the turn budget is spent."""
+
+
+class Deadline:
+    def __init__(self, seconds):
+        self.seconds = seconds
+        self.expires = time.monotonic() + seconds
+
+    def remaining(self):
+        return max(self.expires - time.monotonic(), 0.0)
+
+    @property
+    def expired(self):
+        return self.remaining() <= 0
+
+
+_DEADLINE = contextvars.ContextVar("samarth_deadline", default=None)
+
+
+@contextmanager
+def turn_budget(seconds=TURN_BUDGET):
+    """Run the enclosed block (and the tasks it spawns) under one deadline."""
+    token = _DEADLINE.set(Deadline(seconds))
+    try:
+        yield _DEADLINE.get()
+    finally:
+        _DEADLINE.reset(token)
+
+
+def remaining(default=None):
+    """Seconds left in the current turn, or `default` outside any turn budget."""
+    deadline = _DEADLINE.get()
+    return default if deadline is None else deadline.remaining()
+
+
+def clip(seconds):
+    """`seconds`, shortened to the time left in the current turn."""
+    left = remaining()
+    return seconds if left is None else min(seconds, left)
+
+
+# ------------------- Circuit breaker -------------------
+class CircuitBreaker:
+    """
+    closed → (N consecutive failures) → open → (cooldown) → half-open:
+    one trial request is let through; success closes, failure re-opens.
+    """
+
+    def __init__(self, name, failures=BREAKER_FAILURES, cooldown=BREAKER_COOLDOWN):
+        self.name = name
+        self.max_failures = failures
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = None
+        self._trial = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        return "half-open" if time.monotonic() - self.opened_at >= self.cooldown else "open"
+
+    def allow(self):
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "half-open" and not self._trial:
+                self._trial = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            if self.opened_at is not None:
+                print(f"[INFO] Circuit '{self.name}' closed; upstream recovered.")
+                CIRCUIT_OPEN.set(0, upstream=self.name)
+            self.failures = 0
+            self.opened_at = None
+            self._trial = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._trial or (self.opened_at is None and self.failures >= self.max_failures):
+                print(f"[WARN] Circuit '{self.name}' open for {self.cooldown:.0f}s after {self.failures} failures.")
+                self.opened_at = time.monotonic()
+                CIRCUIT_OPEN.set(1, upstream=self.name)
+            self._trial = False
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def breaker_for(name):
+    """The process-wide breaker for one upstream (e.g. a dataset resource id)."""
+    with _breakers_lock:
+        breaker = _breakers.get(name)
+        if breaker is None:
+            breaker = _breakers[name] = CircuitBreaker(name)
+        return breaker
+
+
+# ------------------- Hedged fallback chain -------------------
+def _outcome(task):
+    if task.cancelled():
+        return None
+    if task.exception() is not None:
+        print(f"[WARN] Source failed: {task.exception()!r}")
+        return None
+    return task.result()
+
+
+async def hedged(primary, fallback, useful, hedge_after=HEDGE_AFTER, primary_share=PRIMARY_SHARE):
+    """
+    Run `primary()`; start `fallback()` as well once the primary is slower than
+    `hedge_after` or comes back without anything `useful`. A useful primary
+    result is preferred until its share of the remaining budget runs out.
+    Returns (result, used_fallback); result is None if nothing finished in time.
+    """
+    budget = remaining(TURN_BUDGET)
+    loop = asyncio.get_running_loop()
+    primary_by = loop.time() + budget * primary_share
+    end = loop.time() + budget
+    outcomes = {}
+
+    def outcome(task):
+        if task not in outcomes:
+            outcomes[task] = _outcome(task)
+        return outcomes[task]
+
+    p = asyncio.ensure_future(primary())
+    f = None
+    try:
+        await asyncio.wait({p}, timeout=min(hedge_after, budget))
+        while True:
+            if p.done():
+                result = outcome(p)
+                if result is not None and useful(result):
+                    return result, False
+            if f is None:
+                f = asyncio.ensure_future(fallback())
+            fallback_failed = f.done() and outcome(f) is None
+            if fallback_failed and p.done():
+                return outcome(p), False
+            if f.done() and not fallback_failed and (p.done() or loop.time() >= primary_by):
+                return outcome(f), True
+
+            now = loop.time()
+            if now >= end:
+                return None, False
+            waiting = {t for t in (p, f) if not t.done()}
+            # A failed fallback leaves only the primary, which keeps the whole budget
+            wake = end if not f.done() or fallback_failed else min(primary_by, end)
+            await asyncio.wait(waiting, timeout=max(wake - now, 0), return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for task in (p, f):
+            if task is not None and not task.done():
+                task.cancel()
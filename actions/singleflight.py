@@ -0,0 +1,101 @@
+import asyncio, threading, weakref
+
+from .metrics import FLIGHTS
+
+# ---------------------------------------------------------------------
+# 🛬 SINGLE-FLIGHT (concurrent identical calls share one execution)
+# ---------------------------------------------------------------------
+# The first caller for a key runs the call; callers arriving while it is in
+# flight wait for and receive the same result (or exception). Nothing is
+# remembered afterwards — caching is the ResponseCache's job.
+# Shared results must be treated as read-only by every receiver.
+
+
+class SingleFlight:
+    def __init__(self, name):
+        self.name = name
+        self._lock = threading.Lock()
+        self._calls = {}                                  # key -> _Call (threads)
+        self._async_calls = weakref.WeakKeyDictionary()   # event loop -> {key: Future}
+        self.leaders = 0
+        self.shared = 0
+
+    # ------------------- Threads -------------------
+    def do(self, key, fn):
+        """Run `fn()` once per key among concurrent callers (blocking)."""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.leaders += 1
+            else:
+                self.shared += 1
+        FLIGHTS.inc(flight=self.name, role="leader" if leader else "shared")
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+        return call.result
+
+    # ------------------- asyncio -------------------
+    async def do_async(self, key, fn):
+        """Await `fn()` (a zero-arg coroutine function) once per key among concurrent tasks on this loop."""
+        loop = asyncio.get_running_loop()
+        calls = self._async_calls.setdefault(loop, {})
+        while True:
+            fut = calls.get(key)
+            if fut is None:
+                break
+            self.shared += 1
+            FLIGHTS.inc(flight=self.name, role="shared")
+            try:
+                return await asyncio.shield(fut)  # a cancelled follower must not cancel the leader
+            except asyncio.CancelledError:
+                if not fut.cancelled():
+                    raise  # this follower itself was cancelled
+                # the leader was cancelled (e.g. its deadline); retry, possibly as the new leader
+
+        fut = calls[key] = loop.create_future()
+        self.leaders += 1
+        FLIGHTS.inc(flight=self.name, role="leader")
+        try:
+            result = await fn()
+        except asyncio.CancelledError:
+            fut.cancel()
+            raise
+        except BaseException as e:
+            fut.set_exception(e)
+            fut.exception()  # mark retrieved when nobody else was waiting
+            raise
+        else:
+            fut.set_result(result)
+            return result
+        finally:
+            if calls.get(key) is fut:
+                del calls[key]
+
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+# Upstream page fetches (cache misses) and whole rainfall answers
+FETCH_FLIGHTS = SingleFlight("fetch")
+QUERY_FLIGHTS = SingleFlight("query")
@@ -0,0 +1,116 @@
+import os, time, hashlib, threading
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+from .data_handler import load_crop_data, crop_source_paths
+from .crop_index import CropIndex
+
+if TYPE_CHECKING:  # annotations only; imported lazily where used
+    import pandas as pd
+
+# ---------------------------------------------------------------------
+# 📸 SHARED CROP SNAPSHOT (versioned, read-only, swapped atomically)
+# ---------------------------------------------------------------------
+SNAPSHOT_CHECK_INTERVAL = float(os.getenv("SAMARTH_SNAPSHOT_CHECK_INTERVAL", "5"))
+
+
+@dataclass(frozen=True)
+class CropSnapshot:
+    """
+    One fully built crop frame, its per-crop production index, a
+    (State, Crop) → row-position MultiIndex and the fingerprint of the files
+    it came from.
+    Shared by every request: treat `df` as read-only and copy before mutating.
+    """
+    version: str
+    df: "pd.DataFrame"
+    index: CropIndex
+    rows: "pd.Series"
+    sources: tuple
+    loaded_at: float
+
+    def slice(self, state=None, crop=None):
+        """Rows of one state and/or crop via the sorted MultiIndex (no full-column scan)."""
+        import numpy as np
+        key = (str(state).strip().title() if state else slice(None), str(crop).strip().title() if crop else slice(None))
+        try:
+            pos = self.rows.loc[key]
+        except KeyError:
+            return self.df.iloc[0:0]
+        return self.df.iloc[np.atleast_1d(pos.to_numpy() if hasattr(pos, "to_numpy") else pos)]
+
+
+_current = None
+_stat_key = None
+_last_check = 0.0
+_build_lock = threading.Lock()
+
+
+def _stat_fingerprint(paths):
+    stats = [(p, os.stat(p)) for p in paths]
+    return tuple((p, st.st_mtime_ns, st.st_size) for p, st in stats)
+
+
+def _content_hash(paths):
+    h = hashlib.sha1()
+    for p in paths:
+        h.update(os.path.basename(p).encode("utf-8"))
+        with open(p, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                h.update(chunk)
+    return h.hexdigest()[:12]
+
+
+def _row_index(df):
+    import numpy as np
+    import pandas as pd
+    state = df["State"].astype(object) if "State" in df.columns else pd.Series(None, index=df.index, dtype=object)
+    keys = pd.MultiIndex.from_arrays([state.to_numpy(), df["Crop"].astype(str).to_numpy()], names=["State", "Crop"])
+    return pd.Series(np.arange(len(df)), index=keys).sort_index()
+
+
+def _build(paths, version):
+    df = load_crop_data()
+    return CropSnapshot(
+        version=version, df=df, index=CropIndex(df), rows=_row_index(df),
+        sources=tuple(paths), loaded_at=time.time(),
+    )
+
+
+def get_crop_snapshot():
+    """
+    Current crop snapshot. Source files are stat-checked at most every
+    SNAPSHOT_CHECK_INTERVAL seconds; a new snapshot is built only when their
+    content hash changes, and readers keep the old one until it is ready.
+    """
+    global _current, _stat_key, _last_check
+    snap = _current
+    if snap is not None and time.monotonic() - _last_check < SNAPSHOT_CHECK_INTERVAL:
+        return snap
+
+    # Only one thread rebuilds; everyone else keeps serving the current snapshot
+    if snap is not None and not _build_lock.acquire(blocking=False):
+        return snap
+    if snap is None:
+        _build_lock.acquire()
+    try:
+        snap = _current
+        _last_check = time.monotonic()
+        paths = crop_source_paths()
+        stat_key = _stat_fingerprint(paths)
+        if snap is not None and stat_key == _stat_key:
+            return snap
+
+        version = _content_hash(paths)
+        if snap is None or version != snap.version:
+            snap = _build(paths, version)
+            _current = snap  # atomic reference swap
+        _stat_key = stat_key
+        return snap
+    except Exception as e:
+        if _current is None:
+            raise
+        print(f"[WARN] Crop snapshot reload failed, keeping version {_current.version}: {e}")
+        return _current
+    finally:
+        _build_lock.release()
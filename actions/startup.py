@@ -0,0 +1,141 @@
+import os, sys, time, threading, importlib
+from contextlib import contextmanager
+
+from .metrics import STARTUP_SECONDS
+
+# ---------------------------------------------------------------------
+# 🚀 FAST START (background warm-up + startup-time report)
+# ---------------------------------------------------------------------
+# With SAMARTH_FAST_START=1 (default) the package imports without loading any
+# data or heavy dependency (modules import numpy/pandas/aiohttp inside the
+# functions that use them): those imports, crop snapshot, gazetteer, rainfall
+# cubes and the crop × rainfall panel are built on a daemon thread, started
+# with the action server, while it already accepts connections.
+# A request that arrives first simply waits on the same build (the loaders'
+# locks make sure nothing is built twice). SAMARTH_FAST_START=0 warms up
+# synchronously at import, as before; SAMARTH_WARM_UP=0 skips warm-up.
+FAST_START = os.getenv("SAMARTH_FAST_START", "1") != "0"
+WARM_UP = os.getenv("SAMARTH_WARM_UP", "1") != "0"  # 0: build everything on first use (benchmarks, scripts)
+HEAVY_DEPS = ("numpy", "pandas", "aiohttp")
+
+_timings = []  # (phase, seconds) in the order they finished
+_ready = threading.Event()
+
+
+def record(phase, seconds):
+    """Add one startup phase to the report and the samarth_startup_seconds gauge."""
+    _timings.append((phase, seconds))
+    STARTUP_SECONDS.set(round(seconds, 6), phase=phase)
+
+
+@contextmanager
+def timed(phase):
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(phase, time.perf_counter() - t0)
+
+
+def import_deps(modules=HEAVY_DEPS):
+    """Import third-party dependencies one by one so each shows up in the report."""
+    for name in modules:
+        if name in sys.modules:
+            continue  # already paid for by whoever imported it first; timing it here would report ~0
+        try:
+            with timed(f"import {name}"):
+                importlib.import_module(name)
+        except ImportError as e:
+            print(f"[WARN] Warm-up could not import {name}: {e}")
+
+
+def _warm_stages():
+    from .snapshot import get_crop_snapshot
+    from .gazetteer import get_gazetteer
+    from .datasets import DATASETS
+    from .cube import get_cube
+    from .panel import get_panel
+
+    yield "crop snapshot", get_crop_snapshot
+    yield "gazetteer", get_gazetteer
+    yield "rainfall cubes", lambda: [get_cube(name) for name in DATASETS]
+    yield "crop x rainfall panel", get_panel
+
+
+def warm_up():
+    """Build every shared in-process structure; failures are logged and left to the first request."""
+    with timed("warm-up"):
+        import_deps()
+        for phase, build in _warm_stages():
+            try:
+                with timed(f"warm {phase}"):
+                    build()
+            except Exception as e:
+                print(f"[WARN] Warm-up of {phase} failed: {e}")
+    _ready.set()
+    print(report())
+
+
+def start_warm_up(background=FAST_START):
+    """Warm up on a daemon thread (fast start) or right here."""
+    if not WARM_UP:
+        return
+    if background:
+        threading.Thread(target=warm_up, name="warm-up", daemon=True).start()
+    else:
+        warm_up()
+
+
+def is_warm():
+    return _ready.is_set()
+
+
+# ------------------- Action server hook -------------------
+# rasa_sdk serves from Sanic worker processes, and each one imports this
+# package again. /metrics and the warm-up therefore start from the server's
+# own before_server_start listener: only the process that answers action
+# calls runs them, never the Sanic primary, `python -m actions.ingest` or
+# the benchmarks. before_server_stop closes the pooled HTTP session while
+# the server's loop is still running.
+def _on_server_start(package_started):
+    from .metrics import start_metrics_server
+
+    def listener(app):
+        start_metrics_server()  # local /metrics endpoint (SAMARTH_METRICS_PORT, 0 disables)
+        start_warm_up()
+        print(f"[INFO] actions package ready in {(time.perf_counter() - package_started) * 1000:.0f} ms"
+              f"{' (warming up in the background)' if FAST_START and WARM_UP else ''}")
+    return listener
+
+
+async def _on_server_stop(app):
+    from .http_client import close_async_session
+    await close_async_session()
+
+
+def attach_to_action_server(package_started):
+    """Run the server-side startup (and shutdown) with the rasa_sdk action server that loaded the package."""
+    try:
+        import pluggy
+        from rasa_sdk.plugin import plugin_manager
+    except ImportError:  # rasa_sdk without plugin hooks: this process is the server
+        _on_server_start(package_started)(None)
+        return
+
+    hookimpl = pluggy.HookimplMarker("rasa_sdk")
+
+    class ActionServerHooks:
+        @hookimpl
+        def attach_sanic_app_extensions(self, app):
+            app.register_listener(_on_server_start(package_started), "before_server_start")
+            app.register_listener(_on_server_stop, "before_server_stop")
+
+    plugin_manager().register(ActionServerHooks())
+
+
+def report():
+    """Startup phases, slowest first."""
+    lines = ["[INFO] Startup time by phase:"]
+    for phase, seconds in sorted(_timings, key=lambda t: -t[1]):
+        lines.append(f"  {phase:<28} {seconds * 1000:9.1f} ms")
+    return "\n".join(lines)
@@ -0,0 +1,265 @@
+import os, json, glob, time, shutil, calendar, threading
+from datetime import datetime
+
+from .datasets import DATASETS, DATASET_BY_ID
+from .aggregate import RAINFALL_FIELDS, REGION_FIELDS, RainfallAggregator, detect_field, to_float_array
+
+# ---------------------------------------------------------------------
+# 🏬 LOCAL RAINFALL WAREHOUSE (partitioned by State / Year / Month)
+# ---------------------------------------------------------------------
+# <STORE_DIR>/<dataset>/State=<State>/Year=<YYYY>/Month=<MM>.npz
+#   region    district / sub-basin name per row
+#   date      original date string ("" when the dataset has none)
+#   rainfall  float64 mm
+# <STORE_DIR>/<dataset>/_manifest.json  row counts + a version bumped on every write
+STORE_DIR = os.getenv("SAMARTH_STORE_DIR", os.path.join(os.path.dirname(__file__), "..", "data_store"))
+SPILL_ROWS = int(os.getenv("SAMARTH_INGEST_SPILL_ROWS", "200000"))  # buffered rows before spilling to disk
+
+NO_STATE = "_"     # datasets without a State field (e.g. sub-basins)
+NO_MONTH = "00"    # seasonal / annual statistics without a month
+
+_MONTHS = {name.lower(): f"{i:02d}" for i, name in enumerate(calendar.month_name) if name}
+_MONTHS.update({name.lower(): f"{i:02d}" for i, name in enumerate(calendar.month_abbr) if name})
+_DATE_FORMATS = ("%Y-%m-%d", "%d-%m-%Y", "%d/%m/%Y", "%Y/%m/%d", "%d-%b-%Y", "%Y-%m-%dT%H:%M:%S")
+_manifest_lock = threading.Lock()
+
+
+def _dataset_dir(dataset):
+    return os.path.join(STORE_DIR, dataset)
+
+
+def _state_dir_name(state):
+    return f"State={str(state).strip().title().replace('/', '-')}"
+
+
+def _partition_path(dataset, state, year, month):
+    return os.path.join(_dataset_dir(dataset), _state_dir_name(state), f"Year={year}", f"Month={month}.npz")
+
+
+def normalize_month(value):
+    """'6' / '06' / 'June' / 'jun' → '06'; None if unknown."""
+    if value is None or value == "":
+        return None
+    text = str(value).strip().lower()
+    if text == NO_MONTH:
+        return NO_MONTH
+    if text.isdigit() and 1 <= int(text) <= 12:
+        return f"{int(text):02d}"
+    return _MONTHS.get(text)
+
+
+def _parse_date(value):
+    text = str(value or "").strip()
+    for fmt in _DATE_FORMATS:
+        try:
+            return datetime.strptime(text, fmt)
+        except ValueError:
+            continue
+    return None
+
+
+def partition_key(record, defaults=None):
+    """(State, Year, Month) of one API record, or None if it has no usable year."""
+    defaults = defaults or {}
+    state = record.get("State") or defaults.get("State") or NO_STATE
+    year = record.get("Year") or defaults.get("Year")
+    month = normalize_month(record.get("Month"))
+    if not year or not month:
+        date = _parse_date(record.get("Date"))
+        if date is not None:
+            year = year or date.year
+            month = month or f"{date.month:02d}"
+    try:
+        year = int(float(year))
+    except (TypeError, ValueError):
+        return None
+    return str(state).strip().title(), year, month or NO_MONTH
+
+
+# ------------------- Writing -------------------
+class PartitionWriter:
+    """
+    Collects API records per partition, then replaces those partitions on flush.
+    Buffered rows are spilled as typed per-partition chunks under
+    <STORE_DIR>/_staging/ every `spill_rows` rows; flush merges one partition at
+    a time, so memory is bounded by `spill_rows` and the largest partition,
+    not by the size of the input.
+    """
+
+    def __init__(self, dataset, spill_rows=SPILL_ROWS):
+        self.dataset = dataset
+        self.defaults = DATASETS.get(dataset, {}).get("defaults", {})
+        self.spill_rows = spill_rows
+        self._parts = {}
+        self._buffered = 0
+        self._staged = {}  # (State, Year, Month) -> spilled chunk paths
+        self._staging_dir = os.path.join(STORE_DIR, "_staging", dataset, f"{os.getpid()}-{threading.get_ident()}")
+        self.rows_in = 0
+        self.rows_dropped = 0
+
+    def add(self, records):
+        if not records:
+            return
+        value_col = detect_field(records[0], RAINFALL_FIELDS)
+        region_col = detect_field(records[0], REGION_FIELDS)
+        if value_col is None:
+            self.rows_dropped += len(records)
+            return
+        values = to_float_array([r.get(value_col) for r in records])
+        for rec, val in zip(records, values):
+            key = partition_key(rec, self.defaults)
+            if key is None:
+                self.rows_dropped += 1
+                continue
+            regions, dates, rain = self._parts.setdefault(key, ([], [], []))
+            regions.append(str(rec.get(region_col) or "").strip().title())
+            dates.append(str(rec.get("Date") or ""))
+            rain.append(val)
+            self._buffered += 1
+        self.rows_in += len(records)
+        if self._buffered >= self.spill_rows:
+            self.spill()
+
+    def spill(self):
+        """Write the buffered rows as one typed chunk per partition and empty the buffer."""
+        import numpy as np
+        for key, (regions, dates, rain) in self._parts.items():
+            chunks = self._staged.setdefault(key, [])
+            path = os.path.join(self._staging_dir, "_".join(map(str, key)).replace("/", "-") + f".{len(chunks)}.npz")
+            os.makedirs(self._staging_dir, exist_ok=True)
+            with open(path, "wb") as f:
+                np.savez(f, region=np.array(regions, dtype=str), date=np.array(dates, dtype=str),
+                         rainfall=np.array(rain, dtype="float64"))
+            chunks.append(path)
+        self._parts = {}
+        self._buffered = 0
+
+    def _merged(self, key):
+        """(regions, dates, rainfall) of one partition from its spilled chunks."""
+        import numpy as np
+        columns = {"region": [], "date": [], "rainfall": []}
+        for path in self._staged[key]:
+            with np.load(path) as chunk:
+                for name in columns:
+                    columns[name].append(chunk[name])
+        return tuple(np.concatenate(columns[name]) for name in ("region", "date", "rainfall"))
+
+    def flush(self):
+        """Write all collected partitions; returns the list of (State, Year, Month) written."""
+        import numpy as np
+        self.spill()
+        written, counts = [], {}
+        try:
+            for (state, year, month) in sorted(self._staged):
+                regions, dates, rain = self._merged((state, year, month))
+                path = _partition_path(self.dataset, state, year, month)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+                with open(tmp, "wb") as f:
+                    np.savez(f, region=regions, date=dates, rainfall=rain)
+                os.replace(tmp, path)  # readers see either the old or the new partition
+                written.append((state, year, month))
+                counts[os.path.relpath(path, _dataset_dir(self.dataset))] = len(rain)
+        finally:
+            self.discard()
+        self._update_manifest(counts)
+        return written
+
+    def discard(self):
+        """Drop everything collected so far; the stored partitions are left as they are."""
+        shutil.rmtree(self._staging_dir, ignore_errors=True)
+        try:
+            os.removedirs(os.path.dirname(self._staging_dir))  # drop _staging/<dataset> once empty
+        except OSError:
+            pass  # another writer is still staging
+        self._parts = {}
+        self._buffered = 0
+        self._staged = {}
+
+    def _update_manifest(self, counts):
+        if not counts:
+            return
+        with _manifest_lock:
+            manifest = read_manifest(self.dataset)
+            manifest["partitions"].update(counts)
+            manifest["version"] += 1
+            manifest["updated_at"] = time.time()
+            path = os.path.join(_dataset_dir(self.dataset), "_manifest.json")
+            with open(path + ".tmp", "w", encoding="utf-8") as f:
+                json.dump(manifest, f, indent=1, sort_keys=True)
+            os.replace(path + ".tmp", path)
+
+
+def read_manifest(dataset):
+    path = os.path.join(_dataset_dir(dataset), "_manifest.json")
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {"dataset": dataset, "version": 0, "partitions": {}, "updated_at": None}
+
+
+# ------------------- Reading (partition pruning) -------------------
+def partition_paths(dataset, state=None, year=None, months=None):
+    """Only the partition files a query needs; glob never descends into other states/years."""
+    state_part = _state_dir_name(state) if state else "State=*"
+    year_part = f"Year={int(year)}" if year else "Year=*"
+    base = os.path.join(_dataset_dir(dataset), state_part, year_part)
+    if months:
+        patterns = [os.path.join(base, f"Month={normalize_month(m)}.npz") for m in months if normalize_month(m)]
+    else:
+        patterns = [os.path.join(base, "Month=*.npz")]
+    return sorted(p for pattern in patterns for p in glob.glob(pattern))
+
+
+def _parse_path(path):
+    parts = path.replace("\\", "/").split("/")
+    state = parts[-3].split("=", 1)[1]
+    year = int(parts[-2].split("=", 1)[1])
+    month = parts[-1].split("=", 1)[1][:-len(".npz")]
+    return state, year, month
+
+
+def scan(dataset, state=None, year=None, months=None):
+    """Yield (state, year, month, regions, rainfall) for every matching partition."""
+    import numpy as np
+    for path in partition_paths(dataset, state, year, months):
+        try:
+            with np.load(path) as part:
+                regions, rain = part["region"], part["rainfall"]
+        except Exception as e:
+            print(f"[WARN] Skipping unreadable partition {path}: {e}")
+            continue
+        yield (*_parse_path(path), regions, rain)
+
+
+def has_dataset(dataset):
+    return os.path.isdir(_dataset_dir(dataset))
+
+
+def local_rainfall_stats(resource_id, filters):
+    """
+    Stream the local partitions matching API-style `filters` into a RainfallAggregator.
+    Empty when the dataset (or the requested slice) has not been ingested.
+    """
+    agg = RainfallAggregator()
+    dataset = DATASET_BY_ID.get(resource_id)
+    if not dataset or not has_dataset(dataset):
+        return agg
+    region_col = "Sub-basin" if dataset == "rainfall_subbasin" else "District"
+    month = filters.get("Month")
+    for _, _, _, regions, rain in scan(dataset, filters.get("State"), filters.get("Year"), [month] if month else None):
+        agg.feed_columns(regions, rain, region_col)
+    return agg
+
+
+def load_frame(dataset, state=None, year=None, months=None):
+    """Matching partitions as one DataFrame (State, Year, Month, Region, Rainfall)."""
+    import pandas as pd
+    frames = [
+        pd.DataFrame({"State": s, "Year": y, "Month": m, "Region": regions, "Rainfall": rain})
+        for s, y, m, regions, rain in scan(dataset, state, year, months)
+    ]
+    if not frames:
+        return pd.DataFrame(columns=["State", "Year", "Month", "Region", "Rainfall"])
+    return pd.concat(frames, ignore_index=True)
@@ -1,8 +1,16 @@
 import streamlit as st
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 import requests
+import matplotlib
 import matplotlib.pyplot as plt
 import pandas as pd
-import time
+import io
+import os
+import json
+import uuid
+import hashlib
+import threading
+from collections import OrderedDict
 
 # -----------------------------
 # Streamlit Page Config
@@ -11,6 +19,8 @@ st.set_page_config(page_title="Samarth Rainfall Assistant (Under Production)", p
 
 # Backend RASA API
 RASA_URL = "http://localhost:5005/webhooks/rest/webhook"
+# Partial results from the action server (server-sent events); empty disables progressive answers
+STREAM_URL = os.getenv("SAMARTH_STREAM_URL", "http://localhost:9102/stream/")
 
 # -----------------------------
 # 🌈 Custom Styling
@@ -59,12 +69,21 @@ body, .stApp {
 """, unsafe_allow_html=True)
 
 # -----------------------------
-# Cached Rasa Query
+# Rasa Query
 # -----------------------------
-@st.cache_data(show_spinner=False)
-def cached_query_rasa(user_message: str):
+@st.cache_resource
+def get_rasa_session():
+    # one pooled keep-alive connection set to the Rasa webhook for every browser session
+    return requests.Session()
+
+def query_rasa(sender: str, user_message: str, stream_id: str = None):
+    # never cached: every turn moves Rasa's per-sender tracker and slots, so a
+    # repeated question must reach Rasa too (and a failure is not replayed)
+    payload = {"sender": sender, "message": user_message}
+    if stream_id:
+        payload["metadata"] = {"stream_id": stream_id}
     try:
-        res = requests.post(RASA_URL, json={"sender": "streamlit_user", "message": user_message})
+        res = get_rasa_session().post(RASA_URL, json=payload, timeout=60)
         if res.status_code == 200:
             return res.json()
     except Exception as e:
@@ -74,126 +93,219 @@ def cached_query_rasa(user_message: str):
 # -----------------------------
 # Chart Functions
 # -----------------------------
-def render_bar_chart(data: dict, title: str):
+# Charts are drawn once, encoded as compact PNGs and cached by a hash of their
+# payload; each message keeps its own PNG, so reruns never touch matplotlib.
+# The PNG is shown with st.image, which serves it by URL from Streamlit's media
+# store instead of inlining it in the page on every rerun.
+CHART_CACHE_SIZE = 256
+
+@st.cache_resource
+def configure_matplotlib():
+    matplotlib.use("Agg")
     plt.rcParams['axes.unicode_minus'] = False
     plt.rcParams['font.family'] = 'DejaVu Sans'
+
+@st.cache_resource
+def get_chart_cache():
+    # shared by every browser session (each runs on its own thread); identical payloads render once per process
+    return OrderedDict(), threading.Lock()
+
+def render_bar_chart(data: dict, title: str, unit: str = "mm"):
     fig, ax = plt.subplots(figsize=(6, 3))
     ax.bar(list(data.keys()), list(data.values()), color="#00FFB2", edgecolor="#00C48C", linewidth=1.5)
     ax.set_facecolor("#0E1117")
     fig.patch.set_facecolor("#0E1117")
     ax.tick_params(colors="white", labelsize=10)
-    ax.set_ylabel("Rainfall (mm)", color="white", fontsize=11)
+    ax.set_ylabel(f"Rainfall ({unit})" if unit == "mm" else unit.title(), color="white", fontsize=11)
     ax.set_title(title, color="#62D9FB", fontsize=13, pad=10)
-    plt.xticks(rotation=15, ha="right")
-    plt.tight_layout()
-    st.pyplot(fig)
-    plt.close(fig)
+    plt.setp(ax.get_xticklabels(), rotation=15, ha="right")
+    fig.tight_layout()
+    return fig
 
-def render_line_chart_with_forecast(data: dict, title: str):
-    plt.rcParams['axes.unicode_minus'] = False
-    plt.rcParams['font.family'] = 'DejaVu Sans'
-    fig, ax = plt.subplots(figsize=(6, 3))
+def render_line_chart_with_forecast(data: dict, title: str, forecast: dict = None, unit: str = "mm"):
     df = pd.DataFrame(list(data.items()), columns=["Year", "Rainfall"])
     df["Year"] = pd.to_numeric(df["Year"], errors="coerce")
     df = df.dropna().sort_values("Year")
 
     if df.empty:
-        st.warning("No valid trend data available to display.")
-        return
+        return None
 
+    fig, ax = plt.subplots(figsize=(6, 3))
     ax.plot(df["Year"], df["Rainfall"], marker="o", linestyle="-", color="#62D9FB", linewidth=2, label="Actual")
 
-    if len(df) > 1 and df["Year"].iloc[-1] - df["Year"].iloc[-2] == 1:
+    if forecast and forecast.get("y") is not None:
         ax.plot(
-            [df["Year"].iloc[-2], df["Year"].iloc[-1]],
-            [df["Rainfall"].iloc[-2], df["Rainfall"].iloc[-1]],
-            linestyle="--", color="#00FFB2", label="Forecast"
+            [df["Year"].iloc[-1], forecast["x"]],
+            [df["Rainfall"].iloc[-1], forecast["y"]],
+            linestyle="--", marker="o", color="#00FFB2", label="Forecast"
         )
+        if forecast.get("low") is not None and forecast.get("high") is not None:
+            ax.errorbar(
+                [forecast["x"]], [forecast["y"]],
+                yerr=[[forecast["y"] - forecast["low"]], [forecast["high"] - forecast["y"]]],
+                color="#00FFB2", capsize=4
+            )
 
     ax.fill_between(df["Year"], df["Rainfall"], color="#62D9FB", alpha=0.15)
     ax.set_facecolor("#0E1117")
     fig.patch.set_facecolor("#0E1117")
     ax.tick_params(colors="white", labelsize=10)
-    ax.set_ylabel("Rainfall (mm)", color="white", fontsize=11)
+    ax.set_ylabel(f"Rainfall ({unit})", color="white", fontsize=11)
     ax.set_xlabel("Year", color="white", fontsize=11)
     ax.set_title(title, color="#62D9FB", fontsize=13, pad=10)
     ax.legend(facecolor="#1C1F26", edgecolor="#2C2F36", labelcolor="white")
-    plt.tight_layout()
-    st.pyplot(fig)
-    plt.close(fig)
+    fig.tight_layout()
+    return fig
+
+def render_chart(chart: dict):
+    """Figure for a chart payload sent by the actions (`custom.chart`), or None when there is nothing to plot."""
+    series = {label: value for label, value in chart.get("series", []) if value is not None}
+    if chart.get("type") == "line":
+        return render_line_chart_with_forecast(series, chart.get("title", ""), chart.get("forecast"), chart.get("unit", "mm"))
+    if len(series) >= 2:
+        return render_bar_chart(series, chart.get("title", ""), chart.get("unit", "mm"))
+    return None
+
+def chart_image(chart: dict):
+    """PNG bytes for a chart payload, cached by a hash of the payload (b"" when nothing to plot)."""
+    key = hashlib.sha1(json.dumps(chart, sort_keys=True).encode("utf-8")).hexdigest()
+    cache, lock = get_chart_cache()
+    with lock:
+        if key in cache:
+            cache.move_to_end(key)
+            return cache[key]
+    fig = render_chart(chart)
+    image = b""
+    if fig is not None:
+        buf = io.BytesIO()
+        fig.savefig(buf, format="png", dpi=100, facecolor=fig.get_facecolor())
+        plt.close(fig)
+        image = buf.getvalue()
+    with lock:
+        cache[key] = image
+        while len(cache) > CHART_CACHE_SIZE:
+            cache.popitem(last=False)
+    return image
+
+# -----------------------------
+# Message Rendering
+# -----------------------------
+def message_html(msg: dict):
+    """Chat bubble HTML for one message (built once, when the message arrives)."""
+    content_html = msg["content"].replace("\n", "<br>")
+    if msg["role"] != "assistant":
+        return f"<div class='chat-bubble user-bubble'><span class='user-name'>You:</span> {content_html}</div>"
+    return f"<div class='chat-bubble bot-bubble'><span class='bot-name'>Samarth:</span> {content_html}</div>"
+
+def add_message(msg: dict):
+    """Append a message with its bubble HTML and chart PNG, built once and kept at its index."""
+    if msg.get("chart"):
+        msg["image"] = chart_image(msg["chart"])
+    msg["html"] = message_html(msg)
+    st.session_state.messages.append(msg)
+    return msg
+
+def show_message(msg: dict):
+    """One element per message (plus one for its chart), so a rerun only re-sends small, unchanged deltas."""
+    st.markdown(msg["html"], unsafe_allow_html=True)
+    if msg.get("image"):
+        st.image(msg["image"])
+
+def partial_html(lines: list, points: dict):
+    content = "\n".join(lines + [f"  • {label}: {value}" for label, value in sorted(points.items())])
+    return message_html({"role": "assistant", "content": content + "\n\n⏳ still working..."})
+
+def query_rasa_progressively(sender: str, user_message: str, placeholder):
+    """
+    query_rasa on a worker thread, drawing partial results from the
+    action server's event stream into `placeholder` until the full reply is in.
+    """
+    stream_id = uuid.uuid4().hex
+    result = {}
+
+    def call():
+        result["responses"] = query_rasa(sender, user_message, stream_id=stream_id)
+
+    worker = threading.Thread(target=call, daemon=True)
+    add_script_run_ctx(worker, get_script_run_ctx())
+    worker.start()
+    worker.join(0.05)  # quick replies need no stream
+
+    if STREAM_URL and worker.is_alive():
+        lines, points = [], {}
+        try:
+            with get_rasa_session().get(STREAM_URL + stream_id, stream=True, timeout=(2, 10)) as res:
+                for raw in res.iter_lines(decode_unicode=True):
+                    if not worker.is_alive():
+                        break  # the full answer is in; partials are no longer needed
+                    if not raw or not raw.startswith("data: "):
+                        continue  # blank separator or keep-alive comment
+                    event = json.loads(raw[len("data: "):])
+                    if event.get("type") == "done":
+                        break
+                    if event.get("type") == "text":
+                        lines.append(event["text"])
+                    elif event.get("type") == "point":
+                        points[event["label"]] = f"{event['value']:.2f} {event.get('unit', '')}".strip()
+                    placeholder.markdown(partial_html(lines, points), unsafe_allow_html=True)
+        except (requests.RequestException, ValueError) as e:
+            print(f"Progress stream unavailable: {e}")
+
+    worker.join()
+    placeholder.empty()
+    return result.get("responses")
 
 # -----------------------------
 # Session State Initialization
 # -----------------------------
+configure_matplotlib()
+
+if "sender_id" not in st.session_state:
+    st.session_state.sender_id = f"streamlit_{uuid.uuid4().hex}"
+
 if "messages" not in st.session_state:
-    st.session_state.messages = [
-        {"role": "assistant", "content": "Hi, I'm **Samarth**, your rainfall intelligence assistant! Ask me about rainfall trends, comparisons, or forecasts."}
-    ]
+    st.session_state.messages = []
+    add_message({"role": "assistant", "content": "Hi, I'm **Samarth**, your rainfall intelligence assistant! Ask me about rainfall trends, comparisons, or forecasts."})
 
 # -----------------------------
 # Header
 # -----------------------------
 st.markdown("<h2 style='color:#62D9FB;'>Samarth Rainfall & Climate Assistant (Under Production)</h2>", unsafe_allow_html=True)
 
+# -----------------------------
+# Display Chat Conversation
+# -----------------------------
+# Each message is its own element, from HTML and PNG built when it arrived;
+# new messages are appended below instead of redrawing the history
+for msg in st.session_state.messages:
+    show_message(msg)
+
 # -----------------------------
 # Chat Input
 # -----------------------------
 user_input = st.chat_input("Type your message here...")
 
 if user_input:
-    st.session_state.messages.append({"role": "user", "content": user_input})
+    show_message(add_message({"role": "user", "content": user_input}))
+    partial_slot = st.empty()  # partial answers stream here until the reply is in
 
     with st.spinner("🧠 Samarth is thinking..."):
-        time.sleep(0.7)  # typing animation delay
-        bot_responses = cached_query_rasa(user_input)
+        bot_responses = query_rasa_progressively(st.session_state.sender_id, user_input, partial_slot)
 
         if bot_responses:
-            comparison_data, trend_data = {}, {}
-            bot_message = ""
+            bot_message, chart = "", None
 
             for r in bot_responses:
                 if "text" in r:
-                    text = r["text"]
-                    bot_message += text + "\n\n"
-
-                    # Parse rainfall comparison (State: Value mm)
-                    for line in text.splitlines():
-                        line = line.strip()
-                        if ":" in line and "mm" in line:
-                            try:
-                                region, val = line.split(":")[0].strip(), line.split(":")[1]
-                                val = val.replace("mm", "").replace("➡️", "").strip()
-                                if region and val.replace('.', '', 1).isdigit():
-                                    if any(ch.isdigit() for ch in region):
-                                        trend_data[int(''.join(ch for ch in region if ch.isdigit()))] = float(val)
-                                    else:
-                                        comparison_data[region] = float(val)
-                            except:
-                                continue
-
-            st.session_state.messages.append({"role": "assistant", "content": bot_message})
-        else:
-            st.session_state.messages.append({"role": "assistant", "content": "Error: Unable to fetch data from backend."})
-
-# -----------------------------
-# Display Chat Conversation
-# -----------------------------
-for msg in st.session_state.messages:
-    content_html = msg["content"].replace("\n", "<br>")
-    if msg["role"] == "assistant":
-        st.markdown(f"<div class='chat-bubble bot-bubble'><span class='bot-name'>Samarth:</span> {content_html}</div>", unsafe_allow_html=True)
-    else:
-        st.markdown(f"<div class='chat-bubble user-bubble'><span class='user-name'>You:</span> {content_html}</div>", unsafe_allow_html=True)
+                    bot_message += r["text"] + "\n\n"
+                # Chart data comes structured from the actions (json_message → custom)
+                if isinstance(r.get("custom"), dict) and "chart" in r["custom"]:
+                    chart = r["custom"]["chart"]
 
-# -----------------------------
-# Render Charts
-# -----------------------------
-if "comparison_data" in locals() and len(comparison_data) >= 2:
-    st.markdown("<h4 style='color:#62D9FB;'>Rainfall Comparison Chart</h4>", unsafe_allow_html=True)
-    render_bar_chart(comparison_data, "Rainfall Comparison (IMD Data)")
-elif "trend_data" in locals() and len(trend_data) >= 2:
-    st.markdown("<h4 style='color:#62D9FB;'>Rainfall Trend & Forecast</h4>", unsafe_allow_html=True)
-    render_line_chart_with_forecast(trend_data, "Rainfall Trend & Forecast (IMD Data)")
+            reply = add_message({"role": "assistant", "content": bot_message, "chart": chart})
+        else:
+            reply = add_message({"role": "assistant", "content": "Error: Unable to fetch data from backend."})
+    show_message(reply)
 
 
 
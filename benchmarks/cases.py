@@ -0,0 +1,108 @@
+import os, shutil, asyncio
+
+# Imported by the worker process only, after run.py has pointed SAMARTH_DATA_DIR,
+# SAMARTH_CACHE_DIR and SAMARTH_STORE_DIR at one scale's fixtures.
+from actions import data_handler, warehouse
+from actions.columnar import COLUMNAR_DIR
+from actions.datasets import DATASETS
+from actions.ingest import ingest_rainfall_file
+from actions.resilience import breaker_for
+
+# ---------------------------------------------------------------------
+# 📋 BENCHMARK CASES (data layer + every intent branch of both actions)
+# ---------------------------------------------------------------------
+STATE, OTHER_STATE, YEAR = "Karnataka", "Gujarat", "2019"
+
+
+def prepare():
+    """Ingest the rainfall fixture into this scale's warehouse and take data.gov.in offline."""
+    if not warehouse.has_dataset("rainfall_district"):
+        ingest_rainfall_file("rainfall_district", os.path.join(data_handler.DATA_DIR, "rainfall_district.json"))
+    # Open every upstream circuit for good: cases never touch the network, and
+    # years missing from the fixtures take the same degraded path on every run
+    for ds in DATASETS.values():
+        breaker = breaker_for(ds["id"])
+        breaker.cooldown = float("inf")
+        for _ in range(breaker.max_failures):
+            breaker.record_failure()
+
+
+def _clear_columnar():
+    shutil.rmtree(COLUMNAR_DIR, ignore_errors=True)
+
+
+# ------------------- Data layer -------------------
+def data_layer_cases():
+    """name -> (fn, setup or None)"""
+    return {
+        "load_local_json[rice]": (lambda: data_handler.load_local_json("rice.json"), None),
+        "load_crop_data[cold]": (data_handler.load_crop_data, _clear_columnar),
+        "load_crop_data[warm]": (data_handler.load_crop_data, None),
+        "load_rainfall_data": (lambda: data_handler.load_rainfall_data(STATE, YEAR), None),
+    }
+
+
+# ------------------- Intent handlers -------------------
+def _entities(states=(), crops=(), numbers=()):
+    return ([{"entity": "state", "value": s} for s in states]
+            + [{"entity": "crop", "value": c} for c in crops]
+            + [{"entity": "number", "value": n} for n in numbers])
+
+
+RAINFALL_INTENTS = {
+    "rainfall_summary": (f"rainfall summary for {STATE} in {YEAR}", _entities([STATE], numbers=[YEAR])),
+    "compare_rainfall": (f"compare rainfall in {STATE} and {OTHER_STATE} in {YEAR}",
+                         _entities([STATE, OTHER_STATE], numbers=[YEAR])),
+    "rainfall_trend": (f"show rainfall trend in {STATE}", _entities([STATE])),
+    "predict_rainfall": (f"predict rainfall in {STATE}", _entities([STATE])),
+    "rainfall_extremes": (f"which district got highest rainfall in {STATE} in {YEAR}", _entities([STATE], numbers=[YEAR])),
+    "rainfall_seasonal": (f"monsoon rainfall in {STATE} in {YEAR}", _entities([STATE], numbers=[YEAR])),
+    "rainfall_general": (f"rainfall in {STATE} in {YEAR}", _entities([STATE], numbers=[YEAR])),
+}
+
+AGRI_BRANCHES = {
+    "compare": (f"compare rice and jowar production in {STATE}", _entities([STATE], ["Rice", "Jowar"])),
+    "extremes[1 state]": (f"highest and lowest rice production districts in {STATE}", _entities([STATE], ["Rice"])),
+    "extremes[2 states]": (f"highest and lowest rice production in {STATE} and {OTHER_STATE}",
+                           _entities([STATE, OTHER_STATE], ["Rice"])),
+    "top_districts": (f"show top 3 rice producing districts in {STATE}", _entities([STATE], ["Rice"], [3])),
+    "correlate": (f"analyze the production trend of jowar in {STATE} and correlate it with rainfall",
+                  _entities([STATE], ["Jowar"])),
+    "policy": (f"suggest a policy to promote rice over jowar in {STATE}", _entities([STATE], ["Rice", "Jowar"])),
+    "stability": (f"analyze crop yield stability with respect to rainfall variations in {STATE}", _entities([STATE])),
+    "default": ("what can you do", []),
+}
+
+
+def _run_action(action, intent, text, entities):
+    from rasa_sdk import Tracker
+    from rasa_sdk.executor import CollectingDispatcher
+
+    tracker = Tracker.from_dict({
+        "sender_id": "bench", "slots": {}, "events": [], "paused": False, "followup_action": None,
+        "active_loop": {}, "latest_action_name": None,
+        "latest_message": {"text": text, "intent": {"name": intent}, "entities": entities},
+    })
+    dispatcher = CollectingDispatcher()
+    asyncio.run(action.run(dispatcher, tracker, {}))
+    return dispatcher.messages
+
+
+def intent_cases():
+    """name -> (fn, None); empty when rasa_sdk is not installed."""
+    try:
+        from actions.actions import ActionSmartRainfall, ActionSmartAgriInsight
+    except ImportError as e:
+        print(f"[WARN] Skipping intent handlers: {e}")
+        return {}
+    cases = {}
+    rainfall, agri = ActionSmartRainfall(), ActionSmartAgriInsight()
+    for intent, (text, entities) in RAINFALL_INTENTS.items():
+        cases[f"rainfall:{intent}"] = (lambda i=intent, t=text, e=entities: _run_action(rainfall, i, t, e), None)
+    for branch, (text, entities) in AGRI_BRANCHES.items():
+        cases[f"agri:{branch}"] = (lambda t=text, e=entities: _run_action(agri, "crop_insight", t, e), None)
+    return cases
+
+
+def all_cases():
+    return {**data_layer_cases(), **intent_cases()}
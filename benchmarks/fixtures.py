@@ -0,0 +1,90 @@
+import os, json, random
+
+# ---------------------------------------------------------------------
+# 🧪 SYNTHETIC FIXTURES (rice.json scaled 1× … 1000×)
+# ---------------------------------------------------------------------
+# Crop exports keep rice.json's layout ('fields' + 'data' with field labels);
+# every row is a real row with its district swapped for one from the bundled
+# district→state table (so State resolution works) and its figures jittered.
+# The rainfall dump has one record per district row per month, years cycling
+# over RAIN_YEARS (at 1× every state has 2018–2022). Everything is seeded,
+# so a scale always yields the same bytes.
+REPO_DIR = os.path.join(os.path.dirname(__file__), "..")
+SOURCE_DIR = os.path.join(REPO_DIR, "data_json")
+DISTRICT_STATE_FILE = os.path.join(REPO_DIR, "actions", "district_state.json")
+CROP_EXPORTS = ("rice.json", "jowar.json")
+RAIN_YEARS = tuple(range(2018, 2025))
+SEED = 20181
+
+
+def districts():
+    """(State, District) pairs, round-robin over states so even 1× covers every state."""
+    with open(DISTRICT_STATE_FILE, "r", encoding="utf-8") as f:
+        states = json.load(f)["states"]
+    per_state = [[(state, d) for d in sorted(ds)] for state, ds in sorted(states.items())]
+    longest = max(len(ds) for ds in per_state)
+    return [ds[i] for i in range(longest) for ds in per_state if i < len(ds)]
+
+
+def _jitter(value, rng):
+    try:
+        return str(max(round(float(value) * rng.uniform(0.5, 1.5)), 0))
+    except ValueError:
+        return value
+
+
+def scaled_export(source, scale, districts, rng):
+    """`source` ('fields' + 'data') with scale × its rows."""
+    with open(source, "r", encoding="utf-8") as f:
+        export = json.load(f)
+    labels = [field["label"] if isinstance(field, dict) else field for field in export["fields"]]
+    district_col = next(i for i, label in enumerate(labels) if "district" in label.lower())
+    rows = []
+    for n in range(len(export["data"]) * scale):
+        row = [_jitter(v, rng) for v in export["data"][n % len(export["data"])]]
+        row[0] = str(n + 1)
+        row[district_col] = districts[n % len(districts)][1].upper()
+        rows.append(row)
+    return {"fields": export["fields"], "data": rows}
+
+
+def rainfall_records(rows, districts, rng):
+    """District-month rainfall records for `rows` district rows."""
+    records = []
+    n_states = len({state for state, _ in districts})
+    for n in range(rows):
+        state, district = districts[n % len(districts)]
+        year = RAIN_YEARS[(n // n_states) % len(RAIN_YEARS)]  # every state gets each year in turn
+        for month in range(1, 13):
+            records.append({
+                "State": state, "District": district, "Year": str(year), "Month": f"{month:02d}",
+                "Avg_rainfall": f"{rng.gammavariate(2.0, 40.0):.2f}",
+            })
+    return records
+
+
+def build_fixtures(root, scale):
+    """
+    Write data_json-style fixtures for one scale under `root` (skipped when
+    already there). Returns the directory to use as SAMARTH_DATA_DIR.
+    """
+    data_dir = os.path.join(root, f"x{scale}", "data_json")
+    marker = os.path.join(data_dir, ".complete")
+    if os.path.exists(marker):
+        return data_dir
+    os.makedirs(data_dir, exist_ok=True)
+    rng = random.Random(SEED + scale)
+    pairs = districts()
+
+    base_rows = 0
+    for name in CROP_EXPORTS:
+        export = scaled_export(os.path.join(SOURCE_DIR, name), scale, pairs, rng)
+        base_rows = max(base_rows, len(export["data"]))
+        with open(os.path.join(data_dir, name), "w", encoding="utf-8") as f:
+            json.dump(export, f)
+
+    with open(os.path.join(data_dir, "rainfall_district.json"), "w", encoding="utf-8") as f:
+        json.dump({"records": rainfall_records(base_rows, pairs, rng)}, f)
+
+    open(marker, "w").close()
+    return data_dir
@@ -0,0 +1,181 @@
+import os, sys, gc, json, time, fnmatch, argparse, platform, statistics, subprocess, tracemalloc
+
+from .fixtures import REPO_DIR, build_fixtures
+
+# ---------------------------------------------------------------------
+# ⏱️ MICROBENCHMARKS
+#   python -m benchmarks.run                        1×, 10×, 100×, 1000× vs the stored baseline
+#   python -m benchmarks.run --scales 1,10 -k 'rainfall:*'
+#   python -m benchmarks.run --save-baseline        record the current numbers as the baseline
+# ---------------------------------------------------------------------
+# Each scale runs in its own process with SAMARTH_DATA_DIR / CACHE_DIR / STORE_DIR
+# pointed at that scale's fixtures (under .bench/), so caches and memory start
+# cold and scales never see each other's data. Per case:
+#   time    median (and min) wall time over --repeat runs, after one discarded warm-up run
+#   peak    peak traced Python memory during one extra run (tracemalloc)
+#   allocs  memory blocks allocated during that run and still live at its end
+# A case regresses when its median time or peak memory exceeds the baseline by
+# more than --threshold; the command then exits with status 1.
+BENCH_DIR = os.path.join(REPO_DIR, ".bench")
+BASELINE_FILE = os.path.join(os.path.dirname(__file__), "baseline.json")
+DEFAULT_SCALES = (1, 10, 100, 1000)
+
+
+def measure(fn, repeat, setup=None):
+    if setup:
+        setup()
+    fn()  # warm-up: imports, lazily built indexes
+    times = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        gc.collect()
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+
+    if setup:
+        setup()
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    tracemalloc.reset_peak()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    allocs = sum(max(stat.count_diff, 0) for stat in after.compare_to(before, "lineno"))
+    return {
+        "median_s": statistics.median(times), "min_s": min(times),
+        "peak_kib": round(peak / 1024, 1), "allocs": allocs,
+    }
+
+
+# ------------------- Worker (one scale) -------------------
+def run_worker(scale, pattern, repeat):
+    from . import cases  # env is set by the parent before this import
+
+    cases.prepare()
+    results = {}
+    for name, (fn, setup) in cases.all_cases().items():
+        if not fnmatch.fnmatch(name, pattern):
+            continue
+        try:
+            results[name] = measure(fn, repeat, setup)
+        except Exception as e:
+            print(f"[ERROR] {name} @ {scale}x failed: {e}", file=sys.stderr)
+            results[name] = {"error": repr(e)}
+    return results
+
+
+def _worker_env(scale):
+    data_dir = build_fixtures(BENCH_DIR, scale)
+    root = os.path.dirname(data_dir)
+    return {
+        **os.environ,
+        "SAMARTH_DATA_DIR": data_dir,
+        "SAMARTH_CACHE_DIR": os.path.join(root, "cache"),
+        "SAMARTH_STORE_DIR": os.path.join(root, "store"),
+        "SAMARTH_WARM_UP": "0",       # nothing built behind the benchmark's back
+        "SAMARTH_METRICS_PORT": "0",
+    }
+
+
+def run_scale(scale, pattern, repeat):
+    """Results of one scale, measured in a fresh subprocess."""
+    cmd = [sys.executable, "-m", "benchmarks.run", "--worker", str(scale), "-k", pattern, "--repeat", str(repeat)]
+    proc = subprocess.run(cmd, cwd=REPO_DIR, env=_worker_env(scale), capture_output=True, text=True)
+    if proc.returncode != 0:
+        print(proc.stderr, file=sys.stderr)
+        raise RuntimeError(f"benchmark worker for {scale}x exited with {proc.returncode}")
+    *logs, results = proc.stdout.strip().splitlines()  # results come last; earlier lines are the code's own logging
+    for line in logs:
+        if line.startswith(("[WARN]", "[ERROR]")):
+            print(f"  {scale}x {line}", file=sys.stderr)
+    if proc.stderr.strip():
+        print(proc.stderr.strip(), file=sys.stderr)
+    return json.loads(results)
+
+
+# ------------------- Baselines & report -------------------
+def load_baseline(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f).get("results", {})
+
+
+def save_baseline(path, results):
+    doc = {"python": platform.python_version(), "machine": platform.machine(),
+           "saved_at": time.strftime("%Y-%m-%dT%H:%M:%S"), "results": results}
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(doc, f, indent=1, sort_keys=True)
+
+
+def compare(current, baseline, threshold):
+    """{key: [reasons]} for every case that regressed past `threshold`."""
+    regressions = {}
+    for key, now in current.items():
+        base = baseline.get(key)
+        if not base or "error" in now or "error" in base:
+            continue
+        reasons = []
+        for metric in ("median_s", "peak_kib"):
+            if base.get(metric) and now[metric] > base[metric] * (1 + threshold):
+                reasons.append(f"{metric} {base[metric]:.4g} → {now[metric]:.4g} (+{now[metric] / base[metric] - 1:.0%})")
+        if reasons:
+            regressions[key] = reasons
+    return regressions
+
+
+def report(current, baseline, regressions):
+    print(f"{'case':<36} {'scale':>6} {'median ms':>10} {'min ms':>9} {'peak KiB':>10} {'allocs':>8} {'vs base':>8}")
+    for key, r in current.items():
+        name, scale = key.rsplit("@", 1)
+        if "error" in r:
+            print(f"{name:<36} {scale:>6}  ERROR {r['error']}")
+            continue
+        base = baseline.get(key, {}).get("median_s")
+        delta = f"{r['median_s'] / base - 1:+.0%}" if base else "new"
+        flag = "  ⚠️ REGRESSION" if key in regressions else ""
+        print(f"{name:<36} {scale:>6} {r['median_s'] * 1000:10.2f} {r['min_s'] * 1000:9.2f} "
+              f"{r['peak_kib']:10.1f} {r['allocs']:8d} {delta:>8}{flag}")
+    for key, reasons in regressions.items():
+        print(f"⚠️ {key}: " + "; ".join(reasons))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Microbenchmarks for the data layer and intent handlers.")
+    parser.add_argument("--scales", default=",".join(map(str, DEFAULT_SCALES)), help="multiples of rice.json, comma-separated")
+    parser.add_argument("-k", dest="pattern", default="*", help="only cases matching this glob (e.g. 'agri:*')")
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per case")
+    parser.add_argument("--baseline", default=BASELINE_FILE, help="baseline JSON to compare against / save to")
+    parser.add_argument("--save-baseline", action="store_true", help="store these results as the new baseline")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed slowdown / memory growth before flagging")
+    parser.add_argument("--worker", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.worker is not None:
+        print(json.dumps(run_worker(args.worker, args.pattern, args.repeat)))
+        return 0
+
+    current = {}
+    for scale in (int(s) for s in args.scales.split(",") if s.strip()):
+        t0 = time.perf_counter()
+        for name, r in run_scale(scale, args.pattern, args.repeat).items():
+            current[f"{name}@{scale}x"] = r
+        print(f"  • {scale}x measured in {time.perf_counter() - t0:.1f}s", file=sys.stderr)
+
+    baseline = load_baseline(args.baseline)
+    regressions = compare(current, baseline, args.threshold)
+    report(current, baseline, regressions)
+
+    if args.save_baseline:
+        save_baseline(args.baseline, {**baseline, **current})
+        print(f"✅ Baseline saved to {os.path.normpath(args.baseline)}")
+        return 0
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
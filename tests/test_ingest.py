@@ -0,0 +1,61 @@
+import os
+import functools
+
+import pytest
+
+from actions import ingest, pagination, warehouse
+from actions.resilience import UpstreamUnavailable
+
+
+def _page(n, offset=0, total=None):
+    records = [{"State": "Kerala", "Year": "2020", "Date": "2020-06-01", "District": f"D{offset + i}",
+                "Avg_rainfall": "1.0"} for i in range(n)]
+    return {"records": records, "total": total}
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.setattr(warehouse, "STORE_DIR", str(tmp_path))
+    rolled_up = []
+    monkeypatch.setattr(ingest, "update_cube", lambda dataset, written: rolled_up.append(written))
+    return tmp_path, rolled_up
+
+
+def test_failed_page_aborts_the_slice_without_writing(store, monkeypatch):
+    tmp_path, rolled_up = store
+
+    def fetch(resource_id, filters, offset, limit, raise_errors=False):
+        if offset:
+            assert raise_errors
+            raise UpstreamUnavailable("HTTP 503")
+        return _page(limit, total=3 * limit)
+    monkeypatch.setattr(ingest, "fetch_resource_page", fetch)
+
+    with pytest.raises(UpstreamUnavailable):
+        ingest._ingest_slice("rainfall_district", {"State": "Kerala", "Year": "2020"})
+    assert rolled_up == []
+    assert not warehouse.has_dataset("rainfall_district")
+    assert not os.path.exists(os.path.join(tmp_path, "_staging", "rainfall_district"))
+
+
+def test_complete_slice_is_written_and_rolled_up(store, monkeypatch):
+    _, rolled_up = store
+    pages = iter([_page(3), _page(3, 3), _page(1, 6)])
+    monkeypatch.setattr(ingest, "fetch_resource_page", lambda *args, **kwargs: next(pages))
+    monkeypatch.setattr(ingest, "iter_record_batches", functools.partial(pagination.iter_record_batches, page_size=3))
+
+    assert ingest._ingest_slice("rainfall_district", {"State": "Kerala", "Year": "2020"}) == 7
+    assert rolled_up == [[("Kerala", 2020, "06")]]
+    assert sum(len(rain) for *_, rain in warehouse.scan("rainfall_district")) == 7
+
+
+def test_truncated_slice_is_not_written(store, monkeypatch):
+    tmp_path, rolled_up = store
+    monkeypatch.setattr(ingest, "INGEST_MAX_RECORDS", 6)
+    monkeypatch.setattr(ingest, "fetch_resource_page", lambda resource_id, filters, offset, limit, **kwargs: _page(3, offset))
+    monkeypatch.setattr(ingest, "iter_record_batches", functools.partial(pagination.iter_record_batches, page_size=3))
+
+    with pytest.raises(ingest.SliceTruncated):
+        ingest._ingest_slice("rainfall_district", {"State": "Kerala", "Year": "2020"})
+    assert rolled_up == []
+    assert not warehouse.has_dataset("rainfall_district")
@@ -0,0 +1,45 @@
+import time
+import asyncio
+
+from actions.resilience import hedged, turn_budget
+
+
+async def _after(seconds, value=None, error=None):
+    await asyncio.sleep(seconds)
+    if error:
+        raise error
+    return value
+
+
+def _hedged(primary, fallback, budget=1.0, **kwargs):
+    async def run():
+        with turn_budget(budget):
+            return await hedged(primary, fallback, useful=bool, **kwargs)
+    return asyncio.run(run())
+
+
+def test_useful_primary_wins():
+    result = _hedged(lambda: _after(0.01, "primary"), lambda: _after(0.01, "fallback"), hedge_after=0.5)
+    assert result == ("primary", False)
+
+
+def test_fallback_used_when_primary_too_slow():
+    result = _hedged(lambda: _after(5, "primary"), lambda: _after(0.01, "fallback"),
+                     hedge_after=0.05, primary_share=0.2)
+    assert result == ("fallback", True)
+
+
+def test_failed_fallback_keeps_waiting_for_primary_past_its_share():
+    # The fallback fails right away; the primary only answers after its share
+    # of the budget (0.2 s) but well before the deadline (1 s)
+    result = _hedged(lambda: _after(0.4, "primary"), lambda: _after(0.01, error=RuntimeError("offline")),
+                     hedge_after=0.05, primary_share=0.2)
+    assert result == ("primary", False)
+
+
+def test_gives_up_at_the_deadline_when_everything_fails():
+    t0 = time.perf_counter()
+    result = _hedged(lambda: _after(5, "primary"), lambda: _after(0.01, error=RuntimeError("offline")),
+                     budget=0.3, hedge_after=0.05, primary_share=0.2)
+    assert result == (None, False)
+    assert 0.25 < time.perf_counter() - t0 < 1